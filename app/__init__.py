@@ -1,5 +1,14 @@
-from flask import Flask
+"""BladePlan cut optimizer.
 
-app = Flask(__name__)
+The Flask application lives in :mod:`app.cut_optimizer_app` and is only
+imported when ``app.app`` is first used, so helpers such as
+:mod:`app.metrics` or :mod:`app.portfolio` can be imported without Flask.
+"""
 
-from . import cut_optimizer_app  # noqa: F401,E402
+
+def __getattr__(name):
+    if name == 'app':
+        from .cut_optimizer_app import app
+
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
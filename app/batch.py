@@ -0,0 +1,125 @@
+"""Optimize several material shapes in one request.
+
+A batch maps each shape, such as ``W12x65`` or ``HSS4x4x1/4``, to its own
+demand and stock. Shapes never share sticks, so every shape is an
+independent subproblem. :class:`ShapeBatch` answers what it can from the
+plan cache and solves the rest concurrently on a process pool, one shape
+per task. Plans cross the process boundary in the compact encoding of
+:mod:`app.result_cache`.
+
+Pools are never nested. Inside a worker process, such as a background job,
+shapes are solved one after another, and strategies that use a pool of
+their own, like ``portfolio``, run in-process inside batch workers.
+"""
+
+import os
+import threading
+import weakref
+
+from .result_cache import decode_plan, encode_plan, plan_key
+
+
+def _solve(plan, demand, inventory, kerf_width, strategy):
+    bins, uncut, layout, report = plan(demand, inventory, kerf_width, strategy)
+    return encode_plan(bins, uncut, layout, demand, inventory, report)
+
+
+# Batches whose pools must be forgotten in forked children.
+_BATCHES = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for batch in list(_BATCHES):
+        batch._executor = None
+        batch._lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def plan_totals(bins) -> dict:
+    """Return stock, used and scrap totals for the bins of a plan."""
+    total_stock = sum(b['stock_length'] for b in bins)
+    total_scrap = sum(b['remaining'] for b in bins)
+    return {
+        'total_stock': total_stock,
+        'total_used': sum(b['used'] for b in bins),
+        'total_scrap': total_scrap,
+        'total_scrap_pct': (total_scrap / total_stock) * 100 if total_stock else 0.0,
+    }
+
+
+class ShapeBatch:
+    """Solve per-shape subproblems concurrently.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Size of the process pool, by default one per CPU. ``0`` solves the
+        shapes one after another in this process, as does running inside a
+        ``multiprocessing`` worker.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        _BATCHES.add(self)
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                from concurrent.futures import ProcessPoolExecutor
+
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    def optimize(self, problems, kerf_width: float, strategy: str, plan, cache=None) -> dict:
+        """Return ``{shape: (bins, uncut, layout, report)}`` for ``problems``.
+
+        ``problems`` maps each shape to ``(demand, inventory)``. ``plan`` is
+        a picklable module-level function with the signature of
+        :func:`app.cut_optimizer_app.plan_demand`. Shapes found in the
+        :class:`app.result_cache.ResultCache` ``cache`` are not solved again,
+        and fresh plans are added to it.
+        """
+        entries = {}
+        todo = []
+        for shape, (demand, inventory) in problems.items():
+            key = plan_key(demand, inventory, kerf_width, strategy)
+            entry = cache.get(key) if cache is not None else None
+            if entry is not None:
+                entries[shape] = entry
+            else:
+                todo.append((shape, key, demand, inventory))
+
+        from multiprocessing import parent_process
+
+        if len(todo) > 1 and self.max_workers != 0 and parent_process() is None:
+            pool = self._pool()
+            futures = [
+                (shape, key, pool.submit(_solve, plan, demand, inventory, kerf_width, strategy))
+                for shape, key, demand, inventory in todo
+            ]
+            solved = [(shape, key, future.result()) for shape, key, future in futures]
+        else:
+            solved = [
+                (shape, key, _solve(plan, demand, inventory, kerf_width, strategy))
+                for shape, key, demand, inventory in todo
+            ]
+        for shape, key, entry in solved:
+            entries[shape] = entry
+            if cache is not None:
+                cache.put(key, entry)
+
+        return {
+            shape: decode_plan(entries[shape], demand, inventory)
+            for shape, (demand, inventory) in problems.items()
+        }
@@ -1,10 +1,59 @@
-from flask import Flask, render_template, request, send_file
+from flask import (
+    Flask,
+    Response,
+    abort,
+    before_render_template,
+    g,
+    jsonify,
+    render_template,
+    request,
+    send_file,
+    template_rendered,
+)
+from contextlib import contextmanager
 import csv
 import io
 import os
-import re
-import tempfile
-import uuid
+import sys
+import time
+
+if __name__ == '__main__' and not __package__:
+    # Allow ``python app/cut_optimizer_app.py`` as documented in the README
+    # while still resolving the sibling modules below as part of ``app``.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = 'app'
+
+from common.lengths import (  # noqa: E402
+    LengthError,
+    format_length,
+    parse_length,
+    parse_length_cache_info,
+    parse_lengths,
+)
+from common.placement import (  # noqa: E402
+    STRATEGIES as PLACEMENT_STRATEGIES,
+    place_demand,
+    place_parts,
+)
+
+from .batch import ShapeBatch, plan_totals  # noqa: E402
+from .demand import DemandCollector, StockInventory, expand_demand  # noqa: E402
+from .ingest import iter_csv_chunks  # noqa: E402
+from .jobs import JobQueue  # noqa: E402
+from . import memprof  # noqa: E402
+from .metrics import (  # noqa: E402
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    REGISTRY,
+    collect_server_timing,
+    server_timing_header,
+    stage,
+)
+from .plan_store import PlanStore  # noqa: E402
+from .plan_stream import iter_plan_ndjson  # noqa: E402
+from .portfolio import Portfolio  # noqa: E402
+from .result_cache import ResultCache, decode_plan, encode_plan, plan_key  # noqa: E402
+
+STRATEGIES = PLACEMENT_STRATEGIES + ('exact', 'portfolio')
 
 app = Flask(__name__)
 # Expose Python's ``zip`` function to Jinja templates so they can iterate
@@ -12,67 +61,157 @@ app = Flask(__name__)
 app.jinja_env.globals.update(zip=zip)
 
 
-def parse_length(length_str: str) -> float:
-    """Convert length strings like ``"11' 9 15/16\""`` to inches.
-
-    Raises
-    ------
-    ValueError
-        If ``length_str`` contains malformed numeric values.
-    """
-    length_str = length_str.strip().lower()
-    if not length_str:
-        raise ValueError("Length value is missing")
-
-    metric = re.fullmatch(r"([0-9]*\.?[0-9]+)\s*(mm|cm|m)", length_str)
-    if metric:
-        val = float(metric.group(1))
-        unit = metric.group(2)
-        if unit == "mm":
-            return val / 25.4
-        if unit == "cm":
-            return (val * 10) / 25.4
-        return (val * 1000) / 25.4
-
-    feet = 0
-    feet_match = re.search(r"(\d+)\s*'", length_str)
-    if feet_match:
-        feet = int(feet_match.group(1))
-        length_str = length_str[feet_match.end():]
-
-    length_str = length_str.replace('"', '').strip()
-    inches = 0.0
-    if length_str:
-        parts = length_str.split()
-        whole = 0
-        frac = 0.0
-        for p in parts:
-            if '/' in p:
-                try:
-                    num, denom = p.split('/')
-                    frac += int(num) / int(denom)
-                except (ValueError, ZeroDivisionError) as exc:
-                    raise ValueError(f"Invalid fraction '{p}' in length '{length_str}'") from exc
-            else:
-                try:
-                    whole += float(p)
-                except ValueError as exc:
-                    raise ValueError(f"Invalid number '{p}' in length '{length_str}'") from exc
-        inches = whole + frac
-
-
-    return feet * 12 + inches
+def _env_number(name: str, default, cast=float):
+    """Return ``cast(os.environ[name])``, or ``default`` if unset or invalid."""
+    try:
+        return cast(os.environ[name])
+    except (KeyError, ValueError):
+        return default
 
 
 DEFAULT_KERF = 0.0
 if 'DEFAULT_KERF' in os.environ:
     try:
-        DEFAULT_KERF = parse_length(os.environ['DEFAULT_KERF'])
+        DEFAULT_KERF = parse_lengths([os.environ['DEFAULT_KERF']])[0]
     except ValueError:
         DEFAULT_KERF = 0.0
 
-def parse_parts(text: str):
-    parts = []
+# Wall-clock budget in seconds for the ``exact`` column-generation strategy.
+EXACT_TIME_LIMIT = _env_number('EXACT_TIME_LIMIT', 2.0)
+
+# Upload guards for CSV imports; 0 disables a limit.
+CSV_MAX_ROWS = _env_number('CSV_MAX_ROWS', 500_000, int)
+CSV_MAX_BYTES = _env_number('CSV_MAX_BYTES', 64 * 1024 * 1024, int)
+
+# Optimized plans stay downloadable for PLAN_TTL seconds; reports are
+# rendered on first download and cached up to REPORT_CACHE_BYTES.
+PLANS = PlanStore(
+    max_plans=_env_number('PLAN_CACHE_SIZE', 256, int),
+    max_report_bytes=_env_number('REPORT_CACHE_BYTES', 64 * 1024 * 1024, int),
+    ttl=_env_number('PLAN_TTL', 3600.0),
+)
+
+# Plans for previously seen inputs, keyed by their canonical content. Set
+# RESULT_CACHE_DIR to also keep them on disk across restarts and workers.
+RESULTS = ResultCache(
+    max_entries=_env_number('RESULT_CACHE_SIZE', 128, int),
+    directory=os.environ.get('RESULT_CACHE_DIR') or None,
+)
+
+# Inputs with at least ASYNC_MIN_PIECES parts plus sticks are optimized as
+# background jobs on JOB_WORKERS processes; 0 workers keeps everything inline.
+JOB_WORKERS = _env_number('JOB_WORKERS', 2, int)
+ASYNC_MIN_PIECES = _env_number('ASYNC_MIN_PIECES', 50_000, int)
+JOBS = JobQueue(max_workers=max(JOB_WORKERS, 1))
+
+# The ``portfolio`` strategy races several heuristics on PORTFOLIO_WORKERS
+# processes (default one per CPU, 0 = sequentially in-process) and returns
+# the best plan found within PORTFOLIO_TIME_LIMIT seconds.
+PORTFOLIO = Portfolio(
+    max_workers=_env_number('PORTFOLIO_WORKERS', None, int),
+    time_limit=_env_number('PORTFOLIO_TIME_LIMIT', 2.0),
+)
+
+# Uploads tagged with several shapes are optimized one shape per process on
+# BATCH_WORKERS processes (default one per CPU, 0 = one after another).
+BATCH = ShapeBatch(max_workers=_env_number('BATCH_WORKERS', None, int))
+
+# Set SERVER_TIMING=1 to add a Server-Timing header with per-stage durations
+# to every response, for inspection in the browser's network panel.
+SERVER_TIMING = bool(_env_number('SERVER_TIMING', 0, int))
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'bladeplan_request_seconds', 'Request latency by endpoint and status.'
+)
+REQUEST_BYTES = REGISTRY.counter(
+    'bladeplan_request_bytes_total', 'Request body bytes received, by endpoint.'
+)
+PARTS_TOTAL = REGISTRY.counter('bladeplan_parts_total', 'Parts submitted for optimization.')
+STICKS_TOTAL = REGISTRY.counter('bladeplan_sticks_total', 'Stock sticks submitted for optimization.')
+
+# MEMORY_PROFILE=1 traces the allocations of every request's stages with
+# tracemalloc and logs each stage's peak and top allocation sites;
+# MEMORY_PROFILE=header does so only for requests sent with an
+# ``X-Memory-Profile: 1`` header. Reports are also written as JSON files to
+# MEMORY_PROFILE_DIR when set.
+MEMORY_PROFILE = os.environ.get('MEMORY_PROFILE', '').strip().lower()
+if MEMORY_PROFILE in ('', '0', 'off'):
+    MEMORY_PROFILE = ''
+MEMORY_PROFILE_DIR = os.environ.get('MEMORY_PROFILE_DIR') or None
+MEMORY_PROFILE_TOP = _env_number('MEMORY_PROFILE_TOP', memprof.TOP_SITES, int)
+
+
+def _count_input(demand, inventory) -> None:
+    PARTS_TOTAL.inc(sum(d.qty for d in demand))
+    STICKS_TOTAL.inc(len(inventory))
+
+
+@app.before_request
+def _start_request_metrics():
+    g.request_start = time.perf_counter()
+    g.server_timing = collect_server_timing(SERVER_TIMING)
+    if MEMORY_PROFILE and (
+        MEMORY_PROFILE != 'header' or request.headers.get('X-Memory-Profile') == '1'
+    ):
+        g.memory_profile = memprof.start(
+            f'{request.method} {request.path}', MEMORY_PROFILE_TOP
+        )
+    if request.content_length:
+        REQUEST_BYTES.inc(request.content_length, endpoint=request.endpoint or 'unknown')
+
+
+@app.after_request
+def _finish_request_metrics(response):
+    start = g.get('request_start')
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+    REQUEST_SECONDS.observe(
+        elapsed, endpoint=request.endpoint or 'unknown', status=str(response.status_code)
+    )
+    if g.get('server_timing') is not None:
+        entries = g.server_timing + [('total', elapsed)]
+        response.headers['Server-Timing'] = server_timing_header(entries)
+    return response
+
+
+@app.teardown_request
+def _finish_memory_profile(exc):
+    profile = g.pop('memory_profile', None)
+    if profile is None:
+        return
+    report = profile.finish()
+    if not report['stages']:
+        return
+    app.logger.warning(memprof.format_report(report))
+    if MEMORY_PROFILE_DIR:
+        memprof.dump_report(report, MEMORY_PROFILE_DIR)
+
+
+def _render_started(sender, template, context, **extra):
+    g.render_stage = stage('render')
+    g.render_stage.__enter__()
+
+
+def _render_finished(sender, template, context, **extra):
+    render_stage = g.pop('render_stage', None)
+    if render_stage is not None:
+        render_stage.__exit__(None, None, None)
+
+
+before_render_template.connect(_render_started, app)
+template_rendered.connect(_render_finished, app)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose request, stage and input metrics in Prometheus text format."""
+    return Response(REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
+
+
+def parse_demand(text: str) -> list:
+    """Parse a typed parts list into one :class:`PartDemand` per mark and length."""
+    demand = DemandCollector()
     for line in text.splitlines():
         line = line.strip()
         if not line:
@@ -95,13 +234,18 @@ def parse_parts(text: str):
         except ValueError as exc:
             raise ValueError(f"Invalid length in line '{line}': {exc}") from exc
 
-        for _ in range(qty):
-            parts.append({'mark': mark, 'length': length, 'length_str': length_str})
-    return parts
+        demand.add(mark, length, length_str, qty)
+    return demand.lines()
 
 
-def parse_stock(text: str):
-    stocks = []
+def parse_parts(text: str):
+    """Parse a typed parts list into one dict per physical piece."""
+    return expand_demand(parse_demand(text))
+
+
+def parse_inventory(text: str) -> StockInventory:
+    """Parse a typed stock list into a :class:`StockInventory`."""
+    inventory = StockInventory()
     for line in text.splitlines():
         line = line.strip()
         if not line:
@@ -123,130 +267,236 @@ def parse_stock(text: str):
         except ValueError as exc:
             raise ValueError(f"Invalid length in line '{line}': {exc}") from exc
 
-        for _ in range(qty):
-            stocks.append({'length': length, 'length_str': length_str})
-    # Sort stock by length descending for FFD
-    stocks.sort(key=lambda x: -x['length'])
-    return stocks
+        inventory.add(length, length_str, qty)
+    return inventory
+
+
+def parse_stock(text: str):
+    """Parse a typed stock list into one dict per stick, longest first."""
+    return parse_inventory(text).sticks()
+
+
+def _csv_quantities(rows, first_row: int, kind: str) -> list:
+    quantities = []
+    for row_num, row in enumerate(rows, start=first_row):
+        qty_str = (row.get('qty') or '').strip()
+        if not qty_str.isdigit() or int(qty_str) <= 0:
+            raise ValueError(f"Invalid quantity '{qty_str}' in {kind} CSV row {row_num}")
+        quantities.append(int(qty_str))
+    return quantities
+
+
+def _csv_lengths(rows, first_row: int, kind: str):
+    length_strs = [(row.get('length') or '').strip() for row in rows]
+    try:
+        lengths = parse_lengths(length_strs, positive=True, start=first_row)
+    except LengthError as exc:
+        raise ValueError(
+            f"Invalid length '{exc.value}' in {kind} CSV row {exc.row}: {exc.reason}"
+        ) from exc
+    return lengths, length_strs
+
+
+def parse_demand_csv(file, max_rows: int = None, max_bytes: int = None) -> list:
+    """Parse parts from a CSV file stream into :class:`PartDemand` records.
+
+    The upload is streamed and aggregated chunk by chunk. ``max_rows`` and
+    ``max_bytes`` default to ``CSV_MAX_ROWS`` and ``CSV_MAX_BYTES``.
+    """
+    demand = DemandCollector()
+    chunks = iter_csv_chunks(
+        file,
+        'Parts CSV',
+        CSV_MAX_ROWS if max_rows is None else max_rows,
+        CSV_MAX_BYTES if max_bytes is None else max_bytes,
+    )
+    for first_row, rows in chunks:
+        quantities = _csv_quantities(rows, first_row, 'parts')
+        lengths, length_strs = _csv_lengths(rows, first_row, 'parts')
+        for row, qty, length, length_str in zip(rows, quantities, lengths, length_strs):
+            demand.add((row.get('mark') or '').strip(), length, length_str, qty)
+    return demand.lines()
 
 
 def parse_parts_csv(file) -> list:
     """Parse parts from a CSV file stream."""
-    parts = []
-    data = file.read()
-    if not data:
-        return parts
-    text = data.decode() if isinstance(data, bytes) else data
-    reader = csv.DictReader(io.StringIO(text))
-    for row in reader:
-        qty_str = row.get('qty', '').strip()
-        if not qty_str.isdigit() or int(qty_str) <= 0:
-            raise ValueError(f"Invalid quantity '{qty_str}' in parts CSV")
-        qty = int(qty_str)
+    return expand_demand(parse_demand_csv(file))
 
-        mark = row.get('mark', '').strip()
-        length_str = row.get('length', '').strip()
-        if not length_str:
-            raise ValueError("Missing length in parts CSV")
-        try:
-            length = parse_length(length_str)
-            if length <= 0:
-                raise ValueError("length must be positive")
-        except ValueError as exc:
-            raise ValueError(f"Invalid length '{length_str}' in parts CSV: {exc}") from exc
 
-        for _ in range(qty):
-            parts.append({'mark': mark, 'length': length, 'length_str': length_str})
-    return parts
+def parse_inventory_csv(file, max_rows: int = None, max_bytes: int = None) -> StockInventory:
+    """Parse stock lengths from a CSV file stream into a :class:`StockInventory`.
+
+    Streams the upload like :func:`parse_demand_csv`.
+    """
+    inventory = StockInventory()
+    chunks = iter_csv_chunks(
+        file,
+        'Stock CSV',
+        CSV_MAX_ROWS if max_rows is None else max_rows,
+        CSV_MAX_BYTES if max_bytes is None else max_bytes,
+    )
+    for first_row, rows in chunks:
+        quantities = _csv_quantities(rows, first_row, 'stock')
+        lengths, length_strs = _csv_lengths(rows, first_row, 'stock')
+        for qty, length, length_str in zip(quantities, lengths, length_strs):
+            inventory.add(length, length_str, qty)
+    return inventory
 
 
 def parse_stock_csv(file) -> list:
     """Parse stock lengths from a CSV file stream."""
-    stocks = []
-    data = file.read()
-    if not data:
-        return stocks
-    text = data.decode() if isinstance(data, bytes) else data
-    reader = csv.DictReader(io.StringIO(text))
-    for row in reader:
-        qty_str = row.get('qty', '').strip()
-        if not qty_str.isdigit() or int(qty_str) <= 0:
-            raise ValueError(f"Invalid quantity '{qty_str}' in stock CSV")
-        qty = int(qty_str)
+    return parse_inventory_csv(file).sticks()
 
-        length_str = row.get('length', '').strip()
-        if not length_str:
-            raise ValueError("Missing length in stock CSV")
-        try:
-            length = parse_length(length_str)
-            if length <= 0:
-                raise ValueError("length must be positive")
-        except ValueError as exc:
-            raise ValueError(f"Invalid length '{length_str}' in stock CSV: {exc}") from exc
-
-        for _ in range(qty):
-            stocks.append({'length': length, 'length_str': length_str})
-    stocks.sort(key=lambda x: -x['length'])
-    return stocks
-
-
-def optimize_cuts(parts, stocks, kerf_width: float = 0.0):
-    bins = []
-    for stock in stocks:
-        bins.append({
-            'stock_length': stock['length'],
-            'stock_str': stock['length_str'],
-            'remaining': stock['length'],
-            'parts': []
-        })
-    parts_sorted = sorted(parts, key=lambda p: -p['length'])
-    uncut = []
-    for part in parts_sorted:
-        placed = False
-        for b in bins:
-            required = part['length']
-            if b['parts']:
-                required += kerf_width
-            if required <= b['remaining']:
-                b['parts'].append(part)
-                b['remaining'] -= required
-                placed = True
-                break
-        if not placed:
-            uncut.append(part)
-    return bins, uncut
-
-
-def format_length(inches: float) -> str:
-    feet = int(inches // 12)
-    remaining = inches - feet * 12
-    whole = int(remaining)
-    frac = remaining - whole
-    denom = 16
-    num = int(round(frac * denom))
-    if num == denom:
-        whole += 1
-        num = 0
-
-    parts = []
-    if feet:
-        parts.append(f"{feet}'")
-
-    inch_part = ''
-    if whole or num:
-        inch_part = f"{whole}" if whole else '0'
-        if num:
-            from math import gcd
-            g = gcd(num, denom)
-            simple_num = num // g
-            simple_denom = denom // g
-            inch_part += f" {simple_num}/{simple_denom}"
-        inch_part += '"'
-
-    if inch_part:
-        parts.append(inch_part)
-
-    return ' '.join(parts) if parts else '0"'
+
+def _json_list(items, kind: str) -> list:
+    if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+        raise ValueError(f"'{kind}' must be a list of objects")
+    return items
+
+
+def _json_quantities(items, kind: str) -> list:
+    quantities = []
+    for num, item in enumerate(items, start=1):
+        qty = item.get('qty', 1)
+        if isinstance(qty, bool) or not isinstance(qty, int) or qty <= 0:
+            raise ValueError(f"Invalid quantity {qty!r} in {kind} item {num}")
+        quantities.append(qty)
+    return quantities
+
+
+def _json_lengths(items, kind: str):
+    # Numbers are inches; strings use any format parse_length accepts.
+    length_strs = [str(item.get('length', '')) for item in items]
+    try:
+        lengths = parse_lengths(length_strs, positive=True, start=1)
+    except LengthError as exc:
+        raise ValueError(
+            f"Invalid length '{exc.value}' in {kind} item {exc.row}: {exc.reason}"
+        ) from exc
+    return lengths, length_strs
+
+
+def parse_demand_json(items) -> list:
+    """Parse ``[{"mark", "length", "qty"}, ...]`` into :class:`PartDemand` records.
+
+    ``qty`` defaults to 1. ``length`` is a number of inches or a string.
+    """
+    items = _json_list(items, 'parts')
+    quantities = _json_quantities(items, 'parts')
+    lengths, length_strs = _json_lengths(items, 'parts')
+    demand = DemandCollector()
+    for item, qty, length, length_str in zip(items, quantities, lengths, length_strs):
+        demand.add(str(item.get('mark', '')).strip(), length, length_str, qty)
+    return demand.lines()
+
+
+def parse_inventory_json(items) -> StockInventory:
+    """Parse ``[{"length", "qty"}, ...]`` into a :class:`StockInventory`."""
+    items = _json_list(items, 'stock')
+    quantities = _json_quantities(items, 'stock')
+    lengths, length_strs = _json_lengths(items, 'stock')
+    inventory = StockInventory()
+    for qty, length, length_str in zip(quantities, lengths, length_strs):
+        inventory.add(length, length_str, qty)
+    return inventory
+
+
+def _row_shape(row, default_shape: str) -> str:
+    return (row.get('shape') or '').strip() or default_shape
+
+
+def parse_demand_by_shape(files, default_shape: str = '', max_rows: int = None,
+                          max_bytes: int = None) -> dict:
+    """Parse one or more parts CSVs into ``{shape: [PartDemand, ...]}``.
+
+    Rows are grouped by their optional ``shape`` column; rows without one
+    belong to ``default_shape``. Limits apply to each file.
+    """
+    groups = {}
+    for file in files:
+        chunks = iter_csv_chunks(
+            file,
+            'Parts CSV',
+            CSV_MAX_ROWS if max_rows is None else max_rows,
+            CSV_MAX_BYTES if max_bytes is None else max_bytes,
+        )
+        for first_row, rows in chunks:
+            quantities = _csv_quantities(rows, first_row, 'parts')
+            lengths, length_strs = _csv_lengths(rows, first_row, 'parts')
+            for row, qty, length, length_str in zip(rows, quantities, lengths, length_strs):
+                shape = _row_shape(row, default_shape)
+                demand = groups.get(shape)
+                if demand is None:
+                    demand = groups[shape] = DemandCollector()
+                demand.add((row.get('mark') or '').strip(), length, length_str, qty)
+    return {shape: demand.lines() for shape, demand in groups.items()}
+
+
+def parse_inventory_by_shape(files, default_shape: str = '', max_rows: int = None,
+                             max_bytes: int = None) -> dict:
+    """Parse one or more stock CSVs into ``{shape: StockInventory}``.
+
+    Grouped like :func:`parse_demand_by_shape`.
+    """
+    groups = {}
+    for file in files:
+        chunks = iter_csv_chunks(
+            file,
+            'Stock CSV',
+            CSV_MAX_ROWS if max_rows is None else max_rows,
+            CSV_MAX_BYTES if max_bytes is None else max_bytes,
+        )
+        for first_row, rows in chunks:
+            quantities = _csv_quantities(rows, first_row, 'stock')
+            lengths, length_strs = _csv_lengths(rows, first_row, 'stock')
+            for row, qty, length, length_str in zip(rows, quantities, lengths, length_strs):
+                shape = _row_shape(row, default_shape)
+                inventory = groups.get(shape)
+                if inventory is None:
+                    inventory = groups[shape] = StockInventory()
+                inventory.add(length, length_str, qty)
+    return groups
+
+
+def optimize_cuts(parts, stocks, kerf_width: float = 0.0, strategy: str = 'ffd'):
+    """Assign parts to stock sticks and return ``(bins, uncut)``.
+
+    ``strategy`` selects the placement rule, see :mod:`common.placement`. The
+    default ``'ffd'`` is First-Fit Decreasing. ``'exact'`` runs the
+    column-generation solver in :mod:`app.cutting_stock` for at most
+    ``EXACT_TIME_LIMIT`` seconds, starting from the FFD plan.
+    """
+    if strategy == 'exact':
+        # numpy is only needed for this strategy, so import it lazily.
+        from .cutting_stock import optimize_cuts_exact
+        return optimize_cuts_exact(parts, stocks, kerf_width, EXACT_TIME_LIMIT)
+    return place_parts(parts, stocks, kerf_width, strategy)
+
+
+def optimize_demand(demand, inventory, kerf_width: float = 0.0, strategy: str = 'ffd',
+                    progress=None, report: dict = None):
+    """Like :func:`optimize_cuts` for compact demand and stock.
+
+    FFD runs on integer ticks with vectorised fit checks when every length
+    is a whole number of ticks, see :mod:`app.fixed_point`. BFD works on
+    whole length classes. The ``exact`` solver groups pieces by length
+    itself, so it gets the expanded lists.
+    ``portfolio`` keeps the best plan of several strategies, see
+    :mod:`app.portfolio`, and stores its winner and timings in ``report``
+    if one is given. ``progress`` is called with the fraction of pieces
+    placed, except by ``exact`` and ``portfolio``.
+    """
+    if strategy == 'portfolio':
+        bins, uncut, found = PORTFOLIO.optimize(demand, inventory, kerf_width)
+        if report is not None:
+            report.update(found)
+        return bins, uncut
+    if strategy == 'ffd':
+        from .fixed_point import place_demand_ticks
+        return place_demand_ticks(demand, inventory, kerf_width, progress)
+    if strategy == 'exact':
+        return optimize_cuts(expand_demand(demand), inventory.sticks(), kerf_width, strategy)
+    return place_demand(demand, inventory, kerf_width, strategy, progress)
 
 
 def generate_layout_data(bins, kerf_width: float) -> list:
@@ -272,7 +522,64 @@ def generate_layout_data(bins, kerf_width: float) -> list:
     return layout_bins
 
 
-def export_cutting_plan_pdf(bins, uncut, kerf_width: float, filename: str, shape: str = "") -> None:
+def plan_demand(demand, inventory, kerf_width: float = 0.0, strategy: str = 'ffd',
+                progress=None):
+    """Optimize and return ``(bins, uncut, layout, report)`` for the results page.
+
+    Each bin gains ``used`` and ``scrap_pct`` keys and sticks that received
+    no parts are dropped. ``report`` is the portfolio's winner and timings
+    for ``strategy='portfolio'`` and empty otherwise.
+    """
+    report = {}
+    with stage('optimize'):
+        bins, uncut = optimize_demand(demand, inventory, kerf_width, strategy, progress, report)
+    for b in bins:
+        b['used'] = b['stock_length'] - b['remaining']
+        b['scrap_pct'] = (
+            (b['remaining'] / b['stock_length']) * 100 if b['stock_length'] else 0.0
+        )
+
+    # Remove any stock sticks that ended up unused so they don't clutter
+    # the results tables or diagrams.
+    bins = [b for b in bins if b['parts']]
+    with stage('layout'):
+        layout = generate_layout_data(bins, kerf_width)
+    return bins, uncut, layout, report
+
+
+def _plan_job(progress, demand, inventory, kerf_width, strategy):
+    # Runs in a worker process. Pieces come back as copies, so the plan is
+    # returned in the cache encoding and rebuilt around the caller's pieces.
+    bins, uncut, layout, report = plan_demand(demand, inventory, kerf_width, strategy, progress)
+    return encode_plan(bins, uncut, layout, demand, inventory, report)
+
+
+@app.route('/cache_info', methods=['GET'])
+def cache_info():
+    """Report hit and miss counters of the plan and length caches."""
+    lengths = parse_length_cache_info()
+    return jsonify({
+        'plans': RESULTS.info(),
+        'lengths': {
+            'hits': lengths.hits,
+            'misses': lengths.misses,
+            'entries': lengths.currsize,
+            'max_entries': lengths.maxsize,
+        },
+    })
+
+
+@contextmanager
+def _text_output(target, newline=None):
+    """Yield a writable text stream for a path or an already open file."""
+    if hasattr(target, 'write'):
+        yield target
+    else:
+        with open(target, "w", newline=newline) as fh:
+            yield fh
+
+
+def export_cutting_plan_pdf(bins, uncut, kerf_width: float, filename, shape: str = "") -> None:
     """Generate a PDF report of the optimized cut plan.
 
     Parameters
@@ -283,8 +590,8 @@ def export_cutting_plan_pdf(bins, uncut, kerf_width: float, filename: str, shape
         Parts that could not be assigned to a stock length.
     kerf_width : float
         Kerf width in inches.
-    filename : str
-        Destination path for the generated PDF file.
+    filename : str or file-like
+        Destination path for the generated PDF file, or a binary stream.
     """
     from reportlab.lib import colors
     from reportlab.lib.pagesizes import letter
@@ -357,9 +664,9 @@ def export_cutting_plan_pdf(bins, uncut, kerf_width: float, filename: str, shape
     doc.build(elements)
 
 
-def export_cutting_plan_csv(bins, uncut, kerf_width: float, filename: str, shape: str = "") -> None:
-    """Generate a CSV report of the optimized cut plan."""
-    with open(filename, "w", newline="") as csvfile:
+def export_cutting_plan_csv(bins, uncut, kerf_width: float, filename, shape: str = "") -> None:
+    """Generate a CSV report of the optimized cut plan at a path or text stream."""
+    with _text_output(filename, newline="") as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(["Kerf width", format_length(kerf_width)])
         if shape:
@@ -389,8 +696,8 @@ def export_cutting_plan_csv(bins, uncut, kerf_width: float, filename: str, shape
                 writer.writerow([p["mark"], format_length(p["length"])])
 
 
-def export_cutting_plan_json(bins, uncut, kerf_width: float, filename: str, shape: str = "") -> None:
-    """Generate a JSON report of the optimized cut plan."""
+def export_cutting_plan_json(bins, uncut, kerf_width: float, filename, shape: str = "") -> None:
+    """Generate a JSON report of the optimized cut plan at a path or text stream."""
     import json
     data = {
         "kerf_width": format_length(kerf_width),
@@ -418,13 +725,13 @@ def export_cutting_plan_json(bins, uncut, kerf_width: float, filename: str, shap
     total_stock = sum(b["stock_length"] for b in used_bins)
     total_scrap = sum(b["remaining"] for b in used_bins)
     data["total_scrap_pct"] = round((total_scrap / total_stock) * 100, 1) if total_stock else 0.0
-    with open(filename, "w") as fh:
+    with _text_output(filename) as fh:
         json.dump(data, fh, indent=2)
 
 
-def export_cutting_plan_text(bins, uncut, kerf_width: float, filename: str, shape: str = "") -> None:
-    """Generate a plain text report of the optimized cut plan."""
-    with open(filename, "w") as fh:
+def export_cutting_plan_text(bins, uncut, kerf_width: float, filename, shape: str = "") -> None:
+    """Generate a plain text report of the optimized cut plan at a path or text stream."""
+    with _text_output(filename) as fh:
         fh.write(f"Kerf width: {format_length(kerf_width)}\n")
         if shape:
             fh.write(f"Shape: {shape}\n")
@@ -441,32 +748,53 @@ def export_cutting_plan_text(bins, uncut, kerf_width: float, filename: str, shap
                 fh.write(f"  - {p['mark']} {format_length(p['length'])}\n")
 
 
-@app.route('/download_pdf/<filename>', methods=['GET'])
-def download_pdf(filename: str):
-    """Serve the generated PDF file as a download."""
-    pdf_path = os.path.join(tempfile.gettempdir(), filename)
-    return send_file(pdf_path, as_attachment=True, download_name='cut_plan.pdf')
+REPORTS = {
+    'pdf': (export_cutting_plan_pdf, 'cut_plan.pdf'),
+    'csv': (export_cutting_plan_csv, 'cut_plan.csv'),
+    'json': (export_cutting_plan_json, 'cut_plan.json'),
+    'txt': (export_cutting_plan_text, 'cut_plan.txt'),
+}
+
 
+def render_report(plan, fmt: str) -> bytes:
+    """Render ``plan`` (as stored in :data:`PLANS`) in one of :data:`REPORTS`."""
+    exporter = REPORTS[fmt][0]
+    out = io.BytesIO() if fmt == 'pdf' else io.StringIO()
+    with stage(f'export_{fmt}'):
+        exporter(plan['bins'], plan['uncut'], plan['kerf_width'], out, plan['shape'])
+    data = out.getvalue()
+    return data if isinstance(data, bytes) else data.encode()
 
-@app.route('/download_csv/<filename>', methods=['GET'])
-def download_csv(filename: str):
-    """Serve the generated CSV file as a download."""
-    csv_path = os.path.join(tempfile.gettempdir(), filename)
-    return send_file(csv_path, as_attachment=True, download_name='cut_plan.csv')
 
+def _send_report(plan_id: str, fmt: str):
+    data = PLANS.report(plan_id, fmt, render_report)
+    if data is None:
+        abort(404)
+    return send_file(io.BytesIO(data), as_attachment=True, download_name=REPORTS[fmt][1])
 
-@app.route('/download_json/<filename>', methods=['GET'])
-def download_json(filename: str):
-    """Serve the generated JSON file as a download."""
-    json_path = os.path.join(tempfile.gettempdir(), filename)
-    return send_file(json_path, as_attachment=True, download_name='cut_plan.json')
 
+@app.route('/download_pdf/<plan_id>', methods=['GET'])
+def download_pdf(plan_id: str):
+    """Serve the plan's PDF report as a download."""
+    return _send_report(plan_id, 'pdf')
 
-@app.route('/download_txt/<filename>', methods=['GET'])
-def download_txt(filename: str):
-    """Serve the generated text file as a download."""
-    txt_path = os.path.join(tempfile.gettempdir(), filename)
-    return send_file(txt_path, as_attachment=True, download_name='cut_plan.txt')
+
+@app.route('/download_csv/<plan_id>', methods=['GET'])
+def download_csv(plan_id: str):
+    """Serve the plan's CSV report as a download."""
+    return _send_report(plan_id, 'csv')
+
+
+@app.route('/download_json/<plan_id>', methods=['GET'])
+def download_json(plan_id: str):
+    """Serve the plan's JSON report as a download."""
+    return _send_report(plan_id, 'json')
+
+
+@app.route('/download_txt/<plan_id>', methods=['GET'])
+def download_txt(plan_id: str):
+    """Serve the plan's text report as a download."""
+    return _send_report(plan_id, 'txt')
 
 
 @app.route('/', methods=['GET'])
@@ -476,29 +804,36 @@ def index():
 
 @app.route('/optimize', methods=['POST'])
 def optimize():
-    parts_file = request.files.get('parts_file')
-    stock_file = request.files.get('stock_file')
+    parts_files = [f for f in request.files.getlist('parts_file') if f.filename]
+    stock_files = [f for f in request.files.getlist('stock_file') if f.filename]
     shape = request.form.get('shape', '')
     error = None
 
     try:
-        if parts_file and parts_file.filename:
-            parts = parse_parts_csv(parts_file)
-        else:
-            parts_input = request.form.get('parts', '')
-            parts = parse_parts(parts_input)
-
-        if stock_file and stock_file.filename:
-            stocks = parse_stock_csv(stock_file)
-        else:
-            stock_input = request.form.get('stock', '')
-            stocks = parse_stock(stock_input)
-
-        kerf_str = request.form.get('kerf_width', '')
-        if kerf_str.strip():
-            kerf_width = parse_length(kerf_str)
-        else:
-            kerf_width = DEFAULT_KERF
+        with stage('parse'):
+            if parts_files:
+                demand_by_shape = parse_demand_by_shape(parts_files, shape)
+            else:
+                parts_input = request.form.get('parts', '')
+                demand_by_shape = {shape: parse_demand(parts_input)}
+
+            if stock_files:
+                inventory_by_shape = parse_inventory_by_shape(stock_files, shape)
+            else:
+                stock_input = request.form.get('stock', '')
+                inventory_by_shape = {shape: parse_inventory(stock_input)}
+
+            kerf_str = request.form.get('kerf_width', '')
+            if kerf_str.strip():
+                kerf_width = parse_length(kerf_str)
+            else:
+                kerf_width = DEFAULT_KERF
+
+            strategy = request.form.get('strategy', '').strip() or 'ffd'
+            if strategy not in STRATEGIES:
+                raise ValueError(f"Unknown optimization strategy '{strategy}'")
+
+            problems = _shape_problems(demand_by_shape, inventory_by_shape, shape)
     except ValueError as exc:
         error = str(exc)
         return render_template(
@@ -508,56 +843,185 @@ def optimize():
             stock=request.form.get('stock', ''),
             shape=shape,
             kerf_width=request.form.get('kerf_width', '0'),
+            strategy=request.form.get('strategy', 'ffd'),
         ), 400
 
-    bins, uncut = optimize_cuts(parts, stocks, kerf_width)
-    for b in bins:
-        b['used'] = b['stock_length'] - b['remaining']
-        b['scrap_pct'] = (
-            (b['remaining'] / b['stock_length']) * 100 if b['stock_length'] else 0.0
+    for demand, inventory in problems.values():
+        _count_input(demand, inventory)
+
+    if len(problems) > 1:
+        plans = BATCH.optimize(problems, kerf_width, strategy, plan_demand, RESULTS)
+        return _render_batch(plans, kerf_width)
+
+    [(shape, (demand, inventory))] = problems.items()
+    pieces = sum(d.qty for d in demand) + len(inventory)
+    key = plan_key(demand, inventory, kerf_width, strategy)
+    if JOB_WORKERS > 0 and pieces >= ASYNC_MIN_PIECES and key not in RESULTS:
+        job_id = JOBS.submit(
+            _plan_job, demand, inventory, kerf_width, strategy,
+            context={
+                'key': key,
+                'demand': demand,
+                'inventory': inventory,
+                'kerf_width': kerf_width,
+                'shape': shape,
+            },
         )
+        return render_template('job.html', job_id=job_id), 202
+
+    bins, uncut, layout, report = RESULTS.plan(
+        demand, inventory, kerf_width, strategy,
+        lambda: plan_demand(demand, inventory, kerf_width, strategy),
+    )
+    return _render_results(bins, uncut, layout, report, kerf_width, shape)
 
-    # Remove any stock sticks that ended up unused so they don't clutter
-    # the results tables or diagrams.
-    bins = [b for b in bins if b['parts']]
 
-    total_stock = sum(b['stock_length'] for b in bins)
-    total_used = sum(b['used'] for b in bins)
-    total_scrap = sum(b['remaining'] for b in bins)
-    total_scrap_pct = (total_scrap / total_stock) * 100 if total_stock else 0.0
-
-    layout = generate_layout_data(bins, kerf_width)
-    pdf_name = f"{uuid.uuid4()}.pdf"
-    pdf_path = os.path.join(tempfile.gettempdir(), pdf_name)
-    export_cutting_plan_pdf(bins, uncut, kerf_width, pdf_path, shape)
-    csv_name = f"{uuid.uuid4()}.csv"
-    csv_path = os.path.join(tempfile.gettempdir(), csv_name)
-    export_cutting_plan_csv(bins, uncut, kerf_width, csv_path, shape)
-    json_name = f"{uuid.uuid4()}.json"
-    json_path = os.path.join(tempfile.gettempdir(), json_name)
-    export_cutting_plan_json(bins, uncut, kerf_width, json_path, shape)
-    txt_name = f"{uuid.uuid4()}.txt"
-    txt_path = os.path.join(tempfile.gettempdir(), txt_name)
-    export_cutting_plan_text(bins, uncut, kerf_width, txt_path, shape)
+def _shape_problems(demand_by_shape, inventory_by_shape, default_shape: str) -> dict:
+    """Pair demand with stock of the same shape as ``{shape: (demand, inventory)}``.
+
+    A single group of parts always uses a single group of stock, whatever
+    either is tagged with. With several shapes, every shape needs its own
+    stock; stock for shapes without parts is ignored.
+    """
+    if not demand_by_shape:
+        demand_by_shape = {default_shape: []}
+    if len(demand_by_shape) == 1 and len(inventory_by_shape) <= 1:
+        [(shape, demand)] = demand_by_shape.items()
+        inventory = next(iter(inventory_by_shape.values()), StockInventory())
+        return {shape: (demand, inventory)}
+    missing = [s for s in demand_by_shape if s not in inventory_by_shape]
+    if missing:
+        names = ', '.join(f"'{s}'" for s in missing)
+        raise ValueError(f"No stock given for shape {names}")
+    return {s: (demand, inventory_by_shape[s]) for s, demand in demand_by_shape.items()}
+
+
+def _render_results(bins, uncut, layout, report, kerf_width: float, shape: str):
+    plan_id = PLANS.add({
+        'bins': bins,
+        'uncut': uncut,
+        'kerf_width': kerf_width,
+        'shape': shape,
+    })
     return render_template(
         'results.html',
         bins=bins,
         uncut=uncut,
         kerf_width=kerf_width,
         layout=layout,
+        report=report,
         shape=shape,
-        pdf_filename=pdf_name,
-        csv_filename=csv_name,
-        json_filename=json_name,
-        txt_filename=txt_name,
-        total_stock=total_stock,
-        total_used=total_used,
-        total_scrap=total_scrap,
-        total_scrap_pct=total_scrap_pct,
+        plan_id=plan_id,
+        format_length=format_length,
+        **plan_totals(bins),
+    )
+
+
+def _render_batch(plans, kerf_width: float):
+    sections = []
+    for shape, (bins, uncut, layout, report) in plans.items():
+        plan_id = PLANS.add({
+            'bins': bins,
+            'uncut': uncut,
+            'kerf_width': kerf_width,
+            'shape': shape,
+        })
+        sections.append(dict(
+            shape=shape,
+            bins=bins,
+            uncut=uncut,
+            layout=layout,
+            report=report,
+            plan_id=plan_id,
+            **plan_totals(bins),
+        ))
+    all_bins = [b for bins, _, _, _ in plans.values() for b in bins]
+    overall = plan_totals(all_bins)
+    overall['sticks'] = len(all_bins)
+    overall['uncut'] = sum(len(uncut) for _, uncut, _, _ in plans.values())
+    return render_template(
+        'batch_results.html',
+        sections=sections,
+        overall=overall,
+        kerf_width=kerf_width,
         format_length=format_length,
     )
 
 
+@app.route('/api/optimize', methods=['POST'])
+def api_optimize():
+    """Optimize a JSON request and stream the plan back as NDJSON.
+
+    The body is ``{"parts": [...], "stock": [...], "kerf_width", "strategy",
+    "shape"}`` as read by :func:`parse_demand_json` and
+    :func:`parse_inventory_json`. The response is described in
+    :mod:`app.plan_stream`. Invalid input gets a 400 with ``{"error"}``.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify(error='Request body must be a JSON object'), 400
+    try:
+        with stage('parse'):
+            demand = parse_demand_json(data.get('parts', []))
+            inventory = parse_inventory_json(data.get('stock', []))
+            kerf = data.get('kerf_width')
+            kerf_width = DEFAULT_KERF if kerf in (None, '') else parse_length(str(kerf))
+            strategy = str(data.get('strategy') or 'ffd')
+            if strategy not in STRATEGIES:
+                raise ValueError(f"Unknown optimization strategy '{strategy}'")
+    except ValueError as exc:
+        return jsonify(error=str(exc)), 400
+    _count_input(demand, inventory)
+
+    bins, uncut, _, report = RESULTS.plan(
+        demand, inventory, kerf_width, strategy,
+        lambda: plan_demand(demand, inventory, kerf_width, strategy),
+    )
+    summary = {
+        'shape': str(data.get('shape') or ''),
+        'strategy': strategy,
+        'kerf_width': kerf_width,
+        'kerf_width_str': format_length(kerf_width),
+        'sticks': len(bins),
+        'uncut': len(uncut),
+        **plan_totals(bins),
+        'report': report,
+    }
+    return Response(iter_plan_ndjson(bins, uncut, summary), mimetype='application/x-ndjson')
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id: str):
+    """Report a background job's status and progress as JSON."""
+    status = JOBS.status(job_id)
+    if status is None:
+        abort(404)
+    return jsonify(status)
+
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id: str):
+    """Show the results page of a finished job, or its progress page."""
+    job = JOBS.get(job_id)
+    if job is None:
+        abort(404)
+    if not job.future.done():
+        return render_template('job.html', job_id=job_id), 202
+    ctx = job.context
+    try:
+        entry = job.future.result()
+    except ValueError as exc:
+        return render_template('index.html', error=str(exc), shape=ctx['shape']), 400
+    except Exception as exc:
+        # A crashed worker or a bug in the optimizer; the job has failed.
+        app.logger.exception('Background job %s failed', job_id)
+        error = f'Optimization job failed: {exc}'
+        return render_template('index.html', error=error, shape=ctx['shape']), 500
+    RESULTS.put(ctx['key'], entry)
+    bins, uncut, layout, report = decode_plan(entry, ctx['demand'], ctx['inventory'])
+    return _render_results(bins, uncut, layout, report, ctx['kerf_width'], ctx['shape'])
+
+
 if __name__ == '__main__':
     import argparse
 
@@ -0,0 +1,314 @@
+"""Exact-leaning cutting-stock solver based on column generation.
+
+The one-dimensional cutting-stock problem is modelled over *patterns*: a
+pattern says how many pieces of each part length are cut from one stick
+of a given stock length. The LP relaxation over all patterns is solved by
+column generation. A small revised simplex solves the restricted master
+problem, and a bounded knapsack over the LP duals prices out new patterns
+for every stock length. Integer plans are then obtained by diving: whole
+pattern counts are committed, the rest of the demand is re-solved, and
+whatever is left when the time budget runs out is finished with FFD.
+
+The FFD plan is always computed first and kept as the incumbent, so the
+solver never returns anything worse than :func:`optimize_cuts` would.
+Kerf is handled the same way as in :mod:`common.placement`: ``k`` pieces on a
+stick consume their lengths plus ``k - 1`` kerfs. That is equivalent to
+giving every piece an extra kerf and the stick one free kerf of capacity.
+"""
+
+import math
+import time
+
+import numpy as np
+
+from common.lengths import to_ticks_ceil, to_ticks_floor
+from common.placement import place_parts, plan_cost
+
+DEFAULT_TIME_LIMIT = 2.0
+
+_EPS = 1e-9
+_DEGENERATE_PIVOTS = 50
+# Fraction of the time budget spent on the root LP, and how many pricing
+# rounds each diving step may run before committing more patterns.
+_ROOT_SHARE = 0.6
+_DIVE_ROUNDS = 5
+
+
+def _simplex(A, b, cost, deadline, basis=None):
+    """Minimise ``cost @ x`` subject to ``A @ x == b`` and ``x >= 0``.
+
+    The first ``len(b)`` columns of ``A`` must form an identity matrix with
+    non-negative ``b`` so they can serve as the starting basis. A feasible
+    ``basis`` from an earlier solve may be passed to warm start. Returns the
+    primal solution, the row duals and the final basis. When ``deadline``
+    passes, the current basis is returned; it is still primal feasible.
+    """
+    m, n = A.shape
+    basis = list(basis) if basis is not None else list(range(m))
+    degenerate = 0
+    while True:
+        B = A[:, basis]
+        x_b = np.linalg.solve(B, b)
+        duals = np.linalg.solve(B.T, cost[basis])
+        if time.monotonic() > deadline:
+            break
+        reduced = cost - duals @ A
+        reduced[basis] = 0.0
+        if degenerate > _DEGENERATE_PIVOTS:
+            # Bland's rule to break cycling on degenerate vertices.
+            candidates = np.flatnonzero(reduced < -_EPS)
+            if not len(candidates):
+                break
+            entering = int(candidates[0])
+        else:
+            entering = int(np.argmin(reduced))
+            if reduced[entering] >= -_EPS:
+                break
+        direction = np.linalg.solve(B, A[:, entering])
+        rows = np.flatnonzero(direction > _EPS)
+        if not len(rows):
+            raise ValueError("Cutting-stock LP is unbounded")
+        ratios = np.maximum(x_b[rows], 0.0) / direction[rows]
+        step = ratios.min()
+        tied = rows[ratios <= step + _EPS]
+        leaving = min(tied, key=lambda r: basis[r])
+        degenerate = degenerate + 1 if step <= _EPS else 0
+        basis[leaving] = entering
+    x = np.zeros(n)
+    x[basis] = np.maximum(x_b, 0.0)
+    return x, duals, basis
+
+
+def _knapsack(values, weights, bounds, capacity):
+    """Bounded knapsack on integer weights; returns ``(value, counts)``.
+
+    Items are split into power-of-two bundles and run through a vectorised
+    0/1 dynamic program over all capacities at once.
+    """
+    dp = np.zeros(capacity + 1)
+    decisions = []
+    for i, (value, weight, bound) in enumerate(zip(values, weights, bounds)):
+        if value <= _EPS or weight > capacity:
+            continue
+        bound = min(int(bound), capacity // weight)
+        bundle = 1
+        while bound > 0:
+            take = min(bundle, bound)
+            bound -= take
+            bundle *= 2
+            width = take * weight
+            candidate = dp[:-width] + take * value
+            chosen = candidate > dp[width:] + _EPS
+            dp[width:] = np.where(chosen, candidate, dp[width:])
+            decisions.append((i, take, width, chosen))
+    cap = int(np.argmax(dp))
+    best = float(dp[cap])
+    counts = np.zeros(len(values), dtype=np.int64)
+    for i, take, width, chosen in reversed(decisions):
+        if cap >= width and chosen[cap - width]:
+            counts[i] += take
+            cap -= width
+    return best, counts
+
+
+class _Problem:
+    """Aggregated demand and stock for the pattern formulation."""
+
+    def __init__(self, parts, stocks, kerf_width):
+        by_length = {}
+        for part in parts:
+            by_length.setdefault(part['length'], []).append(part)
+        self.lengths = sorted(by_length, reverse=True)
+        self.pieces = [by_length[length] for length in self.lengths]
+        self.demand = np.array([len(p) for p in self.pieces], dtype=np.int64)
+
+        stock_idx = {}
+        for i, stock in enumerate(stocks):
+            stock_idx.setdefault(stock['length'], []).append(i)
+        self.stock_lengths = sorted(stock_idx, reverse=True)
+        self.stock_idx = [stock_idx[length] for length in self.stock_lengths]
+        self.available = np.array([len(s) for s in self.stock_idx], dtype=np.int64)
+
+        # Pattern feasibility is checked in ticks. Piece widths are rounded up
+        # and stick capacities down, so every pattern also fits in inches.
+        weights = [to_ticks_ceil(length + kerf_width) for length in self.lengths]
+        capacities = [to_ticks_floor(length + kerf_width) for length in self.stock_lengths]
+        scale = math.gcd(*weights, *capacities) or 1
+        self.weights = np.array([w // scale for w in weights], dtype=np.int64)
+        self.capacities = [c // scale for c in capacities]
+        # Leaving a piece uncut must always cost more than any stick.
+        self.penalty = 10.0 * max(self.stock_lengths)
+
+    def pattern_of(self, b):
+        counts = np.zeros(len(self.lengths), dtype=np.int64)
+        for part in b['parts']:
+            counts[self.lengths.index(part['length'])] += 1
+        return self.stock_lengths.index(b['stock_length']), counts
+
+
+class _ColumnGeneration:
+    """Restricted master problem plus pattern pricing."""
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.patterns = []
+        self._seen = set()
+
+    def add(self, stock_type, counts):
+        key = (stock_type, counts.tobytes())
+        if key in self._seen or not counts.any():
+            return False
+        self._seen.add(key)
+        self.patterns.append((stock_type, counts))
+        return True
+
+    def _solve_master(self, demand, available, basis, deadline):
+        p = self.problem
+        n_items, n_types = len(demand), len(available)
+        m = n_items + n_types
+        # Columns: uncut per item | stock slack | surplus per item | patterns.
+        # Patterns go last so a basis stays valid as new ones are appended.
+        first = m + n_items
+        A = np.zeros((m, first + len(self.patterns)))
+        cost = np.zeros(A.shape[1])
+        A[:, :m] = np.eye(m)
+        cost[:n_items] = p.penalty
+        A[:n_items, m:first] = -np.eye(n_items)
+        for k, (stock_type, counts) in enumerate(self.patterns, start=first):
+            A[:n_items, k] = counts
+            A[n_items + stock_type, k] = 1.0
+            cost[k] = p.stock_lengths[stock_type]
+        b = np.concatenate([demand, available]).astype(float)
+        x, duals, basis = _simplex(A, b, cost, deadline, basis)
+        return x[first:], float(cost @ x), duals, basis
+
+    def solve(self, demand, available, deadline, max_rounds=None):
+        """Run column generation until no pattern prices out.
+
+        Returns the pattern values, the LP objective and whether the LP was
+        solved to optimality (only then is the objective a lower bound).
+        """
+        p = self.problem
+        n_items = len(demand)
+        basis = None
+        rounds = 0
+        while True:
+            values, objective, duals, basis = self._solve_master(
+                demand, available, basis, deadline
+            )
+            if max_rounds is not None and rounds >= max_rounds:
+                return values, objective, False
+            rounds += 1
+            added = False
+            prices = np.maximum(duals[:n_items], 0.0)
+            for stock_type, capacity in enumerate(p.capacities):
+                if time.monotonic() > deadline:
+                    return values, objective, False
+                if available[stock_type] <= 0:
+                    continue
+                best, counts = _knapsack(prices, p.weights, demand, capacity)
+                reduced = p.stock_lengths[stock_type] - best - duals[n_items + stock_type]
+                if reduced < -1e-7 and self.add(stock_type, counts):
+                    added = True
+            if not added:
+                return values, objective, True
+
+
+def _build_plan(problem, stocks, kerf_width, committed):
+    """Turn committed patterns into bins and finish the remainder with FFD."""
+    pieces = [list(group) for group in problem.pieces]
+    unused = [list(group) for group in problem.stock_idx]
+    bins = [None] * len(stocks)
+    leftover = []
+    for stock_type, counts in committed:
+        idx = unused[stock_type].pop(0)
+        stock = stocks[idx]
+        b = {
+            'stock_length': stock['length'],
+            'stock_str': stock['length_str'],
+            'remaining': stock['length'],
+            'parts': [],
+        }
+        for item, count in enumerate(counts):
+            for _ in range(min(int(count), len(pieces[item]))):
+                part = pieces[item].pop()
+                required = part['length']
+                if b['parts']:
+                    required += kerf_width
+                if required <= b['remaining']:
+                    b['parts'].append(part)
+                    b['remaining'] -= required
+                else:
+                    leftover.append(part)
+        bins[idx] = b
+
+    rest = sorted(i for group in unused for i in group)
+    leftover.extend(part for group in pieces for part in group)
+    rest_bins, uncut = place_parts(leftover, [stocks[i] for i in rest], kerf_width, 'ffd')
+    for i, b in zip(rest, rest_bins):
+        bins[i] = b
+    return bins, uncut
+
+
+def optimize_cuts_exact(parts, stocks, kerf_width: float = 0.0,
+                        time_limit: float = DEFAULT_TIME_LIMIT):
+    """Minimise stock consumed within ``time_limit`` seconds.
+
+    Returns ``(bins, uncut)`` in the same shape as :func:`optimize_cuts`. The
+    FFD plan is the starting incumbent and is returned unchanged whenever
+    nothing better is found before the deadline.
+    """
+    start = time.monotonic()
+    deadline = start + time_limit
+    incumbent = place_parts(parts, stocks, kerf_width, 'ffd')
+    if not parts or not stocks:
+        return incumbent
+
+    problem = _Problem(parts, stocks, kerf_width)
+    colgen = _ColumnGeneration(problem)
+    for b in incumbent[0]:
+        if b['parts']:
+            colgen.add(*problem.pattern_of(b))
+
+    demand = problem.demand.copy()
+    available = problem.available.copy()
+    # The root LP gets most of the budget; the dive below needs the rest.
+    root_deadline = start + _ROOT_SHARE * time_limit
+    values, bound, converged = colgen.solve(demand, available, root_deadline)
+    best_cost = plan_cost(*incumbent)
+    if converged and best_cost[0] == 0 and best_cost[1] <= bound + 1e-6:
+        # FFD already meets the LP lower bound.
+        return incumbent
+
+    committed = []
+    while demand.any() and time.monotonic() < deadline:
+        whole = np.floor(values + 1e-6).astype(np.int64)
+        if whole.any():
+            picks = [(k, int(n)) for k, n in enumerate(whole) if n]
+        else:
+            frac = values - whole
+            k = int(np.argmax(frac))
+            if frac[k] <= 1e-6:
+                break
+            picks = [(k, 1)]
+        progress = False
+        for k, n in picks:
+            stock_type, counts = colgen.patterns[k]
+            for _ in range(n):
+                if available[stock_type] <= 0:
+                    break
+                take = np.minimum(counts, demand)
+                if not take.any():
+                    break
+                committed.append((stock_type, take))
+                demand -= take
+                available[stock_type] -= 1
+                progress = True
+        if not progress:
+            break
+        values, _, _ = colgen.solve(demand, available, deadline, _DIVE_ROUNDS)
+
+    candidate = _build_plan(problem, stocks, kerf_width, committed)
+    if plan_cost(*candidate) < best_cost:
+        return candidate
+    return incumbent
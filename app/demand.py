@@ -0,0 +1,96 @@
+"""Quantity-aware part demand and stock inventory.
+
+A takeoff line such as ``5000 CA114 11' 9 15/16"`` is kept as a single
+:class:`PartDemand` with ``qty=5000`` rather than 5000 identical dicts.
+Stock is grouped the same way in a :class:`StockInventory`. The optimizer
+places each length class in one go; only the resulting bins hold one entry
+per physical piece, and those entries all point at the same shared dict.
+"""
+
+
+class PartDemand:
+    """All pieces sharing a mark and a length."""
+
+    __slots__ = ('mark', 'length', 'length_str', 'qty', 'piece')
+
+    def __init__(self, mark: str, length: float, length_str: str, qty: int = 0):
+        self.mark = mark
+        self.length = length
+        self.length_str = length_str
+        self.qty = qty
+        # Every placed piece of this line refers to this one dict.
+        self.piece = {'mark': mark, 'length': length, 'length_str': length_str}
+
+    def __repr__(self):
+        return f"PartDemand({self.mark!r}, {self.length!r}, {self.length_str!r}, qty={self.qty})"
+
+
+class DemandCollector:
+    """Merge part rows into one :class:`PartDemand` per ``(mark, length)``.
+
+    Lines keep the order in which they were first seen.
+    """
+
+    __slots__ = ('_lines',)
+
+    def __init__(self):
+        self._lines = {}
+
+    def add(self, mark: str, length: float, length_str: str, qty: int) -> None:
+        key = (mark, length)
+        line = self._lines.get(key)
+        if line is None:
+            line = self._lines[key] = PartDemand(mark, length, length_str)
+        line.qty += qty
+
+    def lines(self) -> list:
+        return list(self._lines.values())
+
+
+class StockInventory:
+    """Stock sticks grouped by length, backed by parallel lists.
+
+    Iteration yields ``(length, length_str, qty)`` longest first, which is
+    the order the optimizer consumes sticks in.
+    """
+
+    __slots__ = ('lengths', 'length_strs', 'counts', '_index')
+
+    def __init__(self):
+        self.lengths = []
+        self.length_strs = []
+        self.counts = []
+        self._index = {}
+
+    def add(self, length: float, length_str: str, qty: int) -> None:
+        pos = self._index.get(length)
+        if pos is None:
+            pos = self._index[length] = len(self.lengths)
+            self.lengths.append(length)
+            self.length_strs.append(length_str)
+            self.counts.append(0)
+        self.counts[pos] += qty
+
+    def __len__(self) -> int:
+        return sum(self.counts)
+
+    def __iter__(self):
+        order = sorted(range(len(self.lengths)), key=lambda i: -self.lengths[i])
+        for i in order:
+            yield self.lengths[i], self.length_strs[i], self.counts[i]
+
+    def sticks(self) -> list:
+        """Return one ``{'length', 'length_str'}`` dict per stick, longest first."""
+        sticks = []
+        for length, length_str, qty in self:
+            stick = {'length': length, 'length_str': length_str}
+            sticks.extend([stick] * qty)
+        return sticks
+
+
+def expand_demand(demand) -> list:
+    """Return one part dict per piece, in demand order."""
+    parts = []
+    for line in demand:
+        parts.extend([line.piece] * line.qty)
+    return parts
@@ -0,0 +1,129 @@
+"""NumPy-backed First-Fit Decreasing on integer ticks.
+
+Part and stock lengths are held in int64 arrays of ticks (see
+:mod:`common.lengths`), so every fit test and subtraction is exact. Each
+length class is placed with a handful of array operations: for all sticks
+at once we compute how many pieces still fit, and a running sum hands the
+pieces out to sticks left to right, which is exactly what FFD does with
+identical pieces.
+
+Imperial lengths down to 1/64" are whole ticks and give the same plan as
+:mod:`common.placement`. Metric lengths and kerfs generally are not, and
+rounding them would change which pieces fit, so :func:`place_demand_ticks`
+hands such inputs to the float engine instead.
+"""
+
+import numpy as np
+
+from common.lengths import from_ticks, is_whole_ticks, to_ticks_ceil, to_ticks_floor
+from common.placement import FirstFitIndex, place_demand
+
+# Length classes with at least this many pieces use the vectorised path.
+_VECTOR_MIN_QTY = 64
+
+
+def demand_arrays(demand):
+    """Return ``(lengths, qty)`` int64 arrays for a sequence of demand lines."""
+    lengths = np.fromiter((to_ticks_ceil(d.length) for d in demand), np.int64, len(demand))
+    qty = np.fromiter((d.qty for d in demand), np.int64, len(demand))
+    return lengths, qty
+
+
+def inventory_arrays(inventory):
+    """Return an int64 array with one tick capacity per stick, longest first."""
+    groups = list(inventory)
+    lengths = np.fromiter((to_ticks_floor(g[0]) for g in groups), np.int64, len(groups))
+    counts = np.fromiter((g[2] for g in groups), np.int64, len(groups))
+    return np.repeat(lengths, counts)
+
+
+def place_demand_ticks(demand, inventory, kerf_width: float = 0.0, progress=None):
+    """First-Fit Decreasing over compact demand using integer ticks.
+
+    Large length classes are placed with one vectorised fit check over all
+    open sticks. Small classes, where a few array passes would cost more
+    than they save, walk the same :class:`common.placement.FirstFitIndex` used
+    by the float engine, here holding exact tick counts.
+
+    ``progress``, if given, is called with the fraction of pieces handled
+    after each length class. Returns ``(bins, uncut)`` in the same shape as
+    :func:`common.placement.place_demand`, which runs instead if any length
+    or the kerf is not a whole number of ticks.
+    """
+    if not (is_whole_ticks(kerf_width)
+            and all(is_whole_ticks(d.length) for d in demand)
+            and all(is_whole_ticks(g[0]) for g in inventory)):
+        return place_demand(demand, inventory, kerf_width, 'ffd', progress)
+    lines = sorted(demand, key=lambda d: -d.length)
+    lengths, qty = demand_arrays(lines)
+    sticks = inventory.sticks()
+    remaining = inventory_arrays(inventory)
+    index = FirstFitIndex(remaining.tolist())
+    kerf = to_ticks_ceil(kerf_width)
+    smallest = int(lengths.min()) if len(lines) else 0
+
+    # FFD only opens a stick when no open one fits, and unopened sticks are
+    # longest first, so opened sticks always form the prefix [0, opened).
+    opened = 0
+    # Open sticks that may still take a piece, covering [0, tracked).
+    live = np.empty(0, dtype=np.int64)
+    tracked = 0
+    placements = [[] for _ in sticks]
+    uncut = []
+    total = int(qty.sum()) if len(lines) else 0
+    done = 0
+    for line, length, count in zip(lines, lengths.tolist(), qty.tolist()):
+        if count < _VECTOR_MIN_QTY:
+            while count:
+                i = index.find(length, kerf)
+                if i < 0:
+                    break
+                room = int(remaining[i])
+                if i < opened:
+                    room -= kerf
+                else:
+                    opened += 1
+                n = min(count, (room - length) // (length + kerf) + 1)
+                remaining[i] = room - n * (length + kerf) + kerf
+                index.place(i, int(remaining[i]))
+                placements[i].append((line.piece, n))
+                count -= n
+        else:
+            # Candidates: open sticks that can still take the smallest piece,
+            # plus as many unopened sticks as there are pieces.
+            live = np.concatenate([live, np.arange(tracked, opened)])
+            live = live[remaining[live] - kerf >= smallest]
+            tracked = opened
+            fresh = np.arange(opened, min(len(remaining), opened + count))
+            idx = np.concatenate([live, fresh])
+            room = remaining[idx]
+            room[:len(live)] -= kerf
+            fit = np.where(room >= length, (room - length) // (length + kerf) + 1, 0)
+            take = np.clip(count - (np.cumsum(fit) - fit), 0, fit)
+            pos = np.flatnonzero(take)
+            placed = take[pos]
+            hit = idx[pos]
+            remaining[hit] = room[pos] - placed * (length + kerf) + kerf
+            for i, n in zip(hit.tolist(), placed.tolist()):
+                index.place(i, int(remaining[i]))
+                placements[i].append((line.piece, n))
+            opened += int((hit >= opened).sum())
+            count -= int(placed.sum())
+        if count:
+            uncut.extend([line.piece] * count)
+        if progress is not None:
+            done += line.qty
+            progress(done / total)
+
+    bins = []
+    for i, (stick, ticks, placed) in enumerate(zip(sticks, remaining.tolist(), placements)):
+        parts = []
+        for piece, n in placed:
+            parts.extend([piece] * n)
+        bins.append({
+            'stock_length': stick['length'],
+            'stock_str': stick['length_str'],
+            'remaining': from_ticks(ticks) if i < opened else stick['length'],
+            'parts': parts,
+        })
+    return bins, uncut
@@ -0,0 +1,79 @@
+"""Streaming CSV ingestion for parts and stock uploads.
+
+Uploads are decoded incrementally straight from the Werkzeug stream and
+handed to the caller in fixed-size chunks of rows. The whole file is never
+held in memory as one string. Optional row and byte limits make an
+oversized upload fail as soon as it crosses them.
+"""
+
+import csv
+import io
+
+CHUNK_ROWS = 4096
+
+
+class _LimitedReader(io.RawIOBase):
+    """Binary view of an upload that raises once ``max_bytes`` are exceeded."""
+
+    def __init__(self, stream, max_bytes: int, label: str):
+        self._stream = stream
+        self._max_bytes = max_bytes
+        self._label = label
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._stream.read(len(buffer))
+        size = len(data)
+        self.bytes_read += size
+        if self._max_bytes and self.bytes_read > self._max_bytes:
+            raise ValueError(f"{self._label} is larger than {self._max_bytes} bytes")
+        buffer[:size] = data
+        return size
+
+
+def _limited_lines(stream, max_bytes: int, label: str):
+    """Yield text lines from an already decoded stream, counting characters."""
+    size = 0
+    for line in stream:
+        size += len(line)
+        if max_bytes and size > max_bytes:
+            raise ValueError(f"{label} is larger than {max_bytes} bytes")
+        yield line
+
+
+def iter_csv_chunks(file, label: str, max_rows: int = 0, max_bytes: int = 0,
+                    chunk_rows: int = CHUNK_ROWS):
+    """Yield ``(first_row, rows)`` chunks of ``csv.DictReader`` rows.
+
+    ``file`` may be a Werkzeug ``FileStorage``, a binary stream or a text
+    stream. Binary data is decoded as UTF-8. ``first_row`` is the 1-based
+    data row number of ``rows[0]``. A limit of ``0`` disables that check.
+
+    Raises
+    ------
+    ValueError
+        If the upload has more than ``max_rows`` data rows, more than
+        ``max_bytes`` bytes, or is not valid UTF-8.
+    """
+    stream = getattr(file, 'stream', file)
+    if isinstance(stream, io.TextIOBase):
+        lines = _limited_lines(stream, max_bytes, label)
+    else:
+        raw = _LimitedReader(stream, max_bytes, label)
+        lines = io.TextIOWrapper(io.BufferedReader(raw), encoding='utf-8', newline='')
+
+    chunk = []
+    first_row = 1
+    for row_num, row in enumerate(csv.DictReader(lines), start=1):
+        if max_rows and row_num > max_rows:
+            raise ValueError(f"{label} has more than {max_rows} rows")
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            yield first_row, chunk
+            first_row = row_num + 1
+            chunk = []
+    if chunk:
+        yield first_row, chunk
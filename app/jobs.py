@@ -0,0 +1,137 @@
+"""Background optimization jobs on a bounded process pool.
+
+Large inputs are handed to :class:`JobQueue` instead of being optimized
+inside the request thread. The caller gets a job ID back immediately and
+polls :meth:`JobQueue.status` until the job is done. Workers report
+progress through a shared dict owned by a ``multiprocessing`` manager; the
+pool and the manager are only started when the first job is submitted.
+
+The job registry lives in the memory of the process that submitted the
+job. Other server processes do not know the job and answer 404 for it.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class Progress:
+    """Picklable callback a worker calls with the fraction of work done.
+
+    Updates cross a process boundary, so they are sent at most once every
+    ``interval`` seconds; reaching ``1.0`` is always sent.
+    """
+
+    def __init__(self, shared, job_id: str, interval: float = 0.2):
+        self._shared = shared
+        self._job_id = job_id
+        self._interval = interval
+        self._last = 0.0
+
+    def __call__(self, fraction: float) -> None:
+        now = time.monotonic()
+        if fraction >= 1.0 or now - self._last >= self._interval:
+            self._last = now
+            self._shared[self._job_id] = min(fraction, 1.0)
+
+
+def _run(fn, progress, args):
+    return fn(progress, *args)
+
+
+class Job:
+    """A submitted job: its future plus whatever the submitter attached."""
+
+    __slots__ = ('id', 'future', 'context', 'submitted')
+
+    def __init__(self, job_id, future, context, submitted):
+        self.id = job_id
+        self.future = future
+        self.context = context
+        self.submitted = submitted
+
+
+class JobQueue:
+    """Run ``fn(progress, *args)`` calls on a process pool.
+
+    Parameters
+    ----------
+    max_workers : int
+        Size of the process pool.
+    max_jobs : int
+        Finished jobs kept for polling before the oldest are forgotten.
+    """
+
+    def __init__(self, max_workers: int = 2, max_jobs: int = 256):
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self._executor = None
+        self._manager = None
+        self._progress = None
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _start(self):
+        if self._executor is None:
+            # Imported here so the web process only loads them once it needs a pool.
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._manager = multiprocessing.Manager()
+            self._progress = self._manager.dict()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def submit(self, fn, *args, context=None) -> str:
+        """Queue ``fn(progress, *args)`` and return the new job's ID.
+
+        ``fn`` and ``args`` must be picklable. ``context`` stays in this
+        process and is available from :meth:`get`.
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._start()
+            self._progress[job_id] = 0.0
+            future = self._executor.submit(_run, fn, Progress(self._progress, job_id), args)
+            self._jobs[job_id] = Job(job_id, future, context, time.time())
+            self._forget_finished()
+        return job_id
+
+    def get(self, job_id: str):
+        """Return the :class:`Job` for ``job_id``, or ``None`` if unknown."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id: str):
+        """Return ``{'status', 'progress', 'error'}`` for ``job_id``, or ``None``.
+
+        ``status`` is one of ``queued``, ``running``, ``done`` or ``failed``.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return None
+        future = job.future
+        error = None
+        if future.done():
+            exc = future.exception()
+            state = 'failed' if exc is not None else 'done'
+            error = str(exc) if exc is not None else None
+            progress = 1.0
+        else:
+            state = 'running' if future.running() else 'queued'
+            progress = self._progress.get(job_id, 0.0)
+        return {'status': state, 'progress': progress, 'error': error}
+
+    def shutdown(self) -> None:
+        """Stop the pool and manager, cancelling queued jobs."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._manager.shutdown()
+                self._executor = self._manager = self._progress = None
+
+    def _forget_finished(self):
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in [j for j, job in self._jobs.items() if job.future.done()][:max(excess, 0)]:
+            del self._jobs[job_id]
+            self._progress.pop(job_id, None)
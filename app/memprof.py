@@ -0,0 +1,149 @@
+"""Opt-in per-request memory profiling with :mod:`tracemalloc`.
+
+:func:`start` begins tracing for one request and makes the returned
+:class:`MemoryProfile` current. Every :func:`app.metrics.stage` entered
+while it is current records the stage's peak and net allocation and the
+source lines whose allocations grew the most. :meth:`MemoryProfile.finish`
+stops tracing and returns the report.
+
+When no profile is current, :func:`active` is a single context variable
+lookup and nothing is traced. :mod:`tracemalloc` sees every thread, so only
+one request is profiled at a time; others started meanwhile are not
+profiled. Work done in job or pool worker processes is not traced.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+TOP_SITES = 10
+
+_active = contextvars.ContextVar('memory_profile', default=None)
+_lock = threading.Lock()
+_ignore = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+)
+
+
+def active():
+    """Return the profile of the current request, or ``None``."""
+    return _active.get()
+
+
+class MemoryProfile:
+    """Peak memory and top allocation sites for the stages of one request."""
+
+    def __init__(self, label: str, top: int = TOP_SITES):
+        self.label = label
+        self.top = top
+        self.stages = []
+        self._stack = []
+        self._owns_tracing = False
+
+    def _open(self, name, snapshot):
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            # A nested stage resets the peak, so fold it into the outer one first.
+            self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+        tracemalloc.reset_peak()
+        self._stack.append({
+            'name': name,
+            'start': current,
+            'peak': current,
+            'snapshot': tracemalloc.take_snapshot() if snapshot else None,
+        })
+
+    def _close(self):
+        current, peak = tracemalloc.get_traced_memory()
+        frame = self._stack.pop()
+        frame['peak'] = max(frame['peak'], peak)
+        if self._stack:
+            self._stack[-1]['peak'] = max(self._stack[-1]['peak'], frame['peak'])
+        return frame, current
+
+    def begin(self, name: str) -> None:
+        """Start measuring stage ``name``."""
+        self._open(name, snapshot=True)
+
+    def end(self) -> None:
+        """Finish the innermost stage and record its numbers."""
+        frame, current = self._close()
+        before = frame['snapshot'].filter_traces(_ignore)
+        after = tracemalloc.take_snapshot().filter_traces(_ignore)
+        sites = [
+            {'site': str(stat.traceback[0]), 'bytes': stat.size_diff, 'count': stat.count_diff}
+            for stat in after.compare_to(before, 'lineno')[:self.top]
+            if stat.size_diff > 0
+        ]
+        self.stages.append({
+            'stage': frame['name'],
+            'peak_bytes': frame['peak'] - frame['start'],
+            'net_bytes': current - frame['start'],
+            'top': sites,
+        })
+
+    def finish(self) -> dict:
+        """Stop profiling and return the report as a dict."""
+        while len(self._stack) > 1:
+            self.end()
+        frame, _ = self._close()
+        if self._owns_tracing:
+            tracemalloc.stop()
+        _active.set(None)
+        _lock.release()
+        return {
+            'label': self.label,
+            'time': time.time(),
+            'peak_bytes': frame['peak'] - frame['start'],
+            'stages': self.stages,
+        }
+
+
+def start(label: str, top: int = TOP_SITES):
+    """Begin profiling the current request as ``label``.
+
+    Returns the :class:`MemoryProfile`, or ``None`` if another request is
+    already being profiled.
+    """
+    if not _lock.acquire(blocking=False):
+        return None
+    profile = MemoryProfile(label, top)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        profile._owns_tracing = True
+    profile._open('request', snapshot=False)
+    _active.set(profile)
+    return profile
+
+
+def _size(size: int) -> str:
+    if abs(size) >= 1024 * 1024:
+        return f'{size / (1024 * 1024):.1f} MiB'
+    return f'{size / 1024:.1f} KiB'
+
+
+def format_report(report: dict) -> str:
+    """Return ``report`` as human readable lines for the log."""
+    lines = [f"memory profile {report['label']}: peak {_size(report['peak_bytes'])}"]
+    for entry in report['stages']:
+        lines.append(
+            f"  {entry['stage']}: peak {_size(entry['peak_bytes'])}, "
+            f"net {_size(entry['net_bytes'])}"
+        )
+        for site in entry['top']:
+            lines.append(f"    {_size(site['bytes'])} in {site['count']} blocks at {site['site']}")
+    return '\n'.join(lines)
+
+
+def dump_report(report: dict, directory: str) -> str:
+    """Write ``report`` as JSON into ``directory`` and return the path."""
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(report['time']))
+    path = os.path.join(directory, f'memprof-{stamp}-{os.getpid()}-{id(report):x}.json')
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2)
+    return path
@@ -0,0 +1,80 @@
+"""In-process metrics with Prometheus text exposition.
+
+The metric classes come from :mod:`common.metrics`; this module
+keeps the web app's own :data:`REGISTRY`, whose families
+:meth:`Registry.render` writes in the text exposition format served by
+``/metrics``.
+
+:func:`stage` times one step of a request, such as parsing, optimizing or
+rendering, into the ``bladeplan_stage_seconds`` histogram. After
+:func:`collect_server_timing`, the same durations are also gathered for a
+``Server-Timing`` response header, and while a :mod:`app.memprof` profile
+is active each stage's memory use is recorded too.
+
+Values live in the process that recorded them. Work done in job or
+portfolio worker processes is only visible through the stages the web
+process wraps around it.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+
+from common.metrics import (  # noqa: F401
+    CONTENT_TYPE,
+    DEFAULT_BUCKETS,
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+)
+
+from . import memprof
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'bladeplan_stage_seconds', 'Time spent in each stage of a request.'
+)
+
+_timings = contextvars.ContextVar('server_timing', default=None)
+
+
+def collect_server_timing(enabled: bool = True):
+    """Start collecting :func:`stage` durations in the current context.
+
+    Returns the list they are appended to, or ``None`` (and stops any
+    earlier collection) if not ``enabled``. Call it at the start of every
+    request so a reused thread never inherits another request's list.
+    """
+    entries = [] if enabled else None
+    _timings.set(entries)
+    return entries
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """Record a finished stage measured by the caller."""
+    STAGE_SECONDS.observe(seconds, stage=name)
+    entries = _timings.get()
+    if entries is not None:
+        entries.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str):
+    """Time the ``with`` block as stage ``name``."""
+    profile = memprof.active()
+    if profile is not None:
+        profile.begin(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+        if profile is not None:
+            profile.end()
+
+
+def server_timing_header(entries) -> str:
+    """Format ``(name, seconds)`` pairs as a ``Server-Timing`` header value."""
+    return ', '.join(f'{name};dur={seconds * 1000:.2f}' for name, seconds in entries)
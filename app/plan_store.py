@@ -0,0 +1,106 @@
+"""In-memory store for optimized plans and their rendered reports.
+
+``/optimize`` keeps each plan under a random ID instead of writing every
+report format to disk. A report is rendered the first time it is
+downloaded and its bytes are cached. Plans expire after a TTL and both
+plans and report bytes are evicted least-recently-used first.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class PlanStore:
+    """Thread-safe plan registry with a size-bounded report cache.
+
+    Parameters
+    ----------
+    max_plans : int
+        Plans kept before the least recently used one is dropped.
+    max_report_bytes : int
+        Total size of cached report bytes across all plans.
+    ttl : float
+        Seconds a plan stays downloadable after it was stored.
+    clock : callable
+        Time source, replaceable in tests.
+    """
+
+    def __init__(self, max_plans: int = 256, max_report_bytes: int = 64 * 1024 * 1024,
+                 ttl: float = 3600.0, clock=time.monotonic):
+        self.max_plans = max_plans
+        self.max_report_bytes = max_report_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._plans = OrderedDict()
+        self._reports = OrderedDict()
+        self._report_bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def add(self, plan) -> str:
+        """Store ``plan`` and return its new ID."""
+        plan_id = uuid.uuid4().hex
+        with self._lock:
+            now = self._clock()
+            self._drop_expired(now)
+            self._plans[plan_id] = (now + self.ttl, plan)
+            while len(self._plans) > self.max_plans:
+                self._drop_plan(next(iter(self._plans)))
+        return plan_id
+
+    def get(self, plan_id: str):
+        """Return the plan stored under ``plan_id``, or ``None`` if unknown or expired."""
+        with self._lock:
+            return self._get(plan_id)
+
+    def report(self, plan_id: str, fmt: str, render):
+        """Return the ``fmt`` report bytes for ``plan_id``, rendering on first use.
+
+        ``render(plan, fmt)`` produces the bytes. Returns ``None`` if the plan
+        is unknown or expired.
+        """
+        key = (plan_id, fmt)
+        with self._lock:
+            plan = self._get(plan_id)
+            if plan is None:
+                return None
+            data = self._reports.get(key)
+            if data is not None:
+                self._reports.move_to_end(key)
+                return data
+
+        # Render outside the lock; a concurrent request may render the same
+        # report, which only costs time.
+        data = render(plan, fmt)
+        with self._lock:
+            if plan_id in self._plans and key not in self._reports \
+                    and len(data) <= self.max_report_bytes:
+                self._reports[key] = data
+                self._report_bytes += len(data)
+                while self._report_bytes > self.max_report_bytes:
+                    _, old = self._reports.popitem(last=False)
+                    self._report_bytes -= len(old)
+        return data
+
+    def _get(self, plan_id):
+        entry = self._plans.get(plan_id)
+        if entry is None:
+            return None
+        if entry[0] <= self._clock():
+            self._drop_plan(plan_id)
+            return None
+        self._plans.move_to_end(plan_id)
+        return entry[1]
+
+    def _drop_expired(self, now):
+        for plan_id in [p for p, (expires, _) in self._plans.items() if expires <= now]:
+            self._drop_plan(plan_id)
+
+    def _drop_plan(self, plan_id):
+        del self._plans[plan_id]
+        for key in [k for k in self._reports if k[0] == plan_id]:
+            self._report_bytes -= len(self._reports.pop(key))
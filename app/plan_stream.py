@@ -0,0 +1,87 @@
+"""Serialize a plan as newline-delimited JSON for machine clients.
+
+Each stick is one ``{"type": "stick", ...}`` line, followed by one
+``uncut`` line and a closing ``summary`` line. Consecutive identical
+pieces on a stick are written as a single part with a ``qty``. Every
+length appears both in inches and as a formatted string under the same
+name with a ``_str`` suffix. Output is produced incrementally in buffers
+of about :data:`CHUNK_BYTES`, so a client can start reading while the
+rest of the plan is still being serialized.
+"""
+
+import json
+
+from common.lengths import format_length
+
+CHUNK_BYTES = 64 * 1024
+
+
+class _Formatter(dict):
+    """Memoized :func:`format_length`; plans repeat the same lengths a lot."""
+
+    def __missing__(self, length):
+        text = self[length] = format_length(length)
+        return text
+
+
+def _part_runs(pieces, fmt):
+    runs = []
+    last = None
+    for piece in pieces:
+        if piece is last:
+            runs[-1]['qty'] += 1
+            continue
+        last = piece
+        runs.append({
+            'mark': piece['mark'],
+            'length': piece['length'],
+            'length_str': fmt[piece['length']],
+            'qty': 1,
+        })
+    return runs
+
+
+def _records(bins, uncut, summary, fmt):
+    for index, b in enumerate(bins, start=1):
+        yield {
+            'type': 'stick',
+            'index': index,
+            'stock_length': b['stock_length'],
+            'stock_length_str': fmt[b['stock_length']],
+            'used': b['used'],
+            'used_str': fmt[b['used']],
+            'remaining': b['remaining'],
+            'remaining_str': fmt[b['remaining']],
+            'scrap_pct': round(b['scrap_pct'], 2),
+            'parts': _part_runs(b['parts'], fmt),
+        }
+    yield {'type': 'uncut', 'parts': _part_runs(uncut, fmt)}
+    record = {'type': 'summary', **summary}
+    for key, value in summary.items():
+        if key.startswith('total_') and not key.endswith('_pct'):
+            record[f'{key}_str'] = fmt[value]
+    yield record
+
+
+def iter_plan_ndjson(bins, uncut, summary: dict):
+    """Yield the NDJSON encoding of a plan as ``bytes`` chunks.
+
+    ``bins`` carry the ``used`` and ``scrap_pct`` keys added by
+    :func:`app.cut_optimizer_app.plan_demand`. ``summary`` entries are
+    copied into the final record; ``total_*`` lengths gain a ``_str``
+    twin.
+    """
+    fmt = _Formatter()
+    encode = json.JSONEncoder(separators=(',', ':')).encode
+    buffer = []
+    size = 0
+    for record in _records(bins, uncut, summary, fmt):
+        line = encode(record) + '\n'
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield ''.join(buffer).encode()
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode()
@@ -0,0 +1,220 @@
+"""Race several placement heuristics and keep the best plan.
+
+No single rule wins on every cut list, so the ``portfolio`` strategy runs
+these members side by side under one deadline:
+
+``ffd``
+    First-Fit Decreasing on integer ticks, the default strategy.
+``bfd``
+    Best-Fit Decreasing.
+``largest_last``
+    First-Fit Decreasing over the stock shortest first, keeping long sticks
+    for last.
+``restarts``
+    First-Fit with the decreasing order perturbed at random, restarted
+    with new seeds until the deadline.
+``exact``
+    Column generation from :mod:`app.cutting_stock`, given whatever time is
+    left.
+
+Members run on a process pool, or one after another when the portfolio
+itself runs in a worker process of a job or batch pool; pools are never
+nested. ``restarts`` and ``exact`` stop at the deadline by themselves.
+``ffd``, ``bfd`` and ``largest_last`` are single passes that ignore it;
+members still running a short grace period after the deadline are
+reported as timed out. A member that raises is left out of the race. The
+plan with the lowest :func:`common.placement.plan_cost` wins: fewest
+uncut pieces, then least stock consumed, which is least scrap, then
+fewest sticks. Plans cross the process boundary in the compact encoding of
+:mod:`app.result_cache`.
+"""
+
+import os
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from common.placement import demand_runs, place_demand, place_runs, plan_cost
+
+from .demand import expand_demand
+from .result_cache import decode_plan, encode_plan
+
+MEMBERS = ('ffd', 'bfd', 'largest_last', 'restarts', 'exact')
+
+# Relative noise applied to part lengths when ordering a restart.
+_RESTART_NOISE = 0.15
+_MAX_RESTARTS = 200
+# Extra seconds to wait for members to notice the deadline and return.
+_GRACE = 1.0
+# Further seconds to wait for the first plan when none made the grace period.
+_LATE_LIMIT = 30.0
+
+# Portfolios whose pools must be forgotten in forked children, where the
+# pool's worker processes and threads do not exist.
+_PORTFOLIOS = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for portfolio in list(_PORTFOLIOS):
+        portfolio._executor = None
+        portfolio._lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _ffd(demand, inventory, kerf_width, deadline, seed):
+    from .fixed_point import place_demand_ticks
+    return place_demand_ticks(demand, inventory, kerf_width)
+
+
+def _bfd(demand, inventory, kerf_width, deadline, seed):
+    return place_demand(demand, inventory, kerf_width, 'bfd')
+
+
+def _largest_last(demand, inventory, kerf_width, deadline, seed):
+    return place_runs(demand_runs(demand), inventory.sticks()[::-1], kerf_width, 'ffd')
+
+
+def _restarts(demand, inventory, kerf_width, deadline, seed):
+    rng = random.Random(seed)
+    sticks = inventory.sticks()
+    best = best_cost = None
+    for _ in range(_MAX_RESTARTS):
+        noise = {id(d): rng.uniform(1 - _RESTART_NOISE, 1 + _RESTART_NOISE) for d in demand}
+        runs = demand_runs(demand, key=lambda d: -d.length * noise[id(d)])
+        plan = place_runs(runs, sticks, kerf_width, 'ffd')
+        cost = plan_cost(*plan)
+        if best is None or cost < best_cost:
+            best, best_cost = plan, cost
+        if time.time() >= deadline:
+            break
+    return best
+
+
+def _exact(demand, inventory, kerf_width, deadline, seed):
+    from .cutting_stock import optimize_cuts_exact
+    time_limit = max(deadline - time.time(), 0.0)
+    return optimize_cuts_exact(expand_demand(demand), inventory.sticks(), kerf_width, time_limit)
+
+
+_RUNNERS = {
+    'ffd': _ffd,
+    'bfd': _bfd,
+    'largest_last': _largest_last,
+    'restarts': _restarts,
+    'exact': _exact,
+}
+
+
+def _run_member(name, demand, inventory, kerf_width, deadline, seed):
+    start = time.perf_counter()
+    bins, uncut = _RUNNERS[name](demand, inventory, kerf_width, deadline, seed)
+    elapsed = time.perf_counter() - start
+    return name, encode_plan(bins, uncut, None, demand, inventory), plan_cost(bins, uncut), elapsed
+
+
+class Portfolio:
+    """Run :data:`MEMBERS` concurrently and return the best plan.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Size of the process pool, by default one per CPU. ``0`` runs the
+        members one after another in this process, as does running inside
+        a ``multiprocessing`` worker.
+    time_limit : float
+        Seconds the whole portfolio may take.
+    members : sequence of str
+        Which members to run.
+    seed : int
+        Seed for the ``restarts`` member.
+    """
+
+    def __init__(self, max_workers: int = None, time_limit: float = 2.0,
+                 members=MEMBERS, seed: int = 0):
+        unknown = set(members) - set(_RUNNERS)
+        if unknown:
+            raise ValueError(f"Unknown portfolio members: {', '.join(sorted(unknown))}")
+        self.max_workers = max_workers
+        self.time_limit = time_limit
+        self.members = tuple(members)
+        self.seed = seed
+        self._executor = None
+        self._lock = threading.Lock()
+        _PORTFOLIOS.add(self)
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                from concurrent.futures import ProcessPoolExecutor
+
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    def optimize(self, demand, inventory, kerf_width: float = 0.0):
+        """Return ``(bins, uncut, report)`` for the winning member.
+
+        ``report`` holds the ``winner``, each finished member's ``timings``
+        in seconds and ``costs``, the members that ``timed_out`` and the
+        error message of each member that ``failed``. If no member
+        returns a plan, the error of the first member that failed is
+        raised. If none finishes within
+        ``_LATE_LIMIT`` seconds after the grace period, ``TimeoutError`` is
+        raised.
+        """
+        deadline = time.time() + self.time_limit
+        args = (demand, inventory, kerf_width, deadline, self.seed)
+        finished = []
+        errors = {}
+        from multiprocessing import parent_process
+
+        if self.max_workers == 0 or parent_process() is not None:
+            for name in self.members:
+                try:
+                    finished.append(_run_member(name, *args))
+                except Exception as exc:
+                    errors[name] = exc
+        else:
+            pool = self._pool()
+            futures = {pool.submit(_run_member, name, *args): name for name in self.members}
+            done, pending = wait(futures, timeout=self.time_limit + _GRACE)
+            if not done:
+                # Nothing made the deadline; settle for the first plan to arrive.
+                done, pending = wait(futures, timeout=_LATE_LIMIT, return_when=FIRST_COMPLETED)
+            for future in pending:
+                future.cancel()
+            for future, name in futures.items():
+                if future in done:
+                    try:
+                        finished.append(future.result())
+                    except Exception as exc:
+                        errors[name] = exc
+            if not done:
+                raise TimeoutError('no portfolio member finished in time')
+
+        if not finished:
+            # Members still running past the grace period record no error.
+            raise next(iter(errors.values()))
+        best = None
+        report = {'winner': None, 'timings': {}, 'costs': {}, 'timed_out': [],
+                  'failed': {name: str(exc) for name, exc in errors.items()}}
+        for name, entry, cost, elapsed in finished:
+            report['timings'][name] = elapsed
+            report['costs'][name] = cost
+            if best is None or cost < best[0]:
+                best = (cost, entry)
+                report['winner'] = name
+        report['timed_out'] = [m for m in self.members
+                               if m not in report['timings'] and m not in errors]
+        bins, uncut, _, _ = decode_plan(best[1], demand, inventory)
+        return bins, uncut, report
@@ -0,0 +1,210 @@
+"""Content-addressed cache of optimized plans.
+
+Estimators often resubmit the same cut list. The cache key is a SHA-256 of
+the canonical input: demand as ``(mark, length, qty)`` and stock as
+``(length, qty)``, both sorted, plus kerf and strategy. Lengths are the
+parsed numbers, so ``10'`` and ``120`` hit the same entry, and neither line
+order nor the shape label matters.
+
+Entries are stored compactly: each stick refers to its stock length class
+and each run of pieces to a demand line by canonical position. On a hit
+the plan is rebuilt around the pieces of the current request, so marks and
+length spellings are always the ones just submitted. Entries live in an
+in-memory LRU and, if a directory is given, as JSON files on disk that
+survive restarts and are shared between workers.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def _canonical_lines(demand):
+    return sorted(demand, key=lambda d: (-d.length, d.mark))
+
+
+def _canonical_stock(inventory):
+    return list(inventory)
+
+
+def plan_key(demand, inventory, kerf_width: float, strategy: str) -> str:
+    """Return the cache key for optimizing ``demand`` against ``inventory``."""
+    payload = {
+        'demand': [[d.mark, d.length, d.qty] for d in _canonical_lines(demand)],
+        'stock': [[length, qty] for length, _, qty in _canonical_stock(inventory)],
+        'kerf': kerf_width,
+        'strategy': strategy,
+    }
+    blob = json.dumps(payload, separators=(',', ':'))
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def _runs(pieces, line_of):
+    runs = []
+    for piece in pieces:
+        line = line_of[id(piece)]
+        if runs and runs[-1][0] == line:
+            runs[-1][1] += 1
+        else:
+            runs.append([line, 1])
+    return runs
+
+
+def _expand(runs, lines):
+    pieces = []
+    for line, n in runs:
+        pieces.extend([lines[line].piece] * n)
+    return pieces
+
+
+def encode_plan(bins, uncut, layout, demand, inventory, report=None) -> dict:
+    """Return a JSON-ready entry for a plan over ``demand`` and ``inventory``.
+
+    ``report`` is any JSON-ready detail about how the plan was found.
+    """
+    line_of = {id(d.piece): i for i, d in enumerate(_canonical_lines(demand))}
+    stock_of = {length: i for i, (length, _, _) in enumerate(_canonical_stock(inventory))}
+    return {
+        'bins': [
+            [stock_of[b['stock_length']], b['remaining'], _runs(b['parts'], line_of)]
+            for b in bins
+        ],
+        'uncut': _runs(uncut, line_of),
+        'layout': layout,
+        'report': report or {},
+    }
+
+
+def decode_plan(entry, demand, inventory):
+    """Rebuild ``(bins, uncut, layout, report)`` from ``entry`` with the request's pieces."""
+    lines = _canonical_lines(demand)
+    stock = _canonical_stock(inventory)
+    bins = []
+    for stock_idx, remaining, runs in entry['bins']:
+        length, length_str, _ = stock[stock_idx]
+        bins.append({
+            'stock_length': length,
+            'stock_str': length_str,
+            'remaining': remaining,
+            'parts': _expand(runs, lines),
+            'used': length - remaining,
+            'scrap_pct': (remaining / length) * 100 if length else 0.0,
+        })
+    return bins, _expand(entry['uncut'], lines), entry['layout'], entry['report']
+
+
+class ResultCache:
+    """LRU of encoded plans with an optional directory of JSON files.
+
+    Parameters
+    ----------
+    max_entries : int
+        Plans kept in memory. ``0`` disables the in-memory tier.
+    directory : str, optional
+        Where to persist entries. Nothing is written to disk if omitted.
+    """
+
+    def __init__(self, max_entries: int = 128, directory: str = None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def info(self) -> dict:
+        """Return hit, miss and size counters."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+            }
+
+    def __contains__(self, key: str) -> bool:
+        """Whether ``key`` is cached, without counting a hit or miss."""
+        with self._lock:
+            if key in self._entries:
+                return True
+        return bool(self.directory) and os.path.exists(self._path(key))
+
+    def get(self, key: str):
+        """Return the entry for ``key`` or ``None``, counting a hit or miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self._read(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, entry: dict) -> None:
+        with self._lock:
+            self._remember(key, entry)
+        self._write(key, entry)
+
+    def _remember(self, key, entry):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key)) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key, entry):
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temporary file first so readers never see half an entry.
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as fh:
+                    json.dump(entry, fh, separators=(',', ':'))
+                os.replace(tmp, self._path(key))
+            except OSError:
+                os.unlink(tmp)
+                raise
+        except OSError:
+            # The disk tier is best effort; the in-memory entry still serves.
+            pass
+
+    def plan(self, demand, inventory, kerf_width: float, strategy: str, compute):
+        """Return ``(bins, uncut, layout, report)``, calling ``compute()`` on a miss.
+
+        ``compute`` must return a plan over exactly these ``demand`` pieces
+        and ``inventory`` stick lengths.
+        """
+        key = plan_key(demand, inventory, kerf_width, strategy)
+        entry = self.get(key)
+        if entry is not None:
+            return decode_plan(entry, demand, inventory)
+        bins, uncut, layout, report = compute()
+        self.put(key, encode_plan(bins, uncut, layout, demand, inventory, report))
+        return bins, uncut, layout, report
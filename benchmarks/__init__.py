@@ -0,0 +1,7 @@
+"""Performance benchmarks for the BladePlan optimizer and exporters.
+
+Run ``python -m benchmarks run`` to time the pipeline on seeded synthetic
+takeoffs and ``python -m benchmarks compare`` to check a run against a
+stored baseline. See :mod:`benchmarks.workload` and
+:mod:`benchmarks.runner`.
+"""
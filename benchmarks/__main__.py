@@ -0,0 +1,55 @@
+"""Command line entry point: ``python -m benchmarks {run,compare}``."""
+
+import argparse
+import sys
+
+from . import runner
+
+
+def _sizes(text: str):
+    return tuple(int(s.replace('_', '')) for s in text.split(',') if s.strip())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_cmd = sub.add_parser('run', help='time the benchmarks and save the results')
+    run_cmd.add_argument('-o', '--output', default='benchmarks/results.json',
+                         help='where to write the JSON results')
+    run_cmd.add_argument('--sizes', type=_sizes, default=runner.DEFAULT_SIZES,
+                         help='comma separated part counts (default %(default)s)')
+    run_cmd.add_argument('--repeat', type=int, default=3,
+                         help='attempts per benchmark, the fastest is kept')
+    run_cmd.add_argument('--seed', type=int, default=0)
+    run_cmd.add_argument('--only', nargs='+', metavar='NAME', choices=sorted(runner.BENCHMARKS),
+                         help='run only these benchmarks')
+
+    cmp_cmd = sub.add_parser('compare', help='fail if a run is slower than a baseline')
+    cmp_cmd.add_argument('baseline')
+    cmp_cmd.add_argument('current')
+    cmp_cmd.add_argument('--threshold', type=float, default=0.25,
+                         help='allowed slowdown as a fraction (default %(default)s)')
+    cmp_cmd.add_argument('--min-time', type=float, default=0.001,
+                         help='ignore benchmarks faster than this many seconds')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        data = runner.run(args.sizes, args.repeat, args.seed, args.only, log=print)
+        runner.save(data, args.output)
+        print(f"Saved {len(data['results'])} timings to {args.output}")
+        return 0
+
+    regressions = runner.compare(
+        runner.load(args.baseline), runner.load(args.current), args.threshold, args.min_time
+    )
+    for name, base, now, ratio in regressions:
+        print(f"REGRESSION {name}: {base * 1000:.2f} ms -> {now * 1000:.2f} ms ({ratio:.2f}x)")
+    if regressions:
+        return 1
+    print("No regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""Time the parse, optimize, layout and export stages and compare runs.
+
+``optimize_demand`` and ``plan_demand`` time the compact-demand path that
+``/optimize`` and ``/api/optimize`` run, including integer-tick FFD. The
+``optimize_cuts`` benchmarks time the per-piece float engine.
+
+A run times every benchmark in :data:`BENCHMARKS` once per workload size
+and keeps the best of ``repeat`` attempts. Results are saved as JSON::
+
+    {"meta": {...}, "results": {"optimize_cuts@1000": 0.0123, ...}}
+
+:func:`compare` flags every benchmark that got slower than a baseline by
+more than a threshold. Timings below ``min_time`` seconds are too noisy to
+judge and are skipped.
+"""
+
+import io
+import json
+import platform
+import sys
+import time
+
+from app.cut_optimizer_app import (
+    export_cutting_plan_csv,
+    export_cutting_plan_json,
+    export_cutting_plan_pdf,
+    export_cutting_plan_text,
+    generate_layout_data,
+    optimize_cuts,
+    optimize_demand,
+    parse_demand,
+    parse_inventory,
+    parse_parts,
+    parse_parts_csv,
+    parse_stock,
+    plan_demand,
+)
+
+from . import workload
+
+DEFAULT_SIZES = (10, 100, 1000, 10_000, 100_000)
+KERF = 0.125
+
+
+class Case:
+    """Inputs for one workload size, built once and shared by all benchmarks."""
+
+    def __init__(self, size: int, seed: int):
+        part_rows = workload.generate_parts(size, seed)
+        stock_rows = workload.generate_stock(part_rows, seed)
+        self.size = size
+        self.parts_text = workload.parts_text(part_rows)
+        self.parts_csv = workload.parts_csv(part_rows)
+        self.parts = parse_parts(self.parts_text)
+        self.stocks = parse_stock(workload.stock_text(stock_rows))
+        self.demand = parse_demand(self.parts_text)
+        self.inventory = parse_inventory(workload.stock_text(stock_rows))
+        self.bins, self.uncut = optimize_cuts(self.parts, self.stocks, KERF)
+        for b in self.bins:
+            b['used'] = b['stock_length'] - b['remaining']
+            b['scrap_pct'] = (b['remaining'] / b['stock_length']) * 100
+        self.bins = [b for b in self.bins if b['parts']]
+
+
+def _export(exporter, binary=False):
+    def run(case):
+        exporter(case.bins, case.uncut, KERF, io.BytesIO() if binary else io.StringIO())
+    return run
+
+
+BENCHMARKS = {
+    'parse_parts': lambda case: parse_parts(case.parts_text),
+    'parse_parts_csv': lambda case: parse_parts_csv(io.BytesIO(case.parts_csv)),
+    'optimize_cuts': lambda case: optimize_cuts(case.parts, case.stocks, KERF),
+    'optimize_cuts_bfd': lambda case: optimize_cuts(case.parts, case.stocks, KERF, 'bfd'),
+    'parse_demand': lambda case: parse_demand(case.parts_text),
+    'optimize_demand': lambda case: optimize_demand(case.demand, case.inventory, KERF),
+    'optimize_demand_bfd': lambda case: optimize_demand(case.demand, case.inventory, KERF, 'bfd'),
+    'plan_demand': lambda case: plan_demand(case.demand, case.inventory, KERF),
+    'generate_layout_data': lambda case: generate_layout_data(case.bins, KERF),
+    'export_cutting_plan_pdf': _export(export_cutting_plan_pdf, binary=True),
+    'export_cutting_plan_csv': _export(export_cutting_plan_csv),
+    'export_cutting_plan_json': _export(export_cutting_plan_json),
+    'export_cutting_plan_text': _export(export_cutting_plan_text),
+}
+
+
+def _best_time(fn, case, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(case)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes=DEFAULT_SIZES, repeat: int = 3, seed: int = 0, only=None, log=None) -> dict:
+    """Time :data:`BENCHMARKS` (or the names in ``only``) for each size."""
+    names = list(only or BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+    results = {}
+    for size in sizes:
+        case = Case(size, seed)
+        for name in names:
+            seconds = _best_time(BENCHMARKS[name], case, repeat)
+            results[f"{name}@{size}"] = seconds
+            if log:
+                log(f"{name}@{size}: {seconds * 1000:.2f} ms")
+    return {
+        'meta': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'sizes': list(sizes),
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def save(data: dict, path: str) -> None:
+    with open(path, 'w') as fh:
+        json.dump(data, fh, indent=2, sort_keys=True)
+        fh.write('\n')
+
+
+def load(path: str) -> dict:
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.25,
+            min_time: float = 0.001) -> list:
+    """Return ``(name, base, now, ratio)`` for benchmarks that regressed.
+
+    A benchmark regressed if it now takes more than ``1 + threshold``
+    times its baseline. Benchmarks missing from either run are ignored.
+    """
+    regressions = []
+    base_results = baseline['results']
+    for name, now in sorted(current['results'].items()):
+        base = base_results.get(name)
+        if base is None or max(base, now) < min_time:
+            continue
+        ratio = now / base if base else float('inf')
+        if ratio > 1 + threshold:
+            regressions.append((name, base, now, ratio))
+    return regressions
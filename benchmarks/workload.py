@@ -0,0 +1,99 @@
+"""Seeded generator for realistic synthetic takeoffs.
+
+Parts look like the ones in ``app/static/sample_parts.csv``: marks are two
+letters and a number (``CA195``), lengths are feet and inches with
+fractions down to 1/16" (``11' 9 15/16"``), and most marks are needed once
+or twice with a few repeated many times. Stock comes in the usual mill
+lengths of ``app/static/sample_stock.csv`` with enough sticks to cover the
+demand plus some slack. The same ``seed`` always gives the same workload.
+"""
+
+import csv
+import io
+import random
+
+MARK_PREFIXES = ('CA', 'CB', 'BM', 'CL', 'BR', 'GT', 'PL', 'ST')
+STOCK_LENGTHS = (20, 24, 40, 48)  # feet
+# Extra stock, as a fraction of the total part length, so most parts fit.
+STOCK_SLACK = 0.15
+
+
+def _length_str(rng, low_in: int, high_in: int) -> str:
+    inches = rng.randint(low_in, high_in)
+    feet, inches = divmod(inches, 12)
+    sixteenths = rng.choice((0, 0, 0, 1, 2, 3, 4, 5, 7, 8, 9, 11, 12, 13, 15))
+    text = f"{feet}'"
+    if inches or sixteenths:
+        text += f" {inches}"
+        if sixteenths:
+            num, den = sixteenths, 16
+            while num % 2 == 0:
+                num //= 2
+                den //= 2
+            text += f" {num}/{den}"
+        text += '"'
+    return text
+
+
+def generate_parts(n_parts: int, seed: int = 0) -> list:
+    """Return ``(qty, mark, length_str)`` rows totalling ``n_parts`` pieces."""
+    rng = random.Random(seed)
+    rows = []
+    used = set()
+    remaining = n_parts
+    while remaining > 0:
+        while True:
+            mark = f"{rng.choice(MARK_PREFIXES)}{rng.randint(100, 9999)}"
+            if mark not in used or len(used) >= 9900 * len(MARK_PREFIXES):
+                break
+        used.add(mark)
+        roll = rng.random()
+        if roll < 0.7:
+            qty = 1
+        elif roll < 0.9:
+            qty = rng.randint(2, 4)
+        else:
+            qty = rng.randint(5, 60)
+        qty = min(qty, remaining)
+        rows.append((qty, mark, _length_str(rng, 12, 30 * 12)))
+        remaining -= qty
+    return rows
+
+
+def generate_stock(parts_rows, seed: int = 0) -> list:
+    """Return ``(qty, length_str)`` stock rows covering ``parts_rows``."""
+    from common.lengths import parse_length
+
+    rng = random.Random(seed + 1)
+    need = sum(qty * parse_length(length) for qty, _, length in parts_rows) * (1 + STOCK_SLACK)
+    weights = [rng.random() + 0.5 for _ in STOCK_LENGTHS]
+    total_weight = sum(weights)
+    rows = []
+    for feet, weight in zip(STOCK_LENGTHS, weights):
+        qty = max(1, round(need * weight / total_weight / (feet * 12)) + 1)
+        rows.append((qty, f"{feet}'"))
+    return rows
+
+
+def parts_text(rows) -> str:
+    return '\n'.join(f"{qty} {mark} {length}" for qty, mark, length in rows)
+
+
+def stock_text(rows) -> str:
+    return '\n'.join(f"{qty} {length}" for qty, length in rows)
+
+
+def parts_csv(rows) -> bytes:
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(['qty', 'mark', 'length'])
+    writer.writerows(rows)
+    return out.getvalue().encode()
+
+
+def stock_csv(rows) -> bytes:
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(['qty', 'length'])
+    writer.writerows(rows)
+    return out.getvalue().encode()
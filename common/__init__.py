@@ -0,0 +1,7 @@
+"""Helpers shared by the BladePlan web app and the ForgeCore backend.
+
+:mod:`common.lengths` parses and formats lengths, :mod:`common.placement`
+is the indexed placement engine and :mod:`common.metrics` holds the metric
+classes. Nothing here imports :mod:`app` or :mod:`forgecore`, so either
+side can use these modules without loading the other.
+"""
@@ -0,0 +1,194 @@
+"""Length parsing and formatting, plus the fixed-point tick model.
+
+Lengths are floats in inches at the user-facing boundary. The optimizer can
+instead work on integer *ticks* of 1/64". Every fraction a tape measure
+shows is a whole number of ticks, so tick arithmetic is exact and free of
+the drift that builds up over thousands of float kerf subtractions.
+"""
+
+import math
+import re
+from array import array
+from functools import lru_cache
+
+TICKS_PER_INCH = 64
+
+# Distinct length strings remembered by :func:`parse_lengths` across calls.
+LENGTH_CACHE_SIZE = 4096
+
+# Tolerance, in ticks, for float noise when rounding towards a safe side.
+_TICK_TOLERANCE = 1e-6
+
+
+def parse_length(length_str: str) -> float:
+    """Convert length strings like ``"11' 9 15/16\""`` to inches.
+
+    Raises
+    ------
+    ValueError
+        If ``length_str`` contains malformed numeric values.
+    """
+    length_str = length_str.strip().lower()
+    if not length_str:
+        raise ValueError("Length value is missing")
+
+    metric = re.fullmatch(r"([0-9]*\.?[0-9]+)\s*(mm|cm|m)", length_str)
+    if metric:
+        val = float(metric.group(1))
+        unit = metric.group(2)
+        if unit == "mm":
+            return val / 25.4
+        if unit == "cm":
+            return (val * 10) / 25.4
+        return (val * 1000) / 25.4
+
+    feet = 0
+    feet_match = re.search(r"(\d+)\s*'", length_str)
+    if feet_match:
+        feet = int(feet_match.group(1))
+        length_str = length_str[feet_match.end():]
+
+    length_str = length_str.replace('"', '').strip()
+    inches = 0.0
+    if length_str:
+        parts = length_str.split()
+        whole = 0
+        frac = 0.0
+        for p in parts:
+            if '/' in p:
+                try:
+                    num, denom = p.split('/')
+                    frac += int(num) / int(denom)
+                except (ValueError, ZeroDivisionError) as exc:
+                    raise ValueError(f"Invalid fraction '{p}' in length '{length_str}'") from exc
+            else:
+                try:
+                    whole += float(p)
+                except ValueError as exc:
+                    raise ValueError(f"Invalid number '{p}' in length '{length_str}'") from exc
+        inches = whole + frac
+
+
+    return feet * 12 + inches
+
+
+class LengthError(ValueError):
+    """Raised by :func:`parse_lengths` for the first malformed value."""
+
+    def __init__(self, row: int, value: str, reason: str):
+        super().__init__(f"Invalid length '{value}' at row {row}: {reason}")
+        self.row = row
+        self.value = value
+        self.reason = reason
+
+
+@lru_cache(maxsize=LENGTH_CACHE_SIZE)
+def _parse_length_memo(length_str: str) -> float:
+    return parse_length(length_str)
+
+
+def parse_lengths(values, positive: bool = False, start: int = 0) -> array:
+    """Parse a column of length strings into an ``array('d')`` of inches.
+
+    Takeoffs repeat the same few hundred strings over thousands of rows, so
+    each distinct string is parsed once, through an LRU-bounded memo shared
+    between calls.
+
+    Parameters
+    ----------
+    values : iterable of str
+        The column to parse.
+    positive : bool
+        Reject lengths that are zero or negative.
+    start : int
+        Row number reported for the first value.
+
+    Raises
+    ------
+    LengthError
+        For the first malformed value, with its row number.
+    """
+    values = list(values)
+    parsed = {}
+    for value in dict.fromkeys(values):
+        try:
+            length = _parse_length_memo(value)
+            if positive and length <= 0:
+                raise ValueError("length must be positive")
+        except ValueError as exc:
+            raise LengthError(values.index(value) + start, value, str(exc)) from exc
+        parsed[value] = length
+    return array('d', map(parsed.__getitem__, values))
+
+
+def parse_length_cache_info():
+    """Return hit/miss statistics of the :func:`parse_lengths` memo."""
+    return _parse_length_memo.cache_info()
+
+
+def format_length(inches: float) -> str:
+    feet = int(inches // 12)
+    remaining = inches - feet * 12
+    whole = int(remaining)
+    frac = remaining - whole
+    denom = 16
+    num = int(round(frac * denom))
+    if num == denom:
+        whole += 1
+        num = 0
+
+    parts = []
+    if feet:
+        parts.append(f"{feet}'")
+
+    inch_part = ''
+    if whole or num:
+        inch_part = f"{whole}" if whole else '0'
+        if num:
+            from math import gcd
+            g = gcd(num, denom)
+            simple_num = num // g
+            simple_denom = denom // g
+            inch_part += f" {simple_num}/{simple_denom}"
+        inch_part += '"'
+
+    if inch_part:
+        parts.append(inch_part)
+
+    return ' '.join(parts) if parts else '0"'
+
+
+def to_ticks(inches: float) -> int:
+    """Convert inches to the nearest whole number of ticks."""
+    return round(inches * TICKS_PER_INCH)
+
+
+def is_whole_ticks(inches: float) -> bool:
+    """Return whether ``inches`` is a whole number of ticks."""
+    ticks = inches * TICKS_PER_INCH
+    return abs(ticks - round(ticks)) <= _TICK_TOLERANCE
+
+
+def to_ticks_ceil(inches: float) -> int:
+    """Convert inches to ticks, rounding up (use for parts and kerf)."""
+    return math.ceil(inches * TICKS_PER_INCH - _TICK_TOLERANCE)
+
+
+def to_ticks_floor(inches: float) -> int:
+    """Convert inches to ticks, rounding down (use for stock)."""
+    return math.floor(inches * TICKS_PER_INCH + _TICK_TOLERANCE)
+
+
+def from_ticks(ticks: int) -> float:
+    """Convert ticks back to inches."""
+    return ticks / TICKS_PER_INCH
+
+
+def parse_length_ticks(length_str: str) -> int:
+    """Like :func:`parse_length` but return the nearest number of ticks."""
+    return to_ticks(parse_length(length_str))
+
+
+def format_ticks(ticks: int) -> str:
+    """Like :func:`format_length` for a length given in ticks."""
+    return format_length(from_ticks(ticks))
@@ -0,0 +1,287 @@
+"""Indexed placement engine behind :func:`optimize_cuts`.
+
+Sticks are indexed by their remaining capacity so each part is placed in
+``O(log n)`` instead of scanning every stick. Two strategies are offered:
+
+``ffd``
+    First-Fit Decreasing. Each part goes into the first stick, in stock
+    order, that can still hold it. The result is identical to the original
+    linear scan.
+``bfd``
+    Best-Fit Decreasing. Each part goes into the stick that leaves the
+    least material behind once the part (and its kerf) is cut.
+
+Kerf is handled exactly as before: a cut after the first part on a stick
+costs ``kerf_width`` in addition to the part length.
+
+:func:`place_runs_remnant_first` puts a second tier in front of the
+stock. Remnants are kept in a :class:`BestFitIndex`, and a full stick is
+only opened when no remnant can take the part.
+"""
+
+import bisect
+
+STRATEGIES = ('ffd', 'bfd')
+
+_NEG_INF = float('-inf')
+
+
+class FirstFitIndex:
+    """Segment tree answering "leftmost stick that can take this part".
+
+    Two maxima are kept per node: one over sticks that are still empty and
+    one over sticks that already hold parts. Parts placed on the latter
+    also need a kerf, so keeping them apart lets the tree evaluate exactly
+    the same ``length + kerf <= remaining`` test as the linear scan.
+    """
+
+    def __init__(self, capacities):
+        size = 1
+        while size < len(capacities):
+            size *= 2
+        self._size = size
+        self._empty = [_NEG_INF] * (2 * size)
+        self._used = [_NEG_INF] * (2 * size)
+        self._empty[size:size + len(capacities)] = capacities
+        for node in range(size - 1, 0, -1):
+            self._empty[node] = max(self._empty[2 * node], self._empty[2 * node + 1])
+
+    def _fits(self, node: int, length: float, kerf_width: float) -> bool:
+        return (
+            length <= self._empty[node]
+            or length + kerf_width <= self._used[node]
+        )
+
+    def find(self, length: float, kerf_width: float) -> int:
+        """Return the index of the first stick that fits, or ``-1``."""
+        if not self._fits(1, length, kerf_width):
+            return -1
+        node = 1
+        while node < self._size:
+            node *= 2
+            if not self._fits(node, length, kerf_width):
+                node += 1
+        return node - self._size
+
+    def place(self, index: int, remaining: float) -> None:
+        """Record that stick ``index`` now holds parts and ``remaining`` inches."""
+        empty, used = self._empty, self._used
+        node = index + self._size
+        empty[node] = _NEG_INF
+        used[node] = remaining
+        node //= 2
+        while node:
+            left = 2 * node
+            new_empty = max(empty[left], empty[left + 1])
+            new_used = max(used[left], used[left + 1])
+            if new_empty == empty[node] and new_used == used[node]:
+                # Nothing above this node can change either.
+                break
+            empty[node] = new_empty
+            used[node] = new_used
+            node //= 2
+
+
+class BestFitIndex:
+    """Sorted ``(remaining, index)`` keys for best-fit lookups via :mod:`bisect`.
+
+    Empty and partially used sticks are kept in separate lists for the same
+    kerf reason as :class:`FirstFitIndex`.
+    """
+
+    def __init__(self, capacities):
+        self._empty = sorted((cap, i) for i, cap in enumerate(capacities))
+        self._used = []
+        self._remaining = list(capacities)
+        self._has_parts = [False] * len(capacities)
+
+    def find(self, length: float, kerf_width: float) -> int:
+        """Return the index of the tightest stick that fits, or ``-1``."""
+        best = None
+        pos = bisect.bisect_left(self._empty, (length, -1))
+        if pos < len(self._empty):
+            cap, idx = self._empty[pos]
+            # Prefer an already opened stick when the leftover is the same.
+            best = (cap - length, 1, idx)
+        required = length + kerf_width
+        pos = bisect.bisect_left(self._used, (required, -1))
+        if pos < len(self._used):
+            cap, idx = self._used[pos]
+            candidate = (cap - required, 0, idx)
+            if best is None or candidate < best:
+                best = candidate
+        return best[2] if best is not None else -1
+
+    def place(self, index: int, remaining: float) -> None:
+        """Record that stick ``index`` now holds parts and ``remaining`` inches."""
+        keys = self._used if self._has_parts[index] else self._empty
+        del keys[bisect.bisect_left(keys, (self._remaining[index], index))]
+        self._remaining[index] = remaining
+        self._has_parts[index] = True
+        bisect.insort(self._used, (remaining, index))
+
+
+class TieredIndex:
+    """Consult ``first`` and fall back to ``second`` for the sticks after it.
+
+    Indexes returned for ``second`` are shifted by ``offset``, the number of
+    sticks ``first`` covers.
+    """
+
+    def __init__(self, first, second, offset: int):
+        self._first = first
+        self._second = second
+        self._offset = offset
+
+    def find(self, length: float, kerf_width: float) -> int:
+        i = self._first.find(length, kerf_width)
+        if i >= 0:
+            return i
+        i = self._second.find(length, kerf_width)
+        return i + self._offset if i >= 0 else -1
+
+    def place(self, index: int, remaining: float) -> None:
+        if index < self._offset:
+            self._first.place(index, remaining)
+        else:
+            self._second.place(index - self._offset, remaining)
+
+
+def plan_cost(bins, uncut):
+    """Return a sortable cost: uncut pieces, stock consumed, then sticks used."""
+    used = [b for b in bins if b['parts']]
+    return (len(uncut), sum(b['stock_length'] for b in used), len(used))
+
+
+_INDEXES = {
+    'ffd': FirstFitIndex,
+    'bfd': BestFitIndex,
+}
+
+
+def place_runs(runs, stocks, kerf_width: float, strategy: str = 'ffd', progress=None):
+    """Place ``(length, pieces)`` runs, in the given order, into ``stocks``.
+
+    All pieces in a run share one length, so once a stick is found every
+    piece that still fits goes onto it before the index is consulted again.
+    For both strategies this gives the same plan as placing the pieces one
+    at a time: the chosen stick stays the first (or tightest) fit for the
+    next identical piece for as long as it can hold one.
+
+    ``progress``, if given, is called with the fraction of pieces handled
+    after each run.
+    """
+    bins = _bins(stocks)
+    index = _index_cls(strategy)([b['remaining'] for b in bins])
+    return _fill(runs, bins, index, kerf_width, progress)
+
+
+def place_runs_remnant_first(runs, remnants, stocks, kerf_width: float,
+                             strategy: str = 'ffd', progress=None):
+    """Like :func:`place_runs`, but fill ``remnants`` before ``stocks``.
+
+    Each piece goes into the tightest remnant that can hold it, and only
+    when none can is a stick from ``stocks`` chosen with ``strategy``. The
+    returned bins list the remnants first, then the stock, each in the
+    order given.
+    """
+    stock_index = _index_cls(strategy)([s['length'] for s in stocks])
+    bins = _bins(remnants) + _bins(stocks)
+    remnant_index = BestFitIndex([b['remaining'] for b in bins[:len(remnants)]])
+    index = TieredIndex(remnant_index, stock_index, len(remnants))
+    return _fill(runs, bins, index, kerf_width, progress)
+
+
+def _index_cls(strategy: str):
+    try:
+        return _INDEXES[strategy]
+    except KeyError:
+        raise ValueError(f"Unknown optimization strategy '{strategy}'") from None
+
+
+def _bins(stocks) -> list:
+    return [
+        {
+            'stock_length': stock['length'],
+            'stock_str': stock['length_str'],
+            'remaining': stock['length'],
+            'parts': [],
+        }
+        for stock in stocks
+    ]
+
+
+def _fill(runs, bins, index, kerf_width: float, progress):
+    uncut = []
+    total = sum(len(pieces) for _, pieces in runs)
+    done = 0
+    for length, pieces in runs:
+        pos = 0
+        while pos < len(pieces):
+            i = index.find(length, kerf_width)
+            if i < 0:
+                uncut.extend(pieces[pos:])
+                break
+            b = bins[i]
+            remaining = b['remaining']
+            count = 0
+            while pos + count < len(pieces):
+                required = length
+                if b['parts'] or count:
+                    required += kerf_width
+                if required > remaining:
+                    break
+                remaining -= required
+                count += 1
+            b['parts'].extend(pieces[pos:pos + count])
+            b['remaining'] = remaining
+            index.place(i, remaining)
+            pos += count
+        if progress is not None:
+            done += len(pieces)
+            progress(done / total)
+    return bins, uncut
+
+
+def place_parts(parts, stocks, kerf_width: float = 0.0, strategy: str = 'ffd', progress=None):
+    """Assign ``parts`` to ``stocks`` and return ``(bins, uncut)``.
+
+    ``bins`` has one entry per stock stick, in stock order, including sticks
+    that end up unused.
+
+    Raises
+    ------
+    ValueError
+        If ``strategy`` is not one of :data:`STRATEGIES`.
+    """
+    runs = []
+    for part in sorted(parts, key=lambda p: -p['length']):
+        if runs and runs[-1][0] == part['length']:
+            runs[-1][1].append(part)
+        else:
+            runs.append((part['length'], [part]))
+    return place_runs(runs, stocks, kerf_width, strategy, progress)
+
+
+def place_demand(demand, inventory, kerf_width: float = 0.0, strategy: str = 'ffd', progress=None):
+    """Like :func:`place_parts` for compact demand and stock.
+
+    ``demand`` is a sequence of :class:`app.demand.PartDemand` and
+    ``inventory`` a :class:`app.demand.StockInventory`.
+    """
+    return place_runs(demand_runs(demand), inventory.sticks(), kerf_width, strategy, progress)
+
+
+def demand_runs(demand, key=None) -> list:
+    """Return ``(length, pieces)`` runs for :func:`place_runs`.
+
+    Lines are ordered longest first, or by ``key`` if given, and adjacent
+    lines of equal length share a run.
+    """
+    runs = []
+    for line in sorted(demand, key=key or (lambda d: -d.length)):
+        if runs and runs[-1][0] == line.length:
+            runs[-1][1].extend([line.piece] * line.qty)
+        else:
+            runs.append((line.length, [line.piece] * line.qty))
+    return runs
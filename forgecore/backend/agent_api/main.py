@@ -1,22 +1,48 @@
 """Agent API module.
 Provides simple API endpoints for other services or agents.
+Request counts and latencies are served in Prometheus format on /metrics.
 """
 
 import argparse
 from http.server import BaseHTTPRequestHandler, HTTPServer
 import json
+import time
+
+from ...config.metrics import CONTENT_TYPE, REGISTRY
+
+REQUESTS_TOTAL = REGISTRY.counter(
+    "agent_api_requests_total", "Agent API requests by path and status."
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "agent_api_request_seconds", "Agent API request latency by path."
+)
 
 
 class SimpleHandler(BaseHTTPRequestHandler):
     def do_GET(self):
+        start = time.perf_counter()
         if self.path == "/status":
-            self.send_response(200)
+            status = 200
+            self.send_response(status)
             self.send_header("Content-Type", "application/json")
             self.end_headers()
             self.wfile.write(json.dumps({"status": "ok"}).encode())
+        elif self.path == "/metrics":
+            status = 200
+            body = REGISTRY.render().encode()
+            self.send_response(status)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
         else:
-            self.send_response(404)
+            status = 404
+            self.send_response(status)
             self.end_headers()
+        # Unknown paths share one label so scanners can't grow the series.
+        path = self.path if status != 404 else "other"
+        REQUESTS_TOTAL.inc(path=path, status=status)
+        REQUEST_SECONDS.observe(time.perf_counter() - start, path=path)
 
 
 def run_server(port: int = 8080):
@@ -1,55 +1,310 @@
 """Cutlist Optimizer module.
-Loads parts and available materials from the database
-and matches best cuts from available stock.
+Loads parts and available materials from the database, places the parts
+on the stock with the indexed engine shared with the Flask app
+(:mod:`common.placement`) and writes the chosen material back to
+``cut_parts.material_id``.
+
+In remnant-first mode, remnants are filled before any full stick is opened.
+Offcuts of at least ``min_remnant`` inches are saved as new remnant
+``materials`` rows. Offcuts from an earlier save of the same selection are
+replaced rather than piling up.
 """
 
 import argparse
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+from common.placement import STRATEGIES, place_runs, place_runs_remnant_first
+
+from ...config.config import pooled
+from ..job_summary.main import set_assignment_totals
 
-from ...config.config import POOL
+# Rows sent per executemany call when writing assignments back.
+WRITE_BATCH = 5000
+
+# Shortest offcut, in inches, kept as a remnant in remnant-first mode.
+MIN_REMNANT = 24
+
+# materials.source of remnants this module writes back.
+OFFCUT_SOURCE = "offcut"
 
 
 class CutlistOptimizer:
-    def __init__(self):
-        self.cnx = POOL.get_connection()
+    def __init__(self, kerf_width: float = 0.0, strategy: str = "ffd", cnx=None,
+                 remnant_first: bool = False, min_remnant: float = MIN_REMNANT):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown optimization strategy '{strategy}'")
+        self.kerf_width = kerf_width
+        self.strategy = strategy
+        self.remnant_first = remnant_first
+        self.min_remnant = min_remnant
+        self.cnx = cnx
+
+    @pooled
+    def get_parts_and_stock(self, job_id: Optional[int] = None) -> Tuple[List[Tuple], List[Tuple]]:
+        """Load cut parts, optionally of one job, and full stock from DB.
 
-    def get_parts_and_stock(self) -> Tuple[List[Tuple], List[Tuple]]:
-        """Load cut parts and materials from DB."""
+        For one job, sticks that parts of other jobs are cut from are left out.
+        """
         cursor = self.cnx.cursor()
-        cursor.execute("SELECT id, part_length_inches, job_id FROM cut_parts")
+        if job_id is None:
+            cursor.execute("SELECT id, part_length_inches, job_id FROM cut_parts")
+        else:
+            cursor.execute(
+                "SELECT id, part_length_inches, job_id FROM cut_parts WHERE job_id=%s",
+                (job_id,),
+            )
         parts = cursor.fetchall()
-        cursor.execute("SELECT id, length_inches FROM materials WHERE is_remnant=0")
+        if job_id is None:
+            cursor.execute("SELECT id, length_inches FROM materials WHERE is_remnant=0")
+        else:
+            # Sticks other jobs already cut from are not available.
+            cursor.execute(
+                "SELECT m.id, m.length_inches FROM materials m WHERE m.is_remnant=0 "
+                "AND NOT EXISTS (SELECT 1 FROM cut_parts c "
+                "WHERE c.material_id=m.id AND NOT (c.job_id<=>%s))",
+                (job_id,),
+            )
         stock = cursor.fetchall()
         cursor.close()
         return parts, stock
 
-    def optimize(self):
-        """Placeholder optimization algorithm."""
-        parts, stock = self.get_parts_and_stock()
-        # Basic first-fit decreasing algorithm (placeholder)
-        parts = sorted(parts, key=lambda x: x[1], reverse=True)
-        assignments = []
-        for part in parts:
-            for mat in stock:
-                if mat[1] >= part[1]:
-                    assignments.append((part[0], mat[0]))
-                    mat_list = list(mat)
-                    mat_list[1] -= part[1]
-                    stock[stock.index(mat)] = tuple(mat_list)
-                    break
+    @pooled
+    def get_remnants(self, job_id: Optional[int] = None) -> List[Tuple]:
+        """Load remnants the parts may use, shortest first.
+
+        Remnants already cut for parts outside the selection are excluded,
+        and so are offcuts written by an earlier save of this selection,
+        which :meth:`save_assignments` replaces.
+        """
+        cursor = self.cnx.cursor()
+        if job_id is None:
+            cursor.execute(
+                "SELECT id, length_inches FROM materials "
+                "WHERE is_remnant=1 AND NOT (source<=>%s) ORDER BY length_inches, id",
+                (OFFCUT_SOURCE,),
+            )
+        else:
+            cursor.execute(
+                "SELECT m.id, m.length_inches FROM materials m "
+                "WHERE m.is_remnant=1 AND NOT (m.source<=>%s AND m.job_id<=>%s) "
+                "AND NOT EXISTS (SELECT 1 FROM cut_parts c "
+                "WHERE c.material_id=m.id AND NOT (c.job_id<=>%s)) "
+                "ORDER BY m.length_inches, m.id",
+                (OFFCUT_SOURCE, job_id, job_id),
+            )
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+
+    def place(self, parts, stock, remnants=()):
+        """Place ``parts`` rows on ``remnants`` first, then ``stock`` rows.
+
+        Returns ``(assignments, uncut, offcuts)``: ``(part_id, material_id)``
+        pairs, the IDs of parts that fit on no material, and
+        ``(material_id, inches)`` for every material cut that has at least
+        ``min_remnant`` inches left. Parts are taken longest first, and
+        every cut after the first on a material costs ``kerf_width``.
+        """
+        runs = {}
+        for part_id, length, _ in parts:
+            runs.setdefault(length, []).append(part_id)
+        runs = sorted(runs.items(), key=lambda run: -run[0])
+        sticks = [{"length": length, "length_str": str(length)} for _, length in stock]
+        if remnants:
+            pieces = [{"length": length, "length_str": str(length)} for _, length in remnants]
+            bins, uncut = place_runs_remnant_first(
+                runs, pieces, sticks, self.kerf_width, self.strategy
+            )
+        else:
+            bins, uncut = place_runs(runs, sticks, self.kerf_width, self.strategy)
+        materials = list(remnants) + list(stock)
+        assignments = [
+            (part_id, material_id)
+            for (material_id, _), b in zip(materials, bins)
+            for part_id in b["parts"]
+        ]
+        offcuts = [
+            (material_id, b["remaining"])
+            for (material_id, _), b in zip(materials, bins)
+            if b["parts"] and b["remaining"] >= self.min_remnant
+        ]
+        return assignments, uncut, offcuts
+
+    @pooled
+    def optimize(self, job_id: Optional[int] = None, save: bool = False):
+        """Return ``(part_id, material_id)`` assignments for the parts.
+
+        With ``save`` the assignments are also written to
+        ``cut_parts.material_id``, and parts that no longer fit are reset
+        to ``NULL``.
+        """
+        parts, stock = self.get_parts_and_stock(job_id)
+        remnants = self.get_remnants(job_id) if self.remnant_first else ()
+        assignments, uncut, offcuts = self.place(parts, stock, remnants)
+        if save:
+            self.save_assignments(
+                assignments, uncut, parts, offcuts if self.remnant_first else None, job_id,
+                materials=dict(list(remnants) + list(stock)),
+            )
         return assignments
 
+    @pooled
+    def save_assignments(self, assignments, uncut, parts, offcuts=None,
+                         job_id: Optional[int] = None, materials=None) -> None:
+        """Write ``assignments`` and ``uncut`` back in one transaction.
+
+        If ``offcuts`` is given, offcuts from earlier saves of the same
+        selection that nothing is cut from are deleted. The new
+        ``(material_id, inches)`` offcuts are inserted as remnant rows in
+        one batch. Each belongs to the job of the longest part cut from its
+        material, so a stick shared by several jobs leaves its offcut to one.
+
+        The new ``material_id`` of every part is loaded into a temporary
+        table with batched ``executemany`` inserts, which the MySQL driver
+        sends as one multi-row statement per batch. One ``UPDATE ... JOIN``
+        then applies them all. A per-row ``UPDATE`` would cost one round
+        trip per part. Only ``material_id`` is written, and parts that no
+        longer exist are not recreated.
+
+        With ``materials``, a ``{material_id: length}`` map, the
+        ``job_summary`` rows of the jobs in ``parts`` are updated in the
+        same transaction.
+        """
+        rows = list(assignments)
+        rows.extend((part_id, None) for part_id in uncut)
+        cursor = self.cnx.cursor()
+        try:
+            # Temporary tables do not end the transaction, and autocommit is
+            # off, so every statement below joins one transaction.
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS cut_assignments")
+            cursor.execute(
+                "CREATE TEMPORARY TABLE cut_assignments "
+                "(id INT PRIMARY KEY, material_id INT NULL)"
+            )
+            for start in range(0, len(rows), WRITE_BATCH):
+                cursor.executemany(
+                    "INSERT INTO cut_assignments (id, material_id) VALUES (%s, %s)",
+                    rows[start:start + WRITE_BATCH],
+                )
+            cursor.execute(
+                "UPDATE cut_parts c JOIN cut_assignments a ON a.id=c.id "
+                "SET c.material_id=a.material_id"
+            )
+            cursor.execute("DROP TEMPORARY TABLE cut_assignments")
+            if offcuts is not None:
+                self._replace_offcuts(cursor, offcuts, job_id, assignments, parts)
+            if materials is not None:
+                totals = self._job_totals(assignments, parts, materials)
+                if offcuts is not None:
+                    self._add_remnant_totals(cursor, totals, job_id)
+                set_assignment_totals(cursor, totals, remnants=offcuts is not None)
+            self.cnx.commit()
+        except Exception:
+            self.cnx.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _job_totals(assignments, parts, materials) -> dict:
+        """Return the ``job_summary`` assignment totals of every job in ``parts``."""
+        part_jobs = {part_id: (length, job) for part_id, length, job in parts}
+        totals = {
+            job: {"assigned_count": 0, "used_inches": 0, "stock_inches": 0,
+                  "remnant_count": 0, "remnant_inches": 0}
+            for _, _, job in parts
+        }
+        cut_from = set()
+        for part_id, material_id in assignments:
+            length, job = part_jobs[part_id]
+            t = totals[job]
+            t["assigned_count"] += 1
+            t["used_inches"] += length
+            # A stick counts once per job however many of its parts it holds.
+            if (job, material_id) not in cut_from:
+                cut_from.add((job, material_id))
+                t["stock_inches"] += materials[material_id]
+        return totals
+
+    @staticmethod
+    def _add_remnant_totals(cursor, totals: dict, job_id: Optional[int]) -> None:
+        # Read back rather than count the new offcuts: older offcuts that
+        # other jobs still cut from were kept and belong to the total.
+        if job_id is None:
+            cursor.execute(
+                "SELECT job_id, COUNT(*), SUM(length_inches) FROM materials "
+                "WHERE is_remnant=1 AND source=%s GROUP BY job_id",
+                (OFFCUT_SOURCE,),
+            )
+        else:
+            cursor.execute(
+                "SELECT job_id, COUNT(*), SUM(length_inches) FROM materials "
+                "WHERE is_remnant=1 AND source=%s AND job_id=%s GROUP BY job_id",
+                (OFFCUT_SOURCE, job_id),
+            )
+        for job, count, inches in cursor.fetchall():
+            if job in totals:
+                totals[job].update(remnant_count=count, remnant_inches=int(inches or 0))
+
+    @staticmethod
+    def _offcut_jobs(assignments, parts) -> dict:
+        """Return ``{material_id: job_id}`` of the longest part cut from each material."""
+        part_jobs = {part_id: (length, job) for part_id, length, job in parts}
+        longest = {}
+        for part_id, material_id in assignments:
+            length, job = part_jobs[part_id]
+            if material_id not in longest or length > longest[material_id][0]:
+                longest[material_id] = (length, job)
+        return {material_id: job for material_id, (_, job) in longest.items()}
+
+    def _replace_offcuts(self, cursor, offcuts, job_id: Optional[int],
+                         assignments=(), parts=()) -> None:
+        # Parts were reassigned above, so old offcuts still referenced are
+        # ones other jobs cut from; those stay.
+        unused = "AND id NOT IN (SELECT material_id FROM cut_parts WHERE material_id IS NOT NULL)"
+        if job_id is None:
+            cursor.execute(
+                f"DELETE FROM materials WHERE is_remnant=1 AND source=%s {unused}",
+                (OFFCUT_SOURCE,),
+            )
+        else:
+            cursor.execute(
+                f"DELETE FROM materials WHERE is_remnant=1 AND source=%s AND job_id=%s {unused}",
+                (OFFCUT_SOURCE, job_id),
+            )
+        if job_id is None:
+            jobs = self._offcut_jobs(assignments, parts)
+            rows = [(int(inches), OFFCUT_SOURCE, jobs[material_id])
+                    for material_id, inches in offcuts]
+        else:
+            rows = [(int(inches), OFFCUT_SOURCE, job_id) for _, inches in offcuts]
+        for start in range(0, len(rows), WRITE_BATCH):
+            cursor.executemany(
+                "INSERT INTO materials (length_inches, source, is_remnant, job_id) "
+                "VALUES (%s, %s, 1, %s)",
+                rows[start:start + WRITE_BATCH],
+            )
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Cutlist Optimizer test harness")
     parser.add_argument("--run", action="store_true", help="Run optimization")
+    parser.add_argument("--save", action="store_true", help="Write assignments to cut_parts")
+    parser.add_argument("--job", type=int, help="Only optimize the parts of this job")
+    parser.add_argument("--kerf", type=float, default=0.0, help="Kerf width in inches")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="ffd", help="Placement strategy")
+    parser.add_argument("--remnants", action="store_true",
+                        help="Fill remnants first and save usable offcuts as remnants")
+    parser.add_argument("--min-remnant", type=float, default=MIN_REMNANT,
+                        help="Shortest offcut in inches kept as a remnant")
     args = parser.parse_args()
 
-    optimizer = CutlistOptimizer()
-    if args.run:
-        result = optimizer.optimize()
+    optimizer = CutlistOptimizer(args.kerf, args.strategy, remnant_first=args.remnants,
+                                 min_remnant=args.min_remnant)
+    if args.run or args.save:
+        result = optimizer.optimize(args.job, save=args.save)
         print("Assignments:", result)
     else:
-        parts, stock = optimizer.get_parts_and_stock()
+        parts, stock = optimizer.get_parts_and_stock(args.job)
         print("Parts:", parts)
         print("Stock:", stock)
@@ -0,0 +1,207 @@
+"""Streaming cut-length extraction from ASCII DXF drawings.
+
+A DXF file is a flat stream of group code / value line pairs.
+:func:`iter_groups` reads those pairs one at a time from a memory-mapped
+file, so memory use stays flat no matter how large the drawing is.
+:func:`iter_lengths` picks ``LINE``, ``LWPOLYLINE`` and linear
+``DIMENSION`` entities out of the ``ENTITIES`` section and converts
+their lengths to inches using the header's ``$INSUNITS``.
+
+Shop drawings put each part on a layer named after its mark.
+:func:`part_lengths` therefore reports one cut length per layer: the
+largest linear dimension on it, or the longest piece of geometry when
+the layer has no dimensions. Entities inside ``BLOCKS`` are not expanded.
+"""
+
+import math
+import mmap
+import os
+import re
+
+from common.lengths import parse_length
+
+# Inches per drawing unit, by $INSUNITS code. Unitless drawings are taken
+# to be in inches.
+UNIT_INCHES = {
+    0: 1.0,
+    1: 1.0,
+    2: 12.0,
+    4: 1 / 25.4,
+    5: 10 / 25.4,
+    6: 1000 / 25.4,
+}
+
+_LINEAR_DIMENSIONS = (0, 1)
+
+# Override text that names its unit, like 14' 3" or 2450 mm.
+_EXPLICIT_UNIT = re.compile(r"['\"]|\d\s*(?:mm|cm|m)$", re.IGNORECASE)
+
+
+class DXFError(ValueError):
+    """Raised for files that are not ASCII DXF."""
+
+
+def iter_groups(path):
+    """Yield ``(code, value)`` pairs from the DXF at ``path``.
+
+    ``value`` is the raw line as ``bytes`` without its line ending, so
+    callers only pay for decoding the values they use.
+    """
+    with open(path, 'rb') as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:18] == b'AutoCAD Binary DXF':
+                raise DXFError(f'{path}: binary DXF is not supported')
+            lines = iter(mm.readline, b'')
+            # Files reuse a handful of code spellings; looking them up beats int().
+            codes = {}
+            for line_no, (raw, value) in enumerate(zip(lines, lines)):
+                code = codes.get(raw)
+                if code is None:
+                    try:
+                        code = codes[raw] = int(raw)
+                    except ValueError:
+                        raise DXFError(
+                            f'{path}:{2 * line_no + 1}: bad group code {raw[:20]!r}'
+                        ) from None
+                yield code, value.rstrip(b'\r\n')
+
+
+def _arc_factor(bulge: float) -> float:
+    """Arc length over chord length for a polyline segment with ``bulge``."""
+    if not bulge:
+        return 1.0
+    angle = 4 * math.atan(abs(bulge))
+    return (angle / 2) / math.sin(angle / 2)
+
+
+class _Polyline:
+    """Running length of an LWPOLYLINE, fed one vertex at a time."""
+
+    def __init__(self):
+        self.length = 0.0
+        self.first = None
+        self.last = None
+
+    def add(self, vertex):
+        if self.last is None:
+            self.first = vertex
+        else:
+            self.length += self._segment(self.last, vertex)
+        self.last = vertex
+
+    def close(self):
+        if self.first is not None and self.first is not self.last:
+            self.length += self._segment(self.last, self.first)
+
+    @staticmethod
+    def _segment(a, b):
+        return math.hypot(b[0] - a[0], b[1] - a[1]) * _arc_factor(a[2])
+
+
+_VERTEX_CODES = frozenset((10, 20, 42))
+
+
+class _Entity:
+    """Group values of one entity; only the last value of each code is kept."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.values = {}
+        self.polyline = _Polyline() if kind == 'LWPOLYLINE' else None
+        self.vertex = None
+
+    def feed_vertex(self, code, value):
+        if code == 10:
+            if self.vertex is not None:
+                self.polyline.add(self.vertex)
+            self.vertex = [float(value), 0.0, 0.0]
+        elif self.vertex is not None:
+            self.vertex[1 if code == 20 else 2] = float(value)
+
+    @property
+    def layer(self):
+        return self.values.get(8, b'0').decode('utf-8', 'replace')
+
+    def length(self, scale):
+        """Return ``(is_dimension, inches)``, or ``None`` if not measurable."""
+        v = self.values
+        if self.kind == 'LINE':
+            start = [float(v.get(c, 0)) for c in (10, 20, 30)]
+            end = [float(v.get(c, 0)) for c in (11, 21, 31)]
+            return False, math.dist(start, end) * scale
+        if self.kind == 'LWPOLYLINE':
+            if self.vertex is not None:
+                self.polyline.add(self.vertex)
+            if int(v.get(70, 0)) & 1:
+                self.polyline.close()
+            return False, self.polyline.length * scale
+        if int(v.get(70, 0)) & 7 not in _LINEAR_DIMENSIONS:
+            return None
+        text = v.get(1, b'').decode('utf-8', 'replace').strip()
+        if text and '<>' not in text:
+            try:
+                # The drawing shows this text instead of the measurement.
+                inches = parse_length(text)
+            except ValueError:
+                pass
+            else:
+                # A bare number is in drawing units, like the measurement.
+                return True, inches if _EXPLICIT_UNIT.search(text) else inches * scale
+        if 42 not in v:
+            return None
+        return True, float(v[42]) * scale
+
+
+def iter_lengths(path):
+    """Yield ``(layer, is_dimension, inches)`` for measurable entities."""
+    scale = 1.0
+    section = None
+    header_var = None
+    entity = None
+    values = None
+    vertices = False
+    groups = iter_groups(path)
+    for code, value in groups:
+        if code == 0:
+            if entity is not None:
+                measured = entity.length(scale)
+                if measured is not None:
+                    yield (entity.layer,) + measured
+                entity = values = None
+            if value == b'SECTION':
+                code, value = next(groups, (None, b''))
+                section = value.decode('ascii', 'replace') if code == 2 else None
+            elif value == b'ENDSEC':
+                section = None
+            elif section == 'ENTITIES' and value in (b'LINE', b'LWPOLYLINE', b'DIMENSION'):
+                entity = _Entity(value.decode('ascii'))
+                values = entity.values
+                vertices = entity.polyline is not None
+        elif values is not None:
+            if vertices and code in _VERTEX_CODES:
+                entity.feed_vertex(code, value)
+            else:
+                values[code] = value
+        elif section == 'HEADER':
+            if code == 9:
+                header_var = value
+            elif header_var == b'$INSUNITS' and code == 70:
+                scale = UNIT_INCHES.get(int(value), 1.0)
+
+
+def part_lengths(path, default_mark: str = '') -> dict:
+    """Return ``{mark: inches}`` with one cut length per part mark.
+
+    The mark is the layer name. Entities on layer ``0`` belong to
+    ``default_mark``.
+    """
+    dimensions = {}
+    geometry = {}
+    for layer, is_dimension, inches in iter_lengths(path):
+        mark = default_mark if layer == '0' else layer
+        target = dimensions if is_dimension else geometry
+        if inches > target.get(mark, 0.0):
+            target[mark] = inches
+    return {**geometry, **dimensions}
@@ -1,47 +1,286 @@
 """Drawing Parser module.
-Simulate parsing a drawing file and extracting cut lengths.
+Parse DXF drawing files and extract one cut length per part mark.
+
+:meth:`DrawingParser.process_pipelined` works through the backlog in
+chunks: files are parsed on a thread or process pool while the previous
+chunk is written, and every chunk is committed on its own.
+
+Parse results are cached in ``drawing_parse_cache`` by the SHA-256 of the
+file contents, so a drawing uploaded again under another name or attached
+to another job is not parsed twice.
 """
 
 import argparse
-import random
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from ...config.config import POOL
+from ...config.config import pooled
+from ..job_summary.main import add_parts
+from .dxf import part_lengths
+
+# Drawings fetched, parsed and committed together by process_pipelined.
+CHUNK_SIZE = 200
+
+# Bump when parse_drawing_file changes its results, so cached lengths from
+# older versions are parsed again.
+PARSER_VERSION = 1
+
+
+def parse_drawing_file(path: str) -> list:
+    """Return the cut lengths, in whole inches, of the parts drawn in ``path``.
+
+    Raises
+    ------
+    ValueError
+        If the file is not an ASCII DXF drawing or has no measurable parts.
+    """
+    if not path.lower().endswith(".dxf"):
+        raise ValueError(f"{path}: unsupported drawing format")
+    lengths = part_lengths(path, Path(path).stem)
+    if not lengths:
+        raise ValueError(f"{path}: no part lengths found")
+    # cut_parts stores whole inches, so round to the nearest one.
+    return [int(inches + 0.5) for _, inches in sorted(lengths.items())]
+
+
+def file_digest(path: str):
+    """Return the SHA-256 hex digest of the file at ``path``, or ``None`` if unreadable."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1024 * 1024), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _part_totals(parts) -> dict:
+    """Return ``{job_id: (count, inches)}`` for ``(length, job_id)`` rows."""
+    totals = {}
+    for length, job_id in parts:
+        count, inches = totals.get(job_id, (0, 0))
+        totals[job_id] = (count + 1, inches + length)
+    return totals
 
 
 class DrawingParser:
-    def __init__(self, drawings_dir: str = "./drawings"):
+    def __init__(self, drawings_dir: str = "./drawings", cnx=None):
         self.drawings_dir = Path(drawings_dir)
-        self.cnx = POOL.get_connection()
+        self.cnx = cnx
 
-    def parse_drawing(self, filename: str) -> int:
-        """Mock parse the drawing and return a random cut length in inches."""
-        # Real implementation would open PDF/DXF and parse geometry
-        return random.randint(10, 240)
+    def parse_drawing(self, filename: str) -> list:
+        """Parse a drawing and return its cut lengths in inches."""
+        return parse_drawing_file(str(self.drawings_dir / filename))
 
-    def process_unparsed_drawings(self):
+    @pooled
+    def process_unparsed_drawings(self) -> dict:
+        """Parse every unparsed drawing, commit once and return counts.
+
+        The parse cache is queried once per :data:`CHUNK_SIZE` drawings.
+        Drawings that fail to parse stay unparsed and are flagged for
+        review; the rest of the backlog is still processed.
+        """
+        stats = {"parsed": 0, "failed": 0, "cache_hits": 0, "cache_misses": 0}
+        parts = []
+        parsed = []
+        failed = []
+        fresh = {}
+        cursor = self.cnx.cursor()
+        try:
+            cursor.execute("SELECT id, filename, job_id FROM drawings WHERE parsed=0")
+            rows = cursor.fetchall()
+            for start in range(0, len(rows), CHUNK_SIZE):
+                chunk = rows[start:start + CHUNK_SIZE]
+                digests = [file_digest(str(self.drawings_dir / fname)) for _, fname, _ in chunk]
+                cached = self._cached_lengths(cursor, {d for d in digests if d})
+                for (drawing_id, fname, job_id), digest in zip(chunk, digests):
+                    lengths = cached.get(digest)
+                    if lengths is None and digest:
+                        lengths = fresh.get(digest)
+                    if lengths is not None:
+                        stats["cache_hits"] += 1
+                    else:
+                        stats["cache_misses"] += 1
+                        try:
+                            lengths = self.parse_drawing(fname)
+                        except (OSError, ValueError):
+                            failed.append(drawing_id)
+                            continue
+                        if digest:
+                            fresh[digest] = lengths
+                    parts.extend((length, job_id) for length in lengths)
+                    parsed.append(drawing_id)
+            self._store_results(cursor, parts, fresh, parsed, failed)
+            self.cnx.commit()
+        except Exception:
+            self.cnx.rollback()
+            raise
+        finally:
+            cursor.close()
+        stats["parsed"] = len(parsed)
+        stats["failed"] = len(failed)
+        return stats
+
+    @pooled
+    def process_pipelined(self, chunk_size: int = CHUNK_SIZE, workers: int = None,
+                          processes: bool = False) -> dict:
+        """Parse all unparsed drawings chunk by chunk and return counts.
+
+        Chunks are read in ``id`` order. A chunk's files are hashed and
+        looked up in the parse cache. Files not found there are parsed on a
+        pool of ``workers`` threads, or processes if ``processes`` is set,
+        while the previous chunk's ``cut_parts`` are bulk-inserted. Each
+        chunk is marked parsed with one ``UPDATE`` and committed on its own,
+        so a crash only loses the chunk in flight. Drawings whose file fails
+        to parse stay unparsed and are flagged for review.
+        """
+        if processes:
+            from concurrent.futures import ProcessPoolExecutor
+
+            pool = ProcessPoolExecutor(max_workers=workers)
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers)
+        stats = {"chunks": 0, "parsed": 0, "failed": 0, "parts": 0,
+                 "cache_hits": 0, "cache_misses": 0}
         cursor = self.cnx.cursor()
-        cursor.execute("SELECT id, filename FROM drawings WHERE parsed=0")
-        for drawing_id, fname in cursor.fetchall():
-            length = self.parse_drawing(fname)
-            cursor.execute(
-                "INSERT INTO cut_parts (part_length_inches, job_id) "
-                "SELECT %s, job_id FROM drawings WHERE id=%s",
-                (length, drawing_id),
+        try:
+            last_id = 0
+            pending = None
+            while True:
+                cursor.execute(
+                    "SELECT id, filename, job_id FROM drawings "
+                    "WHERE parsed=0 AND id>%s ORDER BY id LIMIT %s",
+                    (last_id, chunk_size),
+                )
+                rows = cursor.fetchall()
+                submitted = self._submit_chunk(cursor, pool, rows, stats)
+                if pending:
+                    self._write_chunk(cursor, pending, stats)
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                pending = submitted
+        finally:
+            cursor.close()
+            pool.shutdown(wait=True, cancel_futures=True)
+        return stats
+
+    def _submit_chunk(self, cursor, pool, rows, stats: dict) -> list:
+        """Return ``(drawing_id, job_id, digest, lengths or future)`` per row."""
+        paths = [str(self.drawings_dir / fname) for _, fname, _ in rows]
+        digests = list(pool.map(file_digest, paths))
+        cached = self._cached_lengths(cursor, {d for d in digests if d})
+        parses = {}
+        submitted = []
+        for (drawing_id, _, job_id), path, digest in zip(rows, paths, digests):
+            result = cached.get(digest)
+            if result is None:
+                # Copies of one file within the chunk are parsed once.
+                key = digest or path
+                result = parses.get(key)
+                if result is None:
+                    result = parses[key] = pool.submit(parse_drawing_file, path)
+                    stats["cache_misses"] += 1
+                else:
+                    stats["cache_hits"] += 1
+            else:
+                stats["cache_hits"] += 1
+            submitted.append((drawing_id, job_id, digest, result))
+        return submitted
+
+    def _cached_lengths(self, cursor, digests) -> dict:
+        """Return ``{digest: lengths}`` for the ``digests`` found in the cache."""
+        if not digests:
+            return {}
+        digests = list(digests)
+        marks = ", ".join(["%s"] * len(digests))
+        cursor.execute(
+            "SELECT content_hash, lengths FROM drawing_parse_cache "
+            f"WHERE parser_version=%s AND content_hash IN ({marks})",
+            [PARSER_VERSION] + digests,
+        )
+        return {digest: json.loads(lengths) for digest, lengths in cursor.fetchall()}
+
+    def _cache_lengths(self, cursor, results: dict) -> None:
+        """Store ``{digest: lengths}``; committed with the caller's transaction."""
+        if results:
+            cursor.executemany(
+                "INSERT INTO drawing_parse_cache (content_hash, parser_version, lengths) "
+                "VALUES (%s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE parser_version=VALUES(parser_version), "
+                "lengths=VALUES(lengths)",
+                [(digest, PARSER_VERSION, json.dumps(lengths))
+                 for digest, lengths in results.items()],
             )
-            cursor.execute("UPDATE drawings SET parsed=1 WHERE id=%s", (drawing_id,))
-        self.cnx.commit()
-        cursor.close()
+
+    def _store_results(self, cursor, parts, fresh: dict, parsed, failed) -> None:
+        """Insert ``(length, job_id)`` parts, cache ``fresh`` and mark the drawings."""
+        if parts:
+            cursor.executemany(
+                "INSERT INTO cut_parts (part_length_inches, job_id) VALUES (%s, %s)",
+                parts,
+            )
+            add_parts(cursor, _part_totals(parts))
+        self._cache_lengths(cursor, fresh)
+        for ids, assignment in ((parsed, "parsed=1"), (failed, "flagged=1")):
+            for start in range(0, len(ids), CHUNK_SIZE):
+                batch = ids[start:start + CHUNK_SIZE]
+                marks = ", ".join(["%s"] * len(batch))
+                cursor.execute(
+                    f"UPDATE drawings SET {assignment} WHERE id IN ({marks})", batch
+                )
+
+    def _write_chunk(self, cursor, submitted, stats: dict) -> None:
+        parts = []
+        parsed = []
+        failed = []
+        fresh = {}
+        for drawing_id, job_id, digest, result in submitted:
+            if isinstance(result, list):
+                lengths = result
+            else:
+                try:
+                    lengths = result.result()
+                except Exception:
+                    failed.append(drawing_id)
+                    continue
+                if digest:
+                    fresh[digest] = lengths
+            parts.extend((length, job_id) for length in lengths)
+            parsed.append(drawing_id)
+        try:
+            self._store_results(cursor, parts, fresh, parsed, failed)
+            self.cnx.commit()
+        except Exception:
+            self.cnx.rollback()
+            raise
+        stats["chunks"] += 1
+        stats["parsed"] += len(parsed)
+        stats["failed"] += len(failed)
+        stats["parts"] += len(parts)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Drawing Parser test harness")
     parser.add_argument("--process", action="store_true", help="Process drawings")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Process drawings in chunks on a worker pool")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="Drawings per chunk in pipeline mode")
+    parser.add_argument("--workers", type=int, help="Parser threads or processes")
+    parser.add_argument("--processes", action="store_true",
+                        help="Parse on processes instead of threads")
     args = parser.parse_args()
 
     parser_obj = DrawingParser()
-    if args.process:
-        parser_obj.process_unparsed_drawings()
-        print("Processed drawings.")
+    if args.pipeline:
+        stats = parser_obj.process_pipelined(args.chunk_size, args.workers, args.processes)
+        print("Processed drawings:", stats)
+    elif args.process:
+        stats = parser_obj.process_unparsed_drawings()
+        print("Processed drawings:", stats)
     else:
-        print("Nothing to do. Use --process to parse drawings.")
+        print("Nothing to do. Use --process or --pipeline to parse drawings.")
@@ -5,13 +5,14 @@ Returns lists of available stock and remnants.
 import argparse
 from typing import List, Tuple
 
-from ...config.config import POOL
+from ...config.config import pooled
 
 
 class InventoryManager:
-    def __init__(self):
-        self.cnx = POOL.get_connection()
+    def __init__(self, cnx=None):
+        self.cnx = cnx
 
+    @pooled
     def get_stock(self, include_remnants: bool = True) -> List[Tuple]:
         cursor = self.cnx.cursor()
         if include_remnants:
@@ -0,0 +1,151 @@
+"""Job Summary module.
+Keeps one ``job_summary`` row per job with its part, assignment, stock,
+remnant and scrap totals. Dashboards and reports can then read totals
+without scanning ``cut_parts``.
+
+The modules that write parts or assignments update the row in the same
+transaction as their own writes. They use :func:`add_parts` and
+:func:`set_assignment_totals`. :meth:`JobSummary.reconcile` rebuilds every
+row from the base tables and reports any drift it corrected.
+"""
+
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+from ...config.config import pooled
+from ..report_engine.main import ReportEngine
+
+COLUMNS = (
+    "part_count", "total_inches", "assigned_count", "used_inches",
+    "stock_inches", "remnant_count", "remnant_inches", "scrap_inches",
+)
+
+# jobs_report() keys for each summary column.
+_REPORT_KEYS = dict(zip(COLUMNS, (
+    "pieces", "total_inches", "assigned", "used_inches",
+    "stock_inches", "remnants", "remnant_inches", "scrap_inches",
+)))
+
+
+def add_parts(cursor, totals: Dict[int, Tuple[int, int]]) -> None:
+    """Add ``{job_id: (parts, inches)}`` for newly inserted cut parts."""
+    rows = [(job_id, count, inches) for job_id, (count, inches) in totals.items()
+            if job_id is not None]
+    if rows:
+        cursor.executemany(
+            "INSERT INTO job_summary (job_id, part_count, total_inches) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE part_count=part_count+VALUES(part_count), "
+            "total_inches=total_inches+VALUES(total_inches)",
+            rows,
+        )
+
+
+def set_assignment_totals(cursor, totals: Dict[int, dict], remnants: bool = True) -> None:
+    """Replace the assignment columns of the jobs in ``totals``.
+
+    Each value holds ``assigned_count``, ``used_inches`` and
+    ``stock_inches``, plus ``remnant_count`` and ``remnant_inches`` unless
+    ``remnants`` is false, in which case the stored remnant columns are
+    kept. Scrap is derived from them.
+    """
+    columns = ["assigned_count", "used_inches", "stock_inches"]
+    if remnants:
+        columns += ["remnant_count", "remnant_inches"]
+    rows = []
+    for job_id, t in totals.items():
+        if job_id is None:
+            continue
+        rows.append((job_id,) + tuple(t[c] for c in columns)
+                    + (t["stock_inches"] - t["used_inches"] - t.get("remnant_inches", 0),))
+    if rows:
+        updates = ", ".join(f"{c}=VALUES({c})" for c in columns)
+        # Scrap is spelled out from the new totals and, without remnants,
+        # the stored remnant inches, so it does not depend on the order the
+        # assignments are applied in.
+        remnant = "VALUES(remnant_inches)" if remnants else "remnant_inches"
+        cursor.executemany(
+            f"INSERT INTO job_summary (job_id, {', '.join(columns)}, scrap_inches) "
+            f"VALUES ({', '.join(['%s'] * (len(columns) + 2))}) "
+            f"ON DUPLICATE KEY UPDATE {updates}, "
+            f"scrap_inches=VALUES(stock_inches)-VALUES(used_inches)-{remnant}",
+            rows,
+        )
+
+
+class JobSummary:
+    def __init__(self, cnx=None):
+        self.cnx = cnx
+
+    @pooled
+    def get(self, job_ids: Optional[List[int]] = None) -> Dict[int, dict]:
+        """Return ``{job_id: {column: value}}`` as stored."""
+        sql = f"SELECT job_id, {', '.join(COLUMNS)} FROM job_summary"
+        params = []
+        if job_ids is not None:
+            if not job_ids:
+                return {}
+            sql += f" WHERE job_id IN ({', '.join(['%s'] * len(job_ids))})"
+            params = list(job_ids)
+        cursor = self.cnx.cursor()
+        try:
+            cursor.execute(sql, params)
+            return {row[0]: dict(zip(COLUMNS, row[1:])) for row in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+    @pooled
+    def reconcile(self, fix: bool = True) -> List[Tuple[int, str, int, int]]:
+        """Compare every stored row with the base tables.
+
+        Returns ``(job_id, column, stored, actual)`` for every difference.
+        A missing row is reported with ``stored`` of ``None``. With
+        ``fix`` the table is rebuilt from scratch in one transaction.
+        """
+        actual = {
+            row["job_id"]: {column: row[key] for column, key in _REPORT_KEYS.items()}
+            for row in ReportEngine(cnx=self.cnx).jobs_report()
+        }
+        stored = self.get()
+        drift = []
+        for job_id in sorted(set(actual) | set(stored)):
+            want = actual.get(job_id, dict.fromkeys(COLUMNS, 0))
+            have = stored.get(job_id)
+            for column in COLUMNS:
+                value = None if have is None else have[column]
+                if value != want[column]:
+                    drift.append((job_id, column, value, want[column]))
+        if fix:
+            cursor = self.cnx.cursor()
+            try:
+                cursor.execute("DELETE FROM job_summary")
+                cursor.executemany(
+                    f"INSERT INTO job_summary (job_id, {', '.join(COLUMNS)}) "
+                    f"VALUES ({', '.join(['%s'] * (len(COLUMNS) + 1))})",
+                    [(job_id,) + tuple(row[c] for c in COLUMNS) for job_id, row in actual.items()],
+                )
+                self.cnx.commit()
+            except Exception:
+                self.cnx.rollback()
+                raise
+            finally:
+                cursor.close()
+        return drift
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Job Summary test harness")
+    parser.add_argument("--reconcile", action="store_true",
+                        help="Rebuild job_summary from cut_parts and materials")
+    parser.add_argument("--check", action="store_true",
+                        help="Only report drift, do not rebuild")
+    args = parser.parse_args()
+
+    summary = JobSummary()
+    if args.reconcile or args.check:
+        drift = summary.reconcile(fix=not args.check)
+        for job_id, column, stored, actual in drift:
+            print(f"Job {job_id} {column}: stored {stored}, actual {actual}")
+        print(f"{len(drift)} differences" + ("" if args.check else ", table rebuilt"))
+    else:
+        for job_id, row in sorted(summary.get().items()):
+            print(job_id, row)
@@ -1,28 +1,38 @@
 """Job Tracker module.
-Create and list jobs in the system.
+Create and list jobs in the system. Listings carry each job's totals from
+``job_summary``.
 """
 
 import argparse
 from typing import List, Tuple
 
-from ...config.config import POOL
+from ...config.config import pooled
 
 
 class JobTracker:
-    def __init__(self):
-        self.cnx = POOL.get_connection()
+    def __init__(self, cnx=None):
+        self.cnx = cnx
 
+    @pooled
     def create_job(self, name: str) -> int:
         cursor = self.cnx.cursor()
         cursor.execute("INSERT INTO jobs (name) VALUES (%s)", (name,))
-        self.cnx.commit()
+        # Read it before the next insert, which resets it.
         job_id = cursor.lastrowid
+        cursor.execute("INSERT INTO job_summary (job_id) VALUES (%s)", (job_id,))
+        self.cnx.commit()
         cursor.close()
         return job_id
 
+    @pooled
     def list_jobs(self) -> List[Tuple]:
+        """Return ``(id, name, created_at, part_count, total_inches, scrap_inches)`` rows."""
         cursor = self.cnx.cursor()
-        cursor.execute("SELECT id, name, created_at FROM jobs")
+        cursor.execute(
+            "SELECT j.id, j.name, j.created_at, COALESCE(s.part_count, 0), "
+            "COALESCE(s.total_inches, 0), COALESCE(s.scrap_inches, 0) "
+            "FROM jobs j LEFT JOIN job_summary s ON s.job_id=j.id ORDER BY j.id"
+        )
         rows = cursor.fetchall()
         cursor.close()
         return rows
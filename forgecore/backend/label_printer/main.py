@@ -1,16 +1,29 @@
 """Label Printer module.
-Simulates printing labels for cut parts.
+Prints labels for cut parts.
+
+:meth:`LabelPrinter.write_labels` renders a whole job into one
+print-ready PDF or ZPL file. Parts are streamed from an unbuffered cursor
+in stick order and each label is written as soon as it is read, so memory
+use does not depend on the size of the job.
 """
 
 import argparse
+import sys
+
+from common.lengths import format_length
+
+from ...config.config import pooled
+from .render import WRITERS
 
-from ...config.config import POOL
+# Rows pulled from the server per round trip while streaming labels.
+FETCH_SIZE = 1000
 
 
 class LabelPrinter:
-    def __init__(self):
-        self.cnx = POOL.get_connection()
+    def __init__(self, cnx=None):
+        self.cnx = cnx
 
+    @pooled
     def print_labels_for_job(self, job_id: int):
         cursor = self.cnx.cursor()
         cursor.execute("SELECT id, part_length_inches FROM cut_parts WHERE job_id=%s", (job_id,))
@@ -18,11 +31,73 @@ class LabelPrinter:
             print(f"Printing label for part {part_id} - {length} in")
         cursor.close()
 
+    @pooled
+    def iter_labels(self, job_id: int):
+        """Yield ``(title, lines)`` for every part of the job in stick order.
+
+        Sticks come in ``material_id`` order, each with its parts longest
+        first, the order they are cut in. Unassigned parts come last.
+        """
+        # Unbuffered, so rows stay on the server until fetched.
+        cursor = self.cnx.cursor(buffered=False)
+        try:
+            cursor.execute(
+                "SELECT c.id, c.part_length_inches, c.material_id, m.length_inches, m.is_remnant "
+                "FROM cut_parts c LEFT JOIN materials m ON m.id=c.material_id "
+                "WHERE c.job_id=%s "
+                "ORDER BY c.material_id IS NULL, c.material_id, c.part_length_inches DESC, c.id",
+                (job_id,),
+            )
+            stick = 0
+            current = None
+            cut = 0
+            while True:
+                rows = cursor.fetchmany(FETCH_SIZE)
+                if not rows:
+                    break
+                for part_id, length, material_id, stock_length, is_remnant in rows:
+                    lines = [f"Job {job_id}   Part {part_id}"]
+                    if material_id is None:
+                        lines.append("Unassigned")
+                    else:
+                        if material_id != current:
+                            current = material_id
+                            stick += 1
+                            cut = 0
+                        cut += 1
+                        kind = "Remnant" if is_remnant else "Stick"
+                        lines.append(f"{kind} {stick} (#{material_id}, "
+                                     f"{format_length(stock_length)})   Cut {cut}")
+                    yield format_length(length), lines
+        finally:
+            cursor.close()
+
+    @pooled
+    def write_labels(self, job_id: int, out, fmt: str = "pdf") -> int:
+        """Write the job's labels to the binary stream ``out``; return the count."""
+        if fmt not in WRITERS:
+            raise ValueError(f"Unknown label format '{fmt}'")
+        writer = WRITERS[fmt](out)
+        for title, lines in self.iter_labels(job_id):
+            writer.add(title, lines)
+        writer.close()
+        return writer.pages
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Label Printer test harness")
     parser.add_argument("job_id", type=int, help="Job ID to print labels for")
+    parser.add_argument("--out", help="Write every label to this file ('-' for stdout)")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="pdf",
+                        help="Label file format")
     args = parser.parse_args()
 
     printer = LabelPrinter()
-    printer.print_labels_for_job(args.job_id)
+    if args.out == "-":
+        printer.write_labels(args.job_id, sys.stdout.buffer, args.format)
+    elif args.out:
+        with open(args.out, "wb") as out:
+            count = printer.write_labels(args.job_id, out, args.format)
+        print(f"Wrote {count} labels to {args.out}")
+    else:
+        printer.print_labels_for_job(args.job_id)
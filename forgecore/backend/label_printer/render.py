@@ -0,0 +1,138 @@
+"""Incremental label writers for print-ready PDF and ZPL output.
+
+Both writers take one label at a time and write it to a binary stream
+straight away, so memory use does not grow with the number of labels.
+
+:class:`PDFLabelWriter` writes a PDF with one page per label. Each page
+is written as soon as it is added. Only the byte offset of every object is
+kept until :meth:`PDFLabelWriter.close` writes the cross-reference table.
+It uses the standard Helvetica fonts, so no font data is embedded.
+:class:`ZPLLabelWriter` writes one ``^XA ... ^XZ`` block per label for
+Zebra printers.
+"""
+
+from array import array
+
+# Label size in points: 4 x 2 inch thermal stock.
+LABEL_WIDTH = 288
+LABEL_HEIGHT = 144
+
+# ZPL dots per inch of the target printer.
+ZPL_DPI = 203
+
+_MARGIN = 14
+_FONTS = {"F1": b"Helvetica", "F2": b"Helvetica-Bold"}
+# Catalog, page tree, then one object per font; pages follow.
+_FIRST_PAGE_OBJ = 3 + len(_FONTS)
+
+
+def _pdf_string(text: str) -> bytes:
+    data = text.encode("latin-1", "replace")
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+class PDFLabelWriter:
+    """Write labels to ``out`` as pages of a PDF, one label per page."""
+
+    def __init__(self, out, width: float = LABEL_WIDTH, height: float = LABEL_HEIGHT):
+        self.out = out
+        self.width = width
+        self.height = height
+        self.pages = 0
+        self._offsets = array("Q")
+        self._pos = 0
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        for number, name in enumerate(_FONTS.values(), 3):
+            self._object(
+                number,
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /" + name
+                + b" /Encoding /WinAnsiEncoding >>",
+            )
+
+    def _write(self, data: bytes) -> None:
+        self.out.write(data)
+        self._pos += len(data)
+
+    def _object(self, number: int, body: bytes) -> None:
+        # Objects are numbered in write order, except the page tree (2),
+        # which close() writes once the page count is known.
+        self._offsets.append(self._pos)
+        self._write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    def add(self, title: str, lines=()) -> None:
+        """Add a page with ``title`` in large bold type over ``lines``."""
+        ops = [b"BT /F2 28 Tf %d %d Td " % (_MARGIN, self.height - _MARGIN - 24)
+               + _pdf_string(title) + b" Tj ET"]
+        y = self.height - _MARGIN - 52
+        for line in lines:
+            ops.append(b"BT /F1 11 Tf %d %d Td " % (_MARGIN, y) + _pdf_string(line) + b" Tj ET")
+            y -= 15
+        content = b"\n".join(ops)
+        contents = _FIRST_PAGE_OBJ + 2 * self.pages
+        self._object(contents, b"<< /Length %d >>\nstream\n" % len(content)
+                     + content + b"\nendstream")
+        fonts = b" ".join(b"/%s %d 0 R" % (key.encode(), number)
+                          for number, key in enumerate(_FONTS, 3))
+        self._object(
+            contents + 1,
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+            b"/Resources << /Font << %s >> >> >>" % (self.width, self.height, contents, fonts),
+        )
+        self.pages += 1
+
+    def close(self) -> None:
+        """Write the page tree, cross-reference table and trailer."""
+        # Page objects are numbered predictably, so the kids list is not kept.
+        pages_offset = self._pos
+        self._write(b"2 0 obj\n<< /Type /Pages /Count %d /Kids [" % self.pages)
+        for start in range(0, self.pages, 1024):
+            self._write(b"".join(b"%d 0 R " % (_FIRST_PAGE_OBJ + 2 * i + 1)
+                                 for i in range(start, min(start + 1024, self.pages))))
+        self._write(b"] >>\nendobj\n")
+        xref = self._pos
+        count = len(self._offsets) + 2
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % count)
+        self._write(b"%010d 00000 n \n" % self._offsets[0])
+        self._write(b"%010d 00000 n \n" % pages_offset)
+        for start in range(1, len(self._offsets), 1024):
+            self._write(b"".join(b"%010d 00000 n \n" % offset
+                                 for offset in self._offsets[start:start + 1024]))
+        self._write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (count, xref))
+
+
+class ZPLLabelWriter:
+    """Write labels to ``out`` as ZPL, one ``^XA ... ^XZ`` block per label."""
+
+    def __init__(self, out, dpi: int = ZPL_DPI):
+        self.out = out
+        self.dpi = dpi
+        self.pages = 0
+
+    @staticmethod
+    def _field(text: str) -> bytes:
+        # ^ and ~ start commands; drop them from field data.
+        return text.replace("^", " ").replace("~", " ").encode("latin-1", "replace")
+
+    def add(self, title: str, lines=()) -> None:
+        margin = self.dpi * _MARGIN // 72
+        label = [b"^XA^PW%d^LL%d" % (self.dpi * LABEL_WIDTH // 72, self.dpi * LABEL_HEIGHT // 72),
+                 b"^FO%d,%d^A0N,%d,%d^FD" % (margin, margin, self.dpi * 28 // 72,
+                                             self.dpi * 28 // 72)
+                 + self._field(title) + b"^FS"]
+        y = margin + self.dpi * 40 // 72
+        for line in lines:
+            label.append(b"^FO%d,%d^A0N,%d,%d^FD" % (margin, y, self.dpi * 11 // 72,
+                                                     self.dpi * 11 // 72)
+                         + self._field(line) + b"^FS")
+            y += self.dpi * 15 // 72
+        label.append(b"^XZ\n")
+        self.out.write(b"".join(label))
+        self.pages += 1
+
+    def close(self) -> None:
+        pass
+
+
+WRITERS = {"pdf": PDFLabelWriter, "zpl": ZPLLabelWriter}
@@ -1,31 +1,165 @@
 """Report Engine module.
-Generates simple job reports.
+Generates job reports. Totals are aggregated in SQL, so a report over
+hundreds of jobs costs a few grouped queries instead of a scan per job.
+:meth:`ReportEngine.summary_report` reads the same totals from the
+``job_summary`` table without touching ``cut_parts`` at all.
 """
 
 import argparse
+from typing import Iterable, List, Optional
 
-from ...config.config import POOL
+from ...config.config import pooled
+
+# materials.source of remnants written back by the cutlist optimizer.
+OFFCUT_SOURCE = "offcut"
+
+
+def _job_filter(column: str, job_ids: Optional[List[int]], prefix: str = "WHERE"):
+    if job_ids is None:
+        return "", []
+    marks = ", ".join(["%s"] * len(job_ids))
+    return f" {prefix} {column} IN ({marks})", list(job_ids)
 
 
 class ReportEngine:
-    def __init__(self):
-        self.cnx = POOL.get_connection()
+    def __init__(self, cnx=None):
+        self.cnx = cnx
 
+    @pooled
     def job_report(self, job_id: int):
         cursor = self.cnx.cursor()
         cursor.execute(
-            "SELECT part_length_inches FROM cut_parts WHERE job_id=%s", (job_id,)
+            "SELECT COALESCE(SUM(part_length_inches), 0) FROM cut_parts WHERE job_id=%s",
+            (job_id,),
         )
-        lengths = [row[0] for row in cursor.fetchall()]
+        total = cursor.fetchone()[0]
         cursor.close()
-        total = sum(lengths)
         print(f"Job {job_id} total inches: {total}")
 
+    @pooled
+    def jobs_report(self, job_ids: Optional[Iterable[int]] = None) -> List[dict]:
+        """Return one summary dict per job, for ``job_ids`` or every job.
+
+        Each summary has the job's ``pieces`` and ``total_inches``, how
+        many pieces are ``assigned`` to material, the ``stock_inches`` of
+        the materials they are cut from, the ``remnants`` and
+        ``remnant_inches`` written back as offcuts, and the ``scrap_inches``
+        and ``scrap_pct`` left over.
+        """
+        job_ids = None if job_ids is None else sorted(set(job_ids))
+        if job_ids == []:
+            return []
+        cursor = self.cnx.cursor()
+        where, params = _job_filter("id", job_ids)
+        cursor.execute(f"SELECT id, name FROM jobs{where} ORDER BY id", params)
+        report = {
+            job_id: {
+                "job_id": job_id, "name": name,
+                "pieces": 0, "total_inches": 0, "assigned": 0, "used_inches": 0,
+                "stock_inches": 0, "remnants": 0, "remnant_inches": 0,
+            }
+            for job_id, name in cursor.fetchall()
+        }
+
+        where, params = _job_filter("job_id", job_ids)
+        cursor.execute(
+            "SELECT job_id, COUNT(*), SUM(part_length_inches), COUNT(material_id), "
+            "SUM(CASE WHEN material_id IS NULL THEN 0 ELSE part_length_inches END) "
+            f"FROM cut_parts{where} GROUP BY job_id",
+            params,
+        )
+        for job_id, pieces, total, assigned, used in cursor.fetchall():
+            if job_id in report:
+                report[job_id].update(
+                    pieces=pieces, total_inches=int(total or 0),
+                    assigned=assigned, used_inches=int(used or 0),
+                )
+
+        # A stick counts once per job however many of its parts it holds.
+        where, params = _job_filter("job_id", job_ids, "AND")
+        cursor.execute(
+            "SELECT u.job_id, SUM(m.length_inches) FROM "
+            "(SELECT DISTINCT job_id, material_id FROM cut_parts "
+            f"WHERE material_id IS NOT NULL{where}) u "
+            "JOIN materials m ON m.id=u.material_id GROUP BY u.job_id",
+            params,
+        )
+        for job_id, stock in cursor.fetchall():
+            if job_id in report:
+                report[job_id]["stock_inches"] = int(stock or 0)
+
+        cursor.execute(
+            "SELECT job_id, COUNT(*), SUM(length_inches) FROM materials "
+            f"WHERE is_remnant=1 AND source=%s{where} GROUP BY job_id",
+            [OFFCUT_SOURCE] + params,
+        )
+        for job_id, count, inches in cursor.fetchall():
+            if job_id in report:
+                report[job_id].update(remnants=count, remnant_inches=int(inches or 0))
+        cursor.close()
+
+        for row in report.values():
+            stock = row["stock_inches"]
+            # Offcuts went back to inventory, so they are not scrap.
+            row["scrap_inches"] = stock - row["used_inches"] - row["remnant_inches"]
+            row["scrap_pct"] = row["scrap_inches"] / stock * 100 if stock else 0.0
+        return list(report.values())
+
+    @pooled
+    def summary_report(self, job_ids: Optional[Iterable[int]] = None) -> List[dict]:
+        """Return :meth:`jobs_report` rows from the stored ``job_summary`` totals.
+
+        Jobs without a summary row report zeros.
+        """
+        job_ids = None if job_ids is None else sorted(set(job_ids))
+        if job_ids == []:
+            return []
+        cursor = self.cnx.cursor()
+        where, params = _job_filter("j.id", job_ids)
+        cursor.execute(
+            "SELECT j.id, j.name, COALESCE(s.part_count, 0), COALESCE(s.total_inches, 0), "
+            "COALESCE(s.assigned_count, 0), COALESCE(s.used_inches, 0), "
+            "COALESCE(s.stock_inches, 0), COALESCE(s.remnant_count, 0), "
+            "COALESCE(s.remnant_inches, 0), COALESCE(s.scrap_inches, 0) "
+            f"FROM jobs j LEFT JOIN job_summary s ON s.job_id=j.id{where} ORDER BY j.id",
+            params,
+        )
+        keys = ("job_id", "name", "pieces", "total_inches", "assigned", "used_inches",
+                "stock_inches", "remnants", "remnant_inches", "scrap_inches")
+        report = [dict(zip(keys, row)) for row in cursor.fetchall()]
+        cursor.close()
+        for row in report:
+            stock = row["stock_inches"]
+            row["scrap_pct"] = row["scrap_inches"] / stock * 100 if stock else 0.0
+        return report
+
+    @pooled
+    def print_jobs_report(self, job_ids: Optional[Iterable[int]] = None,
+                          stored: bool = False):
+        rows = (self.summary_report if stored else self.jobs_report)(job_ids)
+        print(f"{'Job':>6}  {'Name':<24} {'Pieces':>8} {'Inches':>10} {'Stock':>10} "
+              f"{'Remnant':>9} {'Scrap':>9} {'Scrap %':>8}")
+        for row in rows:
+            print(f"{row['job_id']:>6}  {row['name'][:24]:<24} {row['pieces']:>8} "
+                  f"{row['total_inches']:>10} {row['stock_inches']:>10} "
+                  f"{row['remnant_inches']:>9} {row['scrap_inches']:>9} "
+                  f"{row['scrap_pct']:>7.1f}%")
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Report Engine test harness")
-    parser.add_argument("job_id", type=int, help="Job ID to report on")
+    parser.add_argument("job_id", type=int, nargs="*",
+                        help="Job IDs to report on (all jobs if omitted with --summary)")
+    parser.add_argument("--summary", action="store_true",
+                        help="Print the aggregated multi-job report")
+    parser.add_argument("--stored", action="store_true",
+                        help="With --summary, read totals from job_summary")
     args = parser.parse_args()
 
     engine = ReportEngine()
-    engine.job_report(args.job_id)
+    if args.summary:
+        engine.print_jobs_report(args.job_id or None, stored=args.stored)
+    elif len(args.job_id) == 1:
+        engine.job_report(args.job_id[0])
+    else:
+        parser.error("give one job ID, or use --summary for several")
@@ -4,12 +4,10 @@ Placeholder for visualizing cut plans.
 
 import argparse
 
-from ...config.config import POOL
-
 
 class VisualDebugger:
-    def __init__(self):
-        self.cnx = POOL.get_connection()
+    def __init__(self, cnx=None):
+        self.cnx = cnx
 
     def show_latest_plan(self):
         print("Showing latest cut plan... (placeholder)")
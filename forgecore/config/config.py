@@ -1,19 +1,199 @@
-"""Configuration and database connector for ForgeCore."""
+"""Configuration and database connector for ForgeCore.
 
+The connection pool is created on first use rather than at import, so
+importing a backend module neither loads the MySQL driver nor needs a
+reachable database.
+
+Connections are checked out for one operation at a time with
+``with POOL.connection() as cnx:`` and go back to the pool when the block
+ends. Methods decorated with :func:`pooled` do this for ``self.cnx``.
+``FORGECORE_POOL_SIZE`` sets how many connections the pool holds. A
+checkout waits up to ``FORGECORE_POOL_TIMEOUT`` seconds for a free one and
+then raises :class:`PoolExhausted`. Wait times, connections in use and
+exhaustions are published as ``forgecore_pool_*`` metrics in
+:data:`forgecore.config.metrics.REGISTRY`.
+"""
+
+import functools
+import inspect
 import os
-from mysql.connector import pooling
+import threading
+import time
+from contextlib import contextmanager
+
+from .metrics import REGISTRY
+
+
+def _env_number(name: str, default, cast=int):
+    """Return ``cast(os.environ[name])``, or ``default`` if unset or invalid."""
+    try:
+        return cast(os.environ[name])
+    except (KeyError, ValueError):
+        return default
+
+
+# mysql.connector pools hold at most 32 connections.
+MAX_POOL_SIZE = 32
+
+
+def _env_pool_settings(size: int = 5, timeout: float = 30.0):
+    """Return ``(size, timeout)`` from the environment, or the defaults.
+
+    Sizes outside ``1..MAX_POOL_SIZE`` and timeouts that are not positive
+    fall back to the defaults too.
+    """
+    env_size = _env_number("FORGECORE_POOL_SIZE", size)
+    env_timeout = _env_number("FORGECORE_POOL_TIMEOUT", timeout, float)
+    return (env_size if 1 <= env_size <= MAX_POOL_SIZE else size,
+            env_timeout if env_timeout > 0 else timeout)
+
+
+POOL_SIZE, POOL_TIMEOUT = _env_pool_settings()
+
+POOL_WAIT_SECONDS = REGISTRY.histogram(
+    "forgecore_pool_wait_seconds", "Time spent waiting for a pooled database connection."
+)
+POOL_IN_USE = REGISTRY.gauge(
+    "forgecore_pool_in_use", "Pooled database connections currently checked out."
+)
+POOL_SIZE_GAUGE = REGISTRY.gauge(
+    "forgecore_pool_size", "Connections the database pool may hold."
+)
+POOL_CHECKOUTS = REGISTRY.counter(
+    "forgecore_pool_checkouts_total", "Database connections checked out of the pool."
+)
+POOL_EXHAUSTED = REGISTRY.counter(
+    "forgecore_pool_exhausted_total", "Checkouts that timed out waiting for a free connection."
+)
+
+
+class PoolExhausted(RuntimeError):
+    """Raised when no pooled connection frees up within the checkout timeout."""
 
 
-def get_connection_pool():
+def get_connection_pool(size: int = POOL_SIZE):
     """Create and return a connection pool using environment variables."""
+    from mysql.connector import pooling
+
     db_config = {
         "host": os.getenv("FORGECORE_DB_HOST", "localhost"),
         "user": os.getenv("FORGECORE_DB_USER", "forgeuser"),
         "password": os.getenv("FORGECORE_DB_PASSWORD", "forgepass"),
         "database": os.getenv("FORGECORE_DB_NAME", "forgecore"),
     }
-    return pooling.MySQLConnectionPool(pool_name="forgecore_pool", pool_size=5, **db_config)
+    return pooling.MySQLConnectionPool(pool_name="forgecore_pool", pool_size=size, **db_config)
+
+
+class LazyPool:
+    """Stand-in for the connection pool that builds it on first use.
+
+    Creation is guarded by a lock so concurrent first callers share one
+    pool. If creation fails, the next use tries again.
+
+    Connections are only handed out by :meth:`connection`. The MySQL pool
+    fails at once when it is empty, so a semaphore with one slot per
+    connection makes callers queue for one instead. The real pool's
+    ``get_connection()`` is not forwarded, since checkouts through it
+    would bypass the semaphore and the metrics.
+    """
+
+    def __init__(self, factory=get_connection_pool, size: int = POOL_SIZE,
+                 timeout: float = POOL_TIMEOUT):
+        self._factory = factory
+        self._pool = None
+        self._lock = threading.Lock()
+        self.size = size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        POOL_SIZE_GAUGE.set(size)
+
+    def get(self):
+        """Return the underlying pool, creating it if needed."""
+        pool = self._pool
+        if pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = self._factory(self.size)
+                pool = self._pool
+        return pool
+
+    @property
+    def created(self) -> bool:
+        return self._pool is not None
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """Check out a connection for the ``with`` block, then return it.
+
+        Waits up to ``timeout`` seconds, by default :attr:`timeout`, for a
+        free connection and raises :class:`PoolExhausted` if none frees up.
+        """
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout if timeout is None else timeout):
+            POOL_EXHAUSTED.inc()
+            raise PoolExhausted(f"no free database connection among {self.size}")
+        try:
+            cnx = self.get().get_connection()
+        except BaseException:
+            self._slots.release()
+            raise
+        POOL_WAIT_SECONDS.observe(time.perf_counter() - start)
+        POOL_CHECKOUTS.inc()
+        POOL_IN_USE.inc()
+        try:
+            yield cnx
+        finally:
+            try:
+                # Returns a pooled connection to the pool.
+                cnx.close()
+            finally:
+                POOL_IN_USE.dec()
+                self._slots.release()
+
+    def stats(self) -> dict:
+        """Return the pool's size and its checkout counters."""
+        return {
+            "size": self.size,
+            "in_use": POOL_IN_USE.value(),
+            "checkouts": POOL_CHECKOUTS.value(),
+            "exhausted": POOL_EXHAUSTED.value(),
+            "waits": POOL_WAIT_SECONDS.count(),
+        }
 
 
 # Global connection pool
-POOL = get_connection_pool()
+POOL = LazyPool()
+
+
+def pooled(method):
+    """Run ``method`` with ``self.cnx`` checked out of :data:`POOL`.
+
+    A connection passed to the constructor is used as is. Otherwise one
+    is checked out for the call and returned when it ends. Nested calls
+    reuse it. Generator methods hold it until they are exhausted or
+    closed. The connection is bound to the instance, so threads should
+    not share an instance; instances are cheap to create.
+    """
+    if inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.cnx is not None:
+                return (yield from method(self, *args, **kwargs))
+            with POOL.connection() as cnx:
+                self.cnx = cnx
+                try:
+                    return (yield from method(self, *args, **kwargs))
+                finally:
+                    self.cnx = None
+    else:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.cnx is not None:
+                return method(self, *args, **kwargs)
+            with POOL.connection() as cnx:
+                self.cnx = cnx
+                try:
+                    return method(self, *args, **kwargs)
+                finally:
+                    self.cnx = None
+    return wrapper
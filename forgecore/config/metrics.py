@@ -0,0 +1,10 @@
+"""ForgeCore's own metrics.
+
+:data:`REGISTRY` collects the backend's metrics, such as the connection
+pool's and the agent API's, and is served on the agent API's ``/metrics``.
+The metric classes are shared with the web app, see :mod:`common.metrics`.
+"""
+
+from common.metrics import CONTENT_TYPE, Registry  # noqa: F401
+
+REGISTRY = Registry()
@@ -1,4 +1,9 @@
 -- ForgeCore database schema
+--
+-- Existing databases can add the report indexes with:
+--   ALTER TABLE materials ADD INDEX idx_materials_remnant_length (is_remnant, length_inches),
+--       ADD INDEX idx_materials_source_job (source, job_id, is_remnant, length_inches);
+--   ALTER TABLE cut_parts ADD INDEX idx_cut_parts_job_material (job_id, material_id, part_length_inches);
 
 CREATE TABLE IF NOT EXISTS jobs (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -12,7 +17,10 @@ CREATE TABLE IF NOT EXISTS materials (
     source VARCHAR(255),
     is_remnant BOOLEAN DEFAULT FALSE,
     job_id INT,
-    FOREIGN KEY (job_id) REFERENCES jobs(id)
+    FOREIGN KEY (job_id) REFERENCES jobs(id),
+    -- Remnant lookups by length and per-job offcut totals.
+    INDEX idx_materials_remnant_length (is_remnant, length_inches),
+    INDEX idx_materials_source_job (source, job_id, is_remnant, length_inches)
 );
 
 CREATE TABLE IF NOT EXISTS cut_parts (
@@ -21,7 +29,9 @@ CREATE TABLE IF NOT EXISTS cut_parts (
     material_id INT,
     job_id INT,
     FOREIGN KEY (material_id) REFERENCES materials(id),
-    FOREIGN KEY (job_id) REFERENCES jobs(id)
+    FOREIGN KEY (job_id) REFERENCES jobs(id),
+    -- Covers the per-job aggregates of the report engine.
+    INDEX idx_cut_parts_job_material (job_id, material_id, part_length_inches)
 );
 
 CREATE TABLE IF NOT EXISTS drawings (
@@ -32,3 +42,29 @@ CREATE TABLE IF NOT EXISTS drawings (
     flagged BOOLEAN DEFAULT FALSE,
     FOREIGN KEY (job_id) REFERENCES jobs(id)
 );
+
+-- Parsed cut lengths by SHA-256 of the drawing file, so identical files
+-- uploaded again or attached to other jobs are not parsed twice.
+CREATE TABLE IF NOT EXISTS drawing_parse_cache (
+    content_hash CHAR(64) PRIMARY KEY,
+    parser_version INT NOT NULL,
+    lengths TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Per-job totals kept up to date by the drawing parser, cutlist optimizer
+-- and job tracker. Rebuild with
+-- `python -m forgecore.backend.job_summary.main --reconcile`.
+CREATE TABLE IF NOT EXISTS job_summary (
+    job_id INT PRIMARY KEY,
+    part_count INT NOT NULL DEFAULT 0,
+    total_inches BIGINT NOT NULL DEFAULT 0,
+    assigned_count INT NOT NULL DEFAULT 0,
+    used_inches BIGINT NOT NULL DEFAULT 0,
+    stock_inches BIGINT NOT NULL DEFAULT 0,
+    remnant_count INT NOT NULL DEFAULT 0,
+    remnant_inches BIGINT NOT NULL DEFAULT 0,
+    scrap_inches BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (job_id) REFERENCES jobs(id)
+);
@@ -0,0 +1,201 @@
+"""Database doubles shared by the forgecore tests.
+
+:class:`SQLiteConnection` loads ``forgecore/database/schema.sql`` into an
+in-memory sqlite database and runs the modules' MySQL statements on it,
+so reads and write-backs are checked against real tables. A few MySQL
+constructs are rewritten to their sqlite equivalents first, see
+:func:`to_sqlite`; other MySQL-only syntax makes sqlite raise. MySQL's own
+parsing of the statements is not tested here; that needs a MySQL server.
+
+:class:`RecordingConnection` only records the statements it is given and
+answers queries from a ``rows(sql, params)`` callback. It suits tests of
+large inputs and of the exact statements sent.
+"""
+
+import os
+import re
+import sqlite3
+
+SCHEMA_PATH = os.path.join(
+    os.path.dirname(__file__), '..', 'forgecore', 'database', 'schema.sql'
+)
+
+_UPDATE_JOIN = re.compile(
+    r"UPDATE (\w+) (\w+) JOIN (\w+) (\w+) ON (.+?) SET (.+)$", re.DOTALL
+)
+
+
+def load_schema(path: str = SCHEMA_PATH):
+    """Return ``(script, generated)`` for the MySQL schema at ``path``.
+
+    ``script`` creates the tables in sqlite, with the inline indexes as
+    separate ``CREATE INDEX`` statements. ``generated`` maps each table with
+    an ``AUTO_INCREMENT`` key to that column.
+    """
+    with open(path) as fh:
+        text = fh.read()
+    generated = dict(re.findall(
+        r"CREATE TABLE IF NOT EXISTS (\w+) \(\s*(\w+) INT AUTO_INCREMENT", text
+    ))
+    indexes = []
+
+    def table(match):
+        name, body = match.group(1), match.group(2)
+        for index, columns in re.findall(r"^\s*INDEX (\w+) \(([^)]*)\),?$", body, re.M):
+            indexes.append(f"CREATE INDEX {index} ON {name} ({columns});")
+        body = re.sub(r"^\s*INDEX .*$\n?", "", body, flags=re.M)
+        body = re.sub(r"^\s*--.*$\n?", "", body, flags=re.M)
+        body = re.sub(r",\s*$", "", body.rstrip())
+        return f"CREATE TABLE IF NOT EXISTS {name} ({body}\n);"
+
+    text = re.sub(r"CREATE TABLE IF NOT EXISTS (\w+) \((.*?)\n\);", table, text, flags=re.S)
+    text = text.replace("INT AUTO_INCREMENT PRIMARY KEY", "INTEGER PRIMARY KEY")
+    text = text.replace(" ON UPDATE CURRENT_TIMESTAMP", "")
+    return text + "\n" + "\n".join(indexes), generated
+
+
+def to_sqlite(sql: str) -> str:
+    """Rewrite the MySQL-only constructs the modules use for sqlite.
+
+    ``%s`` placeholders, ``<=>``, ``DROP TEMPORARY TABLE``, ``UPDATE ...
+    JOIN ... SET`` and ``ON DUPLICATE KEY UPDATE`` with ``VALUES()`` are
+    handled.
+    """
+    sql = sql.replace('%s', '?').replace('<=>', ' IS ')
+    sql = sql.replace('DROP TEMPORARY TABLE', 'DROP TABLE')
+    join = _UPDATE_JOIN.match(sql)
+    if join:
+        target, alias, source, source_alias, on, sets = join.groups()
+        sets = re.sub(rf"\b{alias}\.(\w+)=", r"\1=", sets)
+        sql = (f"UPDATE {target} AS {alias} SET {sets} "
+               f"FROM {source} AS {source_alias} WHERE {on}")
+    if 'ON DUPLICATE KEY UPDATE' in sql:
+        sql = sql.replace('ON DUPLICATE KEY UPDATE', 'ON CONFLICT DO UPDATE SET')
+        sql = re.sub(r"VALUES\((\w+)\)", r"excluded.\1", sql)
+    return sql
+
+
+class SQLiteCursor:
+    """Run MySQL-style statements on sqlite, logging each one."""
+
+    def __init__(self, cnx, **options):
+        self.cnx = cnx
+        self.options = options
+        self._cursor = cnx.db.cursor()
+        self.lastrowid = None
+
+    def execute(self, sql, params=()):
+        self.cnx.log.append(('execute', sql, tuple(params)))
+        self._cursor.execute(to_sqlite(sql), tuple(params))
+        self.lastrowid = self._generated_id(sql)
+
+    def executemany(self, sql, rows):
+        rows = list(rows)
+        self.cnx.log.append(('executemany', sql, rows))
+        self._cursor.executemany(to_sqlite(sql), rows)
+
+    def _generated_id(self, sql):
+        # Like MySQL, report only keys the database generated.
+        insert = re.match(r"INSERT INTO (\w+) \(([^)]*)\)", sql)
+        if insert:
+            key = self.cnx.generated.get(insert.group(1))
+            if key and key not in [c.strip() for c in insert.group(2).split(',')]:
+                return self._cursor.lastrowid
+        return 0
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """An in-memory database with the forgecore schema."""
+
+    def __init__(self):
+        script, self.generated = load_schema()
+        self.db = sqlite3.connect(':memory:')
+        self.db.executescript(script)
+        self.log = []
+        self.commits = 0
+
+    def cursor(self, **options):
+        return SQLiteCursor(self, **options)
+
+    def commit(self):
+        self.db.commit()
+        self.commits += 1
+
+    def rollback(self):
+        self.db.rollback()
+
+    def run(self, sql, rows=()):
+        """Run sqlite ``sql`` for each of ``rows`` and commit; for fixtures."""
+        self.db.executemany(sql, rows)
+        self.db.commit()
+
+    def query(self, sql, params=()):
+        """Return every row of the sqlite query ``sql``."""
+        return self.db.execute(sql, params).fetchall()
+
+
+class RecordingCursor:
+    def __init__(self, cnx, **options):
+        self.cnx = cnx
+        self.options = options
+        self._rows = iter(())
+
+    def execute(self, sql, params=()):
+        self.cnx.log.append(('execute', sql, tuple(params)))
+        self._rows = iter(self.cnx.rows(sql, tuple(params)) or ())
+
+    def executemany(self, sql, rows):
+        self.cnx.log.append(('executemany', sql, list(rows)))
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def fetchmany(self, size):
+        return [row for _, row in zip(range(size), self._rows)]
+
+    def fetchone(self):
+        return next(self._rows, None)
+
+    def close(self):
+        self.cnx.closed += 1
+
+
+class RecordingConnection:
+    """Record statements; answer queries with ``rows(sql, params)``.
+
+    ``rows`` returns an iterable, which is consumed lazily like a
+    server-side cursor.
+    """
+
+    def __init__(self, rows=lambda sql, params: ()):
+        self.rows = rows
+        self.log = []
+        self.cursors = []
+        self.closed = 0
+
+    def cursor(self, **options):
+        cursor = RecordingCursor(self, **options)
+        self.cursors.append(cursor)
+        return cursor
+
+    def commit(self):
+        self.log.append(('commit',))
+
+    def rollback(self):
+        self.log.append(('rollback',))
+
+    def statements(self, kind, text):
+        """Return logged ``kind`` entries whose SQL contains ``text``."""
+        return [entry for entry in self.log if entry[0] == kind and text in entry[1]]
@@ -0,0 +1,133 @@
+import unittest
+import io
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import app.cut_optimizer_app as cut_optimizer_app
+from app.batch import ShapeBatch, plan_totals
+from app.portfolio import Portfolio
+from app.cut_optimizer_app import (
+    app,
+    parse_demand_by_shape,
+    parse_inventory_by_shape,
+    plan_demand,
+)
+from app.result_cache import ResultCache
+
+PARTS_CSV = (
+    "qty,mark,length,shape\n"
+    "2,A,10',W12x65\n"
+    "3,B,4',HSS4x4\n"
+    "1,C,6',W12x65\n"
+)
+STOCK_CSV = (
+    "qty,length,shape\n"
+    "2,20',W12x65\n"
+    "1,24',HSS4x4\n"
+)
+
+
+class TestShapeBatch(unittest.TestCase):
+    def problems(self):
+        demand = parse_demand_by_shape([io.StringIO(PARTS_CSV)])
+        inventory = parse_inventory_by_shape([io.StringIO(STOCK_CSV)])
+        return {s: (demand[s], inventory[s]) for s in demand}
+
+    def test_parse_by_shape(self):
+        demand = parse_demand_by_shape(
+            [io.StringIO(PARTS_CSV), io.StringIO("qty,mark,length\n4,D,1'\n")], 'L3x3'
+        )
+        self.assertEqual(list(demand), ['W12x65', 'HSS4x4', 'L3x3'])
+        self.assertEqual([(d.mark, d.qty) for d in demand['W12x65']], [('A', 2), ('C', 1)])
+        inventory = parse_inventory_by_shape([io.StringIO(STOCK_CSV)])
+        self.assertEqual(len(inventory['W12x65']), 2)
+
+    def check(self, batch, cache=None):
+        plans = batch.optimize(self.problems(), 0.0, 'ffd', plan_demand, cache)
+        self.assertEqual(list(plans), ['W12x65', 'HSS4x4'])
+        bins, uncut, layout, report = plans['W12x65']
+        self.assertEqual(uncut, [])
+        self.assertEqual(sorted(p['mark'] for b in bins for p in b['parts']), ['A', 'A', 'C'])
+        self.assertEqual(plan_totals(bins)['total_stock'], 480)
+        bins, uncut, layout, report = plans['HSS4x4']
+        self.assertEqual(plan_totals(bins)['total_scrap'], 288 - 144)
+        return plans
+
+    def test_sequential(self):
+        self.check(ShapeBatch(max_workers=0))
+
+    def test_process_pool_and_cache(self):
+        batch = ShapeBatch(max_workers=2)
+        self.addCleanup(batch.shutdown)
+        cache = ResultCache()
+        self.check(batch, cache)
+        self.assertEqual(cache.info()['misses'], 2)
+        self.check(batch, cache)
+        self.assertEqual(cache.info()['hits'], 2)
+
+    def test_batch_route(self):
+        client = app.test_client()
+        resp = client.post('/optimize', data={
+            'parts_file': (io.BytesIO(PARTS_CSV.encode()), 'parts.csv'),
+            'stock_file': (io.BytesIO(STOCK_CSV.encode()), 'stock.csv'),
+        }, content_type='multipart/form-data')
+        self.assertEqual(resp.status_code, 200)
+        html = resp.get_data(as_text=True)
+        self.assertIn('Totals by Shape', html)
+        self.assertIn('Shape: W12x65', html)
+        self.assertIn('Shape: HSS4x4', html)
+
+    def test_portfolio_batch_after_inline_portfolio(self):
+        saved = cut_optimizer_app.PORTFOLIO, cut_optimizer_app.BATCH
+        self.addCleanup(setattr, cut_optimizer_app, 'BATCH', saved[1])
+        self.addCleanup(setattr, cut_optimizer_app, 'PORTFOLIO', saved[0])
+        cut_optimizer_app.PORTFOLIO = Portfolio(max_workers=2, time_limit=0.2)
+        cut_optimizer_app.BATCH = ShapeBatch(max_workers=2)
+        self.addCleanup(cut_optimizer_app.BATCH.shutdown)
+        self.addCleanup(cut_optimizer_app.PORTFOLIO.shutdown)
+        client = app.test_client()
+        resp = client.post('/optimize', data={
+            'parts': "1 A 7'\n1 B 6'", 'stock': "1 10'\n1 8'", 'strategy': 'portfolio',
+        })
+        self.assertEqual(resp.status_code, 200)
+
+        # The portfolio pool now exists; batch workers must not inherit it.
+        result = []
+
+        def post():
+            result.append(client.post('/optimize', data={
+                'parts_file': (io.BytesIO(PARTS_CSV.encode()), 'parts.csv'),
+                'stock_file': (io.BytesIO(STOCK_CSV.encode()), 'stock.csv'),
+                'strategy': 'portfolio',
+            }, content_type='multipart/form-data'))
+
+        request = threading.Thread(target=post, daemon=True)
+        request.start()
+        request.join(30)
+        self.assertFalse(request.is_alive(), 'multi-shape portfolio request hung')
+        self.assertEqual(result[0].status_code, 200)
+        self.assertIn('Shape: HSS4x4', result[0].get_data(as_text=True))
+
+    def test_batch_route_missing_stock(self):
+        client = app.test_client()
+        resp = client.post('/optimize', data={
+            'parts_file': (io.BytesIO(PARTS_CSV.encode()), 'parts.csv'),
+            'stock_file': (io.BytesIO(b"qty,length,shape\n1,20',W12x65\n"), 'stock.csv'),
+        }, content_type='multipart/form-data')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("No stock given for shape &#39;HSS4x4&#39;", resp.get_data(as_text=True))
+
+    def test_single_tagged_shape_uses_typed_stock(self):
+        client = app.test_client()
+        resp = client.post('/optimize', data={
+            'parts_file': (io.BytesIO(b"qty,mark,length,shape\n1,A,5',L3x3\n"), 'parts.csv'),
+            'stock': "1 20'",
+        }, content_type='multipart/form-data')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('Shape: L3x3', resp.get_data(as_text=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.cut_optimizer_app import parse_parts, parse_parts_csv, parse_stock
+from benchmarks import runner, workload
+
+
+class TestWorkload(unittest.TestCase):
+    def test_seeded_and_sized(self):
+        rows = workload.generate_parts(500, seed=4)
+        self.assertEqual(rows, workload.generate_parts(500, seed=4))
+        self.assertNotEqual(rows, workload.generate_parts(500, seed=5))
+        self.assertEqual(sum(qty for qty, _, _ in rows), 500)
+
+    def test_parses_like_the_samples(self):
+        rows = workload.generate_parts(200, seed=1)
+        parts = parse_parts(workload.parts_text(rows))
+        self.assertEqual(len(parts), 200)
+        self.assertEqual(parse_parts_csv(io.BytesIO(workload.parts_csv(rows))), parts)
+        stock = parse_stock(workload.stock_text(workload.generate_stock(rows, seed=1)))
+        self.assertGreater(sum(s['length'] for s in stock), sum(p['length'] for p in parts))
+
+
+class TestRunner(unittest.TestCase):
+    def test_run(self):
+        data = runner.run(sizes=(10,), repeat=1, only=['parse_parts', 'optimize_cuts'])
+        self.assertEqual(set(data['results']), {'parse_parts@10', 'optimize_cuts@10'})
+        self.assertEqual(data['meta']['sizes'], [10])
+        with self.assertRaises(ValueError):
+            runner.run(sizes=(10,), only=['nope'])
+
+    def test_demand_path(self):
+        # /optimize runs optimize_demand, which must agree with the float path.
+        case = runner.Case(200, seed=2)
+        bins, uncut = runner.BENCHMARKS['optimize_demand'](case)
+        self.assertEqual(len(uncut), len(case.uncut))
+        self.assertEqual(sum(1 for b in bins if b['parts']), len(case.bins))
+        data = runner.run(sizes=(10,), repeat=1, only=['optimize_demand', 'plan_demand'])
+        self.assertEqual(set(data['results']), {'optimize_demand@10', 'plan_demand@10'})
+
+    def test_compare(self):
+        base = {'results': {'a@10': 0.010, 'b@10': 0.010, 'c@10': 0.0001, 'd@10': 0.01}}
+        now = {'results': {'a@10': 0.011, 'b@10': 0.020, 'c@10': 0.0009, 'e@10': 1.0}}
+        regressions = runner.compare(base, now, threshold=0.25)
+        self.assertEqual([r[0] for r in regressions], ['b@10'])
+        self.assertAlmostEqual(regressions[0][3], 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,7 @@ import tempfile
 import sys
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import app.cut_optimizer_app as cut_optimizer_app
 from app.cut_optimizer_app import (
     parse_length,
     parse_parts,
@@ -161,12 +162,12 @@ class TestCutOptimizer(unittest.TestCase):
             }
         ]
         uncut = []
-        path = os.path.join(tempfile.gettempdir(), 'route_test.pdf')
-        export_cutting_plan_pdf(bins, uncut, 0.0, path)
-        resp = client.get(f'/download_pdf/{os.path.basename(path)}')
+        plan_id = cut_optimizer_app.PLANS.add(
+            {'bins': bins, 'uncut': uncut, 'kerf_width': 0.0, 'shape': ''}
+        )
+        resp = client.get(f'/download_pdf/{plan_id}')
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.mimetype, 'application/pdf')
-        os.remove(path)
 
     def test_download_csv_route(self):
         client = app.test_client()
@@ -179,12 +180,12 @@ class TestCutOptimizer(unittest.TestCase):
             }
         ]
         uncut = []
-        path = os.path.join(tempfile.gettempdir(), 'route_test.csv')
-        export_cutting_plan_csv(bins, uncut, 0.0, path)
-        resp = client.get(f'/download_csv/{os.path.basename(path)}')
+        plan_id = cut_optimizer_app.PLANS.add(
+            {'bins': bins, 'uncut': uncut, 'kerf_width': 0.0, 'shape': ''}
+        )
+        resp = client.get(f'/download_csv/{plan_id}')
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.mimetype, 'text/csv')
-        os.remove(path)
 
     def test_download_json_route(self):
         client = app.test_client()
@@ -197,12 +198,12 @@ class TestCutOptimizer(unittest.TestCase):
             }
         ]
         uncut = []
-        path = os.path.join(tempfile.gettempdir(), 'route_test.json')
-        export_cutting_plan_json(bins, uncut, 0.0, path)
-        resp = client.get(f'/download_json/{os.path.basename(path)}')
+        plan_id = cut_optimizer_app.PLANS.add(
+            {'bins': bins, 'uncut': uncut, 'kerf_width': 0.0, 'shape': ''}
+        )
+        resp = client.get(f'/download_json/{plan_id}')
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.mimetype, 'application/json')
-        os.remove(path)
 
     def test_download_txt_route(self):
         client = app.test_client()
@@ -216,12 +217,17 @@ class TestCutOptimizer(unittest.TestCase):
             }
         ]
         uncut = []
-        path = os.path.join(tempfile.gettempdir(), 'route_test.txt')
-        export_cutting_plan_text(bins, uncut, 0.0, path)
-        resp = client.get(f'/download_txt/{os.path.basename(path)}')
+        plan_id = cut_optimizer_app.PLANS.add(
+            {'bins': bins, 'uncut': uncut, 'kerf_width': 0.0, 'shape': ''}
+        )
+        resp = client.get(f'/download_txt/{plan_id}')
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.mimetype, 'text/plain')
-        os.remove(path)
+
+    def test_download_unknown_plan(self):
+        client = app.test_client()
+        resp = client.get('/download_pdf/' + 'f' * 32)
+        self.assertEqual(resp.status_code, 404)
 
     def test_default_kerf_env(self):
         import importlib
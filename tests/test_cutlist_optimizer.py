@@ -0,0 +1,173 @@
+import unittest
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import forgecore.backend.cutlist_optimizer.main as cutlist
+from forgecore.backend.cutlist_optimizer.main import CutlistOptimizer
+from forgecore.backend.job_summary.main import JobSummary
+from fakedb import RecordingConnection, SQLiteConnection
+
+
+def fake_db(parts, materials, remnants=(), offcut_totals=()):
+    """Serve ``cut_parts``, full stock, remnants and offcut totals by query."""
+    def rows(sql, params):
+        if 'GROUP BY job_id' in sql:
+            return offcut_totals
+        if 'is_remnant=1' in sql and sql.startswith('SELECT'):
+            return remnants
+        if sql.startswith('SELECT'):
+            return materials if 'FROM materials' in sql else parts
+    return RecordingConnection(rows)
+
+
+class TestCutlistOptimizer(unittest.TestCase):
+    def test_matches_first_fit_decreasing(self):
+        parts = [(1, 60, 7), (2, 100, 7), (3, 60, 7), (4, 300, 7)]
+        cnx = fake_db(parts, [(10, 120), (11, 240)])
+        assignments = CutlistOptimizer(cnx=cnx).optimize()
+        self.assertEqual(sorted(assignments), [(1, 11), (2, 10), (3, 11)])
+
+    def test_kerf(self):
+        parts = [(1, 60, 7), (2, 60, 7)]
+        cnx = fake_db(parts, [(10, 120), (11, 120)])
+        assignments = CutlistOptimizer(kerf_width=0.125, cnx=cnx).optimize()
+        self.assertEqual(sorted(assignments), [(1, 10), (2, 11)])
+
+    def test_save_batches_in_one_transaction(self):
+        saved = cutlist.WRITE_BATCH
+        cutlist.WRITE_BATCH = 2
+        self.addCleanup(setattr, cutlist, 'WRITE_BATCH', saved)
+        parts = [(i, 50, 1) for i in range(1, 6)]
+        cnx = fake_db(parts, [(10, 100), (11, 100)])
+        CutlistOptimizer(cnx=cnx).optimize(job_id=1, save=True)
+        self.assertEqual(cnx.log[0][2], (1,))
+        writes = [entry for entry in cnx.log
+                  if entry[0] == 'executemany' and 'cut_assignments' in entry[1]]
+        self.assertEqual([len(w[2]) for w in writes], [2, 2, 1])
+        rows = sorted(row for w in writes for row in w[2])
+        self.assertEqual(rows, [(1, 10), (2, 10), (3, 11), (4, 11), (5, None)])
+        # Existing parts are updated in place, never inserted.
+        updates = [entry[1] for entry in cnx.log if entry[0] == 'execute'
+                   and 'cut_parts' in entry[1] and not entry[1].startswith('SELECT')]
+        self.assertEqual(len(updates), 1)
+        self.assertTrue(updates[0].startswith('UPDATE cut_parts c JOIN cut_assignments'))
+        self.assertLess(cnx.log.index(writes[-1]),
+                        cnx.log.index(('execute', updates[0], ())))
+        summary = [entry for entry in cnx.log
+                   if entry[0] == 'executemany' and 'job_summary' in entry[1]]
+        # Without remnant-first the stored remnant columns are left alone.
+        self.assertNotIn('remnant_count', summary[0][1])
+        self.assertEqual(summary[0][2], [(1, 4, 200, 200, 0)])
+        self.assertEqual(cnx.log[-1], ('commit',))
+
+    def test_remnant_first(self):
+        parts = [(1, 100, 3), (2, 40, 3), (3, 40, 3), (4, 30, 3)]
+        cnx = fake_db(parts, [(10, 240), (11, 240)], remnants=[(20, 45), (21, 90)],
+                      offcut_totals=[(3, 1, 140)])
+        optimizer = CutlistOptimizer(cnx=cnx, remnant_first=True, min_remnant=24)
+        assignments = optimizer.optimize(job_id=3, save=True)
+        # Remnants take what they can before stick 10 is opened for part 1.
+        self.assertEqual(sorted(assignments), [(1, 10), (2, 20), (3, 21), (4, 21)])
+        writes = [entry for entry in cnx.log
+                  if entry[0] == 'executemany' and 'job_summary' not in entry[1]]
+        self.assertEqual(len(writes), 2)
+        self.assertIn('cut_assignments', writes[0][1])
+        self.assertIn('INSERT INTO materials', writes[1][1])
+        # Stick 10 keeps 140", remnant 21 keeps 20" (too short), remnant 20 keeps 5".
+        self.assertEqual(writes[1][2], [(140, 'offcut', 3)])
+        deletes = [entry for entry in cnx.log if entry[0] == 'execute' and entry[1].startswith('DELETE')]
+        self.assertEqual(deletes[0][2], ('offcut', 3))
+        summary = [entry for entry in cnx.log
+                   if entry[0] == 'executemany' and 'job_summary' in entry[1]]
+        # 210" used from stick 10 and remnants 20 and 21 (375"), 140" kept.
+        self.assertEqual(summary[0][2], [(3, 4, 210, 375, 1, 140, 25)])
+        self.assertEqual(cnx.log[-1], ('commit',))
+
+    def test_whole_table_offcuts_keep_their_job(self):
+        parts = [(1, 200, 3), (2, 100, 4), (3, 60, 3), (4, 20, 4)]
+        cnx = fake_db(parts, [(10, 240), (11, 240)])
+        optimizer = CutlistOptimizer(cnx=cnx, remnant_first=True, min_remnant=12)
+        self.assertEqual(sorted(optimizer.optimize(save=True)), [(1, 10), (2, 11), (3, 11), (4, 10)])
+        inserts = [entry for entry in cnx.log
+                   if entry[0] == 'executemany' and 'INSERT INTO materials' in entry[1]]
+        # Both sticks hold parts of both jobs; the longest part on each decides.
+        self.assertEqual(inserts[0][2], [(20, 'offcut', 3), (80, 'offcut', 4)])
+
+    def test_stock_of_other_jobs_excluded(self):
+        cnx = fake_db([(1, 60, 7)], [(10, 120)])
+        CutlistOptimizer(cnx=cnx).optimize(job_id=7)
+        stock = [entry for entry in cnx.log if 'FROM materials' in entry[1]][0]
+        self.assertIn('NOT EXISTS', stock[1])
+        self.assertEqual(stock[2], (7,))
+        cnx = fake_db([(1, 60, 7)], [(10, 120)])
+        CutlistOptimizer(cnx=cnx).optimize()
+        stock = [entry for entry in cnx.log if 'FROM materials' in entry[1]][0]
+        self.assertNotIn('NOT EXISTS', stock[1])
+
+    def stored_database(self):
+        cnx = SQLiteConnection()
+        cnx.run("INSERT INTO jobs (id, name) VALUES (?, ?)", [(3, 'Mill'), (4, 'Canopy')])
+        cnx.run(
+            "INSERT INTO materials (id, length_inches, source, is_remnant, job_id) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(8, 240, None, 0, None), (10, 240, None, 0, None), (11, 240, None, 0, None),
+             (20, 45, 'yard', 1, None), (30, 100, 'offcut', 1, 3)],
+        )
+        # Part 9 of job 4 is already cut from stick 8, the first one listed.
+        cnx.run(
+            "INSERT INTO cut_parts (id, part_length_inches, material_id, job_id) "
+            "VALUES (?, ?, ?, ?)",
+            [(1, 100, None, 3), (2, 40, 30, 3), (3, 40, None, 3), (4, 30, None, 3),
+             (5, 150, None, 4), (9, 200, 8, 4)],
+        )
+        JobSummary(cnx=cnx).reconcile()
+        return cnx
+
+    def test_save_to_database(self):
+        cnx = self.stored_database()
+        optimizer = CutlistOptimizer(cnx=cnx, remnant_first=True, min_remnant=24)
+        assignments = optimizer.optimize(job_id=3, save=True)
+        stored = cnx.query("SELECT id, material_id FROM cut_parts WHERE job_id=3 ORDER BY id")
+        self.assertEqual(stored, sorted(assignments))
+        used = {material_id for _, material_id in assignments}
+        # Stick 8 belongs to job 4; job 3's old offcut 30 was replaced.
+        self.assertNotIn(8, used)
+        self.assertEqual(cnx.query("SELECT material_id FROM cut_parts WHERE id=9"), [(8,)])
+        self.assertEqual(cnx.query("SELECT COUNT(*) FROM materials WHERE id=30"), [(0,)])
+        offcuts = cnx.query("SELECT job_id FROM materials WHERE source='offcut'")
+        self.assertTrue(offcuts)
+        self.assertEqual(set(offcuts), {(3,)})
+        self.assertEqual(JobSummary(cnx=cnx).reconcile(fix=False), [])
+        # The temporary table is gone once the save commits.
+        self.assertEqual(cnx.query("SELECT name FROM sqlite_temp_master"), [])
+
+    def test_save_whole_table_to_database(self):
+        cnx = self.stored_database()
+        optimizer = CutlistOptimizer(cnx=cnx, remnant_first=True, min_remnant=24)
+        assignments = optimizer.optimize(save=True)
+        stored = cnx.query("SELECT id, material_id FROM cut_parts "
+                           "WHERE material_id IS NOT NULL ORDER BY id")
+        self.assertEqual(stored, sorted(assignments))
+        self.assertNotIn((None,), cnx.query("SELECT job_id FROM materials WHERE source='offcut'"))
+        self.assertEqual(JobSummary(cnx=cnx).reconcile(fix=False), [])
+
+    def test_large_job(self):
+        rng = random.Random(3)
+        parts = [(i, rng.randint(10, 240), 1) for i in range(100_000)]
+        materials = [(i, 480) for i in range(40_000)]
+        cnx = fake_db(parts, materials)
+        start = time.perf_counter()
+        assignments = CutlistOptimizer(cnx=cnx).optimize()
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual(len(assignments), len(parts))
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            CutlistOptimizer(strategy='nope', cnx=fake_db([], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
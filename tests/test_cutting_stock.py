@@ -0,0 +1,82 @@
+import unittest
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.cut_optimizer_app import optimize_cuts, app
+from app.cutting_stock import optimize_cuts_exact, plan_cost
+
+
+def make_parts(lengths):
+    return [
+        {'mark': f"P{i}", 'length': float(length), 'length_str': str(length)}
+        for i, length in enumerate(lengths)
+    ]
+
+
+def make_stock(lengths):
+    stocks = [{'length': float(length), 'length_str': str(length)} for length in lengths]
+    stocks.sort(key=lambda x: -x['length'])
+    return stocks
+
+
+class TestCuttingStock(unittest.TestCase):
+    def test_beats_ffd(self):
+        # FFD needs three sticks: 50+40, 40+30+20, 20.
+        parts = make_parts([50, 40, 40, 30, 20, 20])
+        stocks = make_stock([100] * 4)
+        ffd = optimize_cuts(parts, stocks)
+        exact = optimize_cuts_exact(parts, stocks, time_limit=5)
+        self.assertEqual(plan_cost(*ffd), (0, 300.0, 3))
+        self.assertEqual(plan_cost(*exact), (0, 200.0, 2))
+        self.assertEqual(len(exact[0]), len(stocks))
+
+    def test_respects_kerf(self):
+        parts = make_parts([50, 50])
+        stocks = make_stock([100, 100])
+        bins, uncut = optimize_cuts_exact(parts, stocks, kerf_width=0.125)
+        self.assertEqual(uncut, [])
+        self.assertEqual(sorted(len(b['parts']) for b in bins), [1, 1])
+
+    def test_never_worse_than_ffd(self):
+        rng = random.Random(7)
+        for _ in range(10):
+            lengths = [rng.choice([33.5, 47.25, 61.0, 88.125, 140.0, 212.75])
+                       for _ in range(rng.randint(5, 60))]
+            parts = make_parts(lengths)
+            stocks = make_stock([240] * 10 + [480] * 8)
+            ffd = optimize_cuts(parts, stocks, 0.125)
+            bins, uncut = optimize_cuts_exact(parts, stocks, 0.125, time_limit=1)
+            self.assertLessEqual(plan_cost(bins, uncut), plan_cost(*ffd))
+            placed = sorted(id(p) for b in bins for p in b['parts'])
+            placed += [id(p) for p in uncut]
+            self.assertEqual(sorted(placed), sorted(id(p) for p in parts))
+            for b in bins:
+                used = sum(p['length'] for p in b['parts'])
+                used += 0.125 * max(len(b['parts']) - 1, 0)
+                self.assertLessEqual(used, b['stock_length'] + 1e-9)
+
+    def test_time_budget(self):
+        rng = random.Random(3)
+        lengths = [rng.randint(30, 250) + rng.randint(0, 15) / 16 for _ in range(60)]
+        parts = make_parts([rng.choice(lengths) for _ in range(2000)])
+        stocks = make_stock([480] * 800)
+        start = time.monotonic()
+        bins, uncut = optimize_cuts_exact(parts, stocks, 0.125, time_limit=0.5)
+        self.assertLess(time.monotonic() - start, 2.0)
+        self.assertEqual(uncut, [])
+
+    def test_optimize_route_exact(self):
+        client = app.test_client()
+        resp = client.post(
+            '/optimize',
+            data={'parts': "1 A 8'", 'stock': "1 10'", 'strategy': 'exact'},
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b'20.0%', resp.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import io
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.cut_optimizer_app import (
+    parse_demand,
+    parse_demand_csv,
+    parse_inventory,
+    parse_inventory_csv,
+    parse_parts,
+    optimize_cuts,
+    optimize_demand,
+)
+from app.demand import DemandCollector, StockInventory, expand_demand
+
+
+class TestDemand(unittest.TestCase):
+    def test_parse_demand_aggregates(self):
+        demand = parse_demand("5000 CA114 11' 9 15/16\"\n2 CA100 3' 6\n1 CA114 11' 9 15/16")
+        self.assertEqual(len(demand), 2)
+        self.assertEqual(demand[0].mark, 'CA114')
+        self.assertEqual(demand[0].qty, 5001)
+        self.assertAlmostEqual(demand[0].length, 141.9375)
+        self.assertEqual(demand[1].qty, 2)
+
+    def test_parse_parts_expands_shared_pieces(self):
+        parts = parse_parts("3 A 5'")
+        self.assertEqual(len(parts), 3)
+        self.assertIs(parts[0], parts[2])
+        self.assertEqual(parts[0], {'mark': 'A', 'length': 60.0, 'length_str': "5'"})
+
+    def test_parse_inventory(self):
+        inventory = parse_inventory("2 24'\n5 48'\n1 24'")
+        self.assertEqual(len(inventory), 8)
+        self.assertEqual(list(inventory), [(576.0, "48'", 5), (288.0, "24'", 3)])
+        sticks = inventory.sticks()
+        self.assertEqual([s['length'] for s in sticks], [576.0] * 5 + [288.0] * 3)
+
+    def test_parse_csv_compact(self):
+        demand = parse_demand_csv(io.StringIO('qty,mark,length\n3,A,5\'\n2,A,60\n'))
+        self.assertEqual(len(demand), 1)
+        self.assertEqual(demand[0].qty, 5)
+        inventory = parse_inventory_csv(io.StringIO('qty,length\n4,10\'\n'))
+        self.assertEqual(len(inventory), 4)
+        self.assertEqual(len(parse_demand_csv(io.StringIO(''))), 0)
+
+    def test_optimize_demand_matches_per_piece(self):
+        rng = random.Random(42)
+        for strategy in ('ffd', 'bfd'):
+            for kerf in (0.0, 0.125):
+                demand = DemandCollector()
+                for i in range(30):
+                    demand.add(f"M{i % 7}", rng.choice([30.5, 47.25, 61.0, 99.0, 140.0]),
+                               '', rng.randint(1, 40))
+                lines = demand.lines()
+                inventory = StockInventory()
+                inventory.add(480.0, "40'", 60)
+                inventory.add(240.0, "20'", 80)
+                compact = optimize_demand(lines, inventory, kerf, strategy)
+                expanded = optimize_cuts(expand_demand(lines), inventory.sticks(), kerf, strategy)
+                self.assertEqual(compact, expanded)
+
+    def test_large_quantity_stays_compact(self):
+        demand = parse_demand("100000 CA114 11' 9 15/16\"")
+        self.assertEqual(len(demand), 1)
+        inventory = parse_inventory("50000 48'")
+        bins, uncut = optimize_demand(demand, inventory)
+        self.assertEqual(uncut, [])
+        self.assertEqual(sum(len(b['parts']) for b in bins), 100000)
+        self.assertEqual(len(bins[0]['parts']), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import forgecore.backend.drawing_parser.main as drawing_parser
+from forgecore.backend.drawing_parser.main import DrawingParser
+from fakedb import SQLiteConnection
+
+
+def drawings_db(count):
+    cnx = SQLiteConnection()
+    add_drawings(cnx, [(i, f'd{i}.dxf', 9) for i in range(1, count + 1)])
+    return cnx
+
+
+def add_drawings(cnx, rows):
+    cnx.run("INSERT INTO drawings (id, filename, job_id) VALUES (?, ?, ?)", rows)
+
+
+def parts(cnx):
+    return sorted(cnx.query("SELECT part_length_inches, job_id FROM cut_parts"))
+
+
+def drawing_ids(cnx, where):
+    return [row[0] for row in cnx.query(f"SELECT id FROM drawings WHERE {where} ORDER BY id")]
+
+
+def summary(cnx):
+    return {job_id: (count, inches) for job_id, count, inches in
+            cnx.query("SELECT job_id, part_count, total_inches FROM job_summary")}
+
+
+def fake_parse(path):
+    if path.endswith('d4.dxf'):
+        raise ValueError('bad drawing')
+    return [int(os.path.basename(path)[1:-4]) * 10]
+
+
+class TestDrawingParser(unittest.TestCase):
+    def test_pipeline_commits_per_chunk(self):
+        cnx = drawings_db(7)
+        with mock.patch.object(drawing_parser, 'parse_drawing_file', fake_parse):
+            stats = DrawingParser('dwg', cnx=cnx).process_pipelined(chunk_size=3, workers=2)
+        self.assertEqual(stats, {'chunks': 3, 'parsed': 6, 'failed': 1, 'parts': 6,
+                                 'cache_hits': 0, 'cache_misses': 7})
+        self.assertEqual(cnx.commits, 3)
+        self.assertEqual(parts(cnx), [(10, 9), (20, 9), (30, 9), (50, 9), (60, 9), (70, 9)])
+        self.assertEqual(drawing_ids(cnx, 'parsed=0'), [4])
+        self.assertEqual(drawing_ids(cnx, 'flagged=1'), [4])
+        updates = [e for e in cnx.log if e[1].startswith('UPDATE drawings SET parsed')]
+        self.assertEqual([e[2] for e in updates], [(1, 2, 3), (5, 6), (7,)])
+        self.assertEqual(summary(cnx), {9: (6, 240)})
+
+    def test_unpipelined_flags_bad_drawings(self):
+        saved = drawing_parser.CHUNK_SIZE
+        drawing_parser.CHUNK_SIZE = 3
+        self.addCleanup(setattr, drawing_parser, 'CHUNK_SIZE', saved)
+        cnx = drawings_db(7)
+        cnx.run("INSERT INTO drawing_parse_cache (content_hash, parser_version, lengths) "
+                "VALUES (?, ?, ?)", [('d', drawing_parser.PARSER_VERSION, '[1]')])
+
+        def digest(path):
+            return 'd' if path.endswith('d7.dxf') else None
+
+        with mock.patch.object(drawing_parser, 'parse_drawing_file', fake_parse), \
+                mock.patch.object(drawing_parser, 'file_digest', digest):
+            stats = DrawingParser('dwg', cnx=cnx).process_unparsed_drawings()
+        self.assertEqual(stats, {'parsed': 6, 'failed': 1, 'cache_hits': 1, 'cache_misses': 6})
+        self.assertEqual(cnx.commits, 1)
+        self.assertEqual(parts(cnx), [(1, 9), (10, 9), (20, 9), (30, 9), (50, 9), (60, 9)])
+        self.assertEqual(drawing_ids(cnx, 'flagged=1'), [4])
+        self.assertEqual(drawing_ids(cnx, 'parsed=0'), [4])
+        # One cache lookup per chunk with digests, not one per drawing.
+        lookups = [e for e in cnx.log if 'FROM drawing_parse_cache' in e[1]]
+        self.assertEqual(len(lookups), 1)
+
+    def test_failed_chunk_keeps_earlier_commits(self):
+        cnx = drawings_db(5)
+        calls = []
+
+        def failing_write(cursor, submitted, stats):
+            calls.append(submitted)
+            if len(calls) == 2:
+                raise RuntimeError('database went away')
+            return original(parser, cursor, submitted, stats)
+
+        parser = DrawingParser('dwg', cnx=cnx)
+        original = DrawingParser._write_chunk
+        parser._write_chunk = failing_write
+        with mock.patch.object(drawing_parser, 'parse_drawing_file', lambda path: [100, 50]):
+            with self.assertRaises(RuntimeError):
+                parser.process_pipelined(chunk_size=2)
+        self.assertEqual(drawing_ids(cnx, 'parsed=1'), [1, 2])
+
+    def test_parse_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, text in (('d1.dxf', 'A'), ('d2.dxf', 'B'), ('d3.dxf', 'A'), ('d4.dxf', 'A')):
+                with open(os.path.join(tmp, name), 'w') as fh:
+                    fh.write(text)
+            parses = []
+
+            def counting_parse(path):
+                parses.append(os.path.basename(path))
+                with open(path) as fh:
+                    return [10 if fh.read() == 'A' else 20]
+
+            cnx = drawings_db(3)
+            with mock.patch.object(drawing_parser, 'parse_drawing_file', counting_parse):
+                stats = DrawingParser(tmp, cnx=cnx).process_pipelined(chunk_size=10)
+                # d3 has the same contents as d1, so it is parsed only once.
+                self.assertEqual(sorted(parses), ['d1.dxf', 'd2.dxf'])
+                self.assertEqual((stats['cache_hits'], stats['cache_misses']), (1, 2))
+                self.assertEqual(cnx.query("SELECT COUNT(*) FROM drawing_parse_cache"), [(2,)])
+                self.assertEqual(parts(cnx), [(10, 9), (10, 9), (20, 9)])
+
+                # Re-uploaded under a new name for another job: no parsing at all.
+                add_drawings(cnx, [(4, 'd4.dxf', 5)])
+                stats = DrawingParser(tmp, cnx=cnx).process_pipelined()
+                self.assertEqual(len(parses), 2)
+                self.assertEqual((stats['cache_hits'], stats['cache_misses']), (1, 0))
+                self.assertIn((10, 5), parts(cnx))
+
+                add_drawings(cnx, [(5, 'd1.dxf', 6)])
+                stats = DrawingParser(tmp, cnx=cnx).process_unparsed_drawings()
+                self.assertEqual(stats, {'parsed': 1, 'failed': 0,
+                                         'cache_hits': 1, 'cache_misses': 0})
+                self.assertEqual(len(parses), 2)
+                self.assertIn((10, 6), parts(cnx))
+                self.assertEqual(summary(cnx), {9: (3, 40), 5: (1, 10), 6: (1, 10)})
+
+
+if __name__ == '__main__':
+    unittest.main()
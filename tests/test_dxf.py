@@ -0,0 +1,90 @@
+import unittest
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from forgecore.backend.drawing_parser.dxf import DXFError, iter_groups, iter_lengths, part_lengths
+from forgecore.backend.drawing_parser.main import parse_drawing_file
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'dxf')
+INCH = os.path.join(FIXTURES, 'inch_details.dxf')
+METRIC = os.path.join(FIXTURES, 'metric_crlf.dxf')
+
+
+class TestDXF(unittest.TestCase):
+    def test_groups(self):
+        groups = list(iter_groups(METRIC))
+        self.assertEqual(groups[:2], [(0, b'SECTION'), (2, b'HEADER')])
+        self.assertEqual(groups[-1], (0, b'EOF'))
+
+    def test_lengths(self):
+        found = list(iter_lengths(INCH))
+        # Block contents, the angular dimension and TEXT are skipped.
+        self.assertEqual(len(found), 7)
+        self.assertNotIn('IGNORED', [layer for layer, _, _ in found])
+        # The text override "14' 3 1/4\"" wins over the stored 171.0.
+        self.assertEqual(found[2], ('B1', True, 171.25))
+        self.assertAlmostEqual(found[5][2], 10 * math.pi)
+
+    def test_part_lengths(self):
+        self.assertEqual(part_lengths(INCH, 'DET'), {'B1': 171.25, 'B2': 96.0, 'DET': 50.0})
+        metric = part_lengths(METRIC)
+        self.assertAlmostEqual(metric['P7'], 3000 / 25.4)
+        self.assertAlmostEqual(metric['C3'], 6000 / 25.4)
+        # Override text is in drawing units unless it names its own.
+        self.assertAlmostEqual(metric['B5'], 2450 / 25.4)
+        self.assertAlmostEqual(metric['B6'], 2450 / 25.4)
+
+    def test_parse_drawing_file(self):
+        self.assertEqual(parse_drawing_file(INCH), [171, 96, 50])
+        with self.assertRaises(ValueError):
+            parse_drawing_file(os.path.join(FIXTURES, 'detail.pdf'))
+
+    def test_bad_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            binary = os.path.join(tmp, 'binary.dxf')
+            with open(binary, 'wb') as fh:
+                fh.write(b'AutoCAD Binary DXF\r\n\x1a\x00')
+            with self.assertRaises(DXFError):
+                list(iter_groups(binary))
+            garbage = os.path.join(tmp, 'garbage.dxf')
+            with open(garbage, 'w') as fh:
+                fh.write('hello\nworld\n')
+            with self.assertRaises(DXFError):
+                list(iter_groups(garbage))
+            empty = os.path.join(tmp, 'empty.dxf')
+            open(empty, 'w').close()
+            self.assertEqual(part_lengths(empty), {})
+
+    def test_large_file_constant_memory(self):
+        entity = ''.join(
+            f'  0\nLINE\n  8\nM{i % 50}\n 10\n0.0\n 20\n0.0\n 30\n0.0\n 11\n{i % 400}.5\n 21\n0.0\n 31\n0.0\n'
+            for i in range(1000)
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'large.dxf')
+            with open(path, 'w') as fh:
+                fh.write('  0\nSECTION\n  2\nENTITIES\n')
+                for _ in range(25):
+                    fh.write(entity)
+                fh.write('  0\nENDSEC\n  0\nEOF\n')
+            self.assertGreater(os.path.getsize(path), 1_500_000)
+            tracemalloc.start()
+            start = time.perf_counter()
+            try:
+                lengths = part_lengths(path)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            self.assertLess(peak, 128 * 1024)
+            self.assertLess(time.perf_counter() - start, 20)
+            self.assertEqual(len(lengths), 50)
+            self.assertEqual(lengths['M49'], 399.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.cut_optimizer_app import optimize_demand, parse_demand, parse_inventory
+from app.demand import DemandCollector, StockInventory
+from app.fixed_point import demand_arrays, inventory_arrays, place_demand_ticks
+from common.lengths import (
+    format_ticks,
+    from_ticks,
+    parse_length_ticks,
+    to_ticks_ceil,
+    to_ticks_floor,
+)
+from common.placement import place_demand
+
+
+class TestFixedPoint(unittest.TestCase):
+    def test_tick_conversions(self):
+        self.assertEqual(parse_length_ticks("11' 9 15/16\""), 141 * 64 + 60)
+        self.assertEqual(parse_length_ticks("1/64"), 1)
+        self.assertEqual(format_ticks(parse_length_ticks("7' 6 1/2")), "7' 6 1/2\"")
+        self.assertEqual(from_ticks(96), 1.5)
+        self.assertEqual(to_ticks_ceil(100 / 25.4), 252)
+        self.assertEqual(to_ticks_floor(100 / 25.4), 251)
+        self.assertEqual(to_ticks_ceil(1.5), to_ticks_floor(1.5))
+
+    def test_arrays(self):
+        demand = parse_demand("3 A 5'\n2 B 1/2")
+        lengths, qty = demand_arrays(demand)
+        self.assertEqual(lengths.dtype.name, 'int64')
+        self.assertEqual(lengths.tolist(), [3840, 32])
+        self.assertEqual(qty.tolist(), [3, 2])
+        sticks = inventory_arrays(parse_inventory("2 10'\n1 20'"))
+        self.assertEqual(sticks.tolist(), [15360, 7680, 7680])
+
+    def test_matches_float_engine(self):
+        rng = random.Random(11)
+        for kerf in (0.0, 0.125, 3 / 32):
+            for _ in range(15):
+                demand = DemandCollector()
+                for i in range(rng.randint(1, 40)):
+                    length = rng.randint(6, 300) + rng.randint(0, 63) / 64
+                    demand.add(f"M{i}", length, '', rng.choice([1, 5, 30, 70, 300]))
+                inventory = StockInventory()
+                for length in rng.sample([240.0, 288.0, 480.0, 576.0], 3):
+                    inventory.add(length, '', rng.randint(1, 400))
+                lines = demand.lines()
+                self.assertEqual(
+                    place_demand_ticks(lines, inventory, kerf),
+                    place_demand(lines, inventory, kerf, 'ffd'),
+                )
+
+    def test_fractional_ticks_use_float_engine(self):
+        # 0.1" kerfs and metric lengths are not whole ticks; rounding them
+        # would change the plan.
+        demand = DemandCollector()
+        demand.add('A', 1.0, '1', 2000)
+        inventory = StockInventory()
+        inventory.add(1200.0, "100'", 1)
+        self.assertEqual(
+            place_demand_ticks(demand.lines(), inventory, 0.1),
+            place_demand(demand.lines(), inventory, 0.1, 'ffd'),
+        )
+
+    def test_metric_lengths(self):
+        for parts, stock, kerf in (("1 A 6m", "1 6m", 0.0), ("3 A 1000mm", "1 3000mm", 0.0),
+                                   ("40 A 733mm\n9 B 1.2m", "5 6m\n2 4000mm", 3 / 25.4)):
+            demand, inventory = parse_demand(parts), parse_inventory(stock)
+            bins, uncut = optimize_demand(demand, inventory, kerf)
+            self.assertEqual((bins, uncut), place_demand(demand, inventory, kerf, 'ffd'))
+        bins, uncut = optimize_demand(parse_demand("3 A 1000mm"), parse_inventory("1 3000mm"))
+        self.assertEqual((len(bins[0]['parts']), uncut), (3, []))
+        self.assertAlmostEqual(bins[0]['remaining'], 0.0)
+
+    def test_progress(self):
+        seen = []
+        demand = parse_demand("3 A 5'\n1 B 2'")
+        place_demand_ticks(demand, parse_inventory("1 10'"), 0.0, seen.append)
+        self.assertEqual(seen, [0.75, 1.0])
+
+    def test_optimize_demand_uses_ticks(self):
+        demand = parse_demand("3 A 5'")
+        inventory = parse_inventory("1 10'\n1 8'")
+        bins, uncut = optimize_demand(demand, inventory, 0.125)
+        self.assertEqual(len(bins[0]['parts']), 1)
+        self.assertEqual(len(bins[1]['parts']), 1)
+        self.assertEqual(len(uncut), 1)
+        self.assertEqual(bins[0]['remaining'], 120 - 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
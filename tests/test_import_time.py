@@ -0,0 +1,70 @@
+import unittest
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Modules that must not be loaded just by importing an entry point, and the
+# cumulative import time it may take. Wall-clock budgets are noisy on loaded
+# machines, so they are only checked when IMPORT_BUDGET_SCALE is set, scaled
+# by its value; they catch an eager heavy import, not small drifts.
+ENTRY_POINTS = {
+    'app.cut_optimizer_app': (
+        ('numpy', 'reportlab', 'mysql', 'multiprocessing', 'forgecore'), 1.5
+    ),
+    'app.metrics': (('flask', 'numpy', 'forgecore'), 0.3),
+    'common.placement': (('flask', 'numpy', 'app', 'forgecore'), 0.3),
+    'common.lengths': (('flask', 'numpy', 'app', 'forgecore'), 0.3),
+    'common.metrics': (('flask', 'numpy', 'app', 'forgecore'), 0.3),
+    'benchmarks.workload': (('flask', 'numpy'), 0.3),
+    'forgecore.config.config': (('mysql', 'app'), 0.3),
+    'forgecore.backend.cutlist_optimizer.main': (('mysql', 'flask', 'app'), 0.3),
+    'forgecore.backend.drawing_parser.main': (('mysql', 'flask', 'app'), 0.3),
+    'forgecore.backend.label_printer.main': (('mysql', 'flask', 'app'), 0.3),
+    'forgecore.backend.agent_api.main': (('mysql', 'flask', 'app'), 0.5),
+}
+
+
+def import_profile(module: str):
+    """Import ``module`` in a fresh interpreter.
+
+    Returns the set of loaded module names and the cumulative import time
+    of ``module`` in seconds, as reported by ``-X importtime``.
+    """
+    code = f"import sys, {module}; print('\\n'.join(sys.modules))"
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    cumulative = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cum, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        if name == module and cum.isdigit():
+            cumulative = int(cum)
+    return set(proc.stdout.split()), cumulative / 1e6
+
+
+class TestImportTime(unittest.TestCase):
+    def test_entry_points(self):
+        for module, (forbidden, _) in ENTRY_POINTS.items():
+            with self.subTest(module=module):
+                loaded, _ = import_profile(module)
+                for name in forbidden:
+                    self.assertNotIn(name, loaded, f'{module} imports {name} eagerly')
+
+    @unittest.skipUnless(os.environ.get('IMPORT_BUDGET_SCALE'),
+                         'set IMPORT_BUDGET_SCALE to check import-time budgets')
+    def test_budgets(self):
+        scale = float(os.environ['IMPORT_BUDGET_SCALE'])
+        for module, (_, budget) in ENTRY_POINTS.items():
+            with self.subTest(module=module):
+                _, seconds = import_profile(module)
+                self.assertGreater(seconds, 0)
+                self.assertLess(seconds, budget * scale)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.cut_optimizer_app import app, parse_demand_csv, parse_inventory_csv
+from app.ingest import iter_csv_chunks
+
+
+class TestIngest(unittest.TestCase):
+    def test_binary_stream_in_chunks(self):
+        data = "qty,mark,length\n" + "".join(f"1,M{i},{i + 1}\n" for i in range(10))
+        chunks = list(iter_csv_chunks(io.BytesIO(data.encode()), 'Parts CSV', chunk_rows=4))
+        self.assertEqual([first for first, _ in chunks], [1, 5, 9])
+        self.assertEqual([len(rows) for _, rows in chunks], [4, 4, 2])
+        self.assertEqual(chunks[2][1][1]['mark'], 'M9')
+
+    def test_aggregates_across_chunks(self):
+        data = "qty,mark,length\n" + "2,A,5'\n" * 10000
+        demand = parse_demand_csv(io.BytesIO(data.encode()))
+        self.assertEqual(len(demand), 1)
+        self.assertEqual(demand[0].qty, 20000)
+
+    def test_error_row_after_first_chunk(self):
+        data = "qty,length\n" + "1,10'\n" * 5000 + "1,bad\n"
+        with self.assertRaises(ValueError) as ctx:
+            parse_inventory_csv(io.BytesIO(data.encode()))
+        self.assertIn("row 5001", str(ctx.exception))
+
+    def test_row_limit(self):
+        data = "qty,length\n" + "1,10'\n" * 11
+        with self.assertRaises(ValueError) as ctx:
+            parse_inventory_csv(io.BytesIO(data.encode()), max_rows=10)
+        self.assertIn("more than 10 rows", str(ctx.exception))
+        self.assertEqual(len(parse_inventory_csv(io.StringIO(data), max_rows=11)), 11)
+
+    def test_byte_limit(self):
+        data = "qty,mark,length\n" + "1,A,5'\n" * 100000
+        with self.assertRaises(ValueError) as ctx:
+            parse_demand_csv(io.BytesIO(data.encode()), max_bytes=1024)
+        self.assertIn("larger than 1024 bytes", str(ctx.exception))
+        with self.assertRaises(ValueError):
+            parse_demand_csv(io.StringIO(data), max_bytes=1024)
+
+    def test_invalid_utf8(self):
+        with self.assertRaises(ValueError):
+            parse_demand_csv(io.BytesIO(b"qty,mark,length\n1,\xff,5'\n"))
+
+    def test_upload_route(self):
+        client = app.test_client()
+        resp = client.post(
+            '/optimize',
+            data={
+                'parts_file': (io.BytesIO(b"qty,mark,length\n1,A,8'\n"), 'parts.csv'),
+                'stock_file': (io.BytesIO(b"qty,length\n1,10'\n"), 'stock.csv'),
+            },
+            content_type='multipart/form-data',
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b'20.0%', resp.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from forgecore.backend.job_summary.main import JobSummary
+from forgecore.backend.job_tracker.main import JobTracker
+from forgecore.backend.report_engine.main import ReportEngine
+from fakedb import SQLiteConnection
+
+
+class TestJobSummary(unittest.TestCase):
+    def setUp(self):
+        self.cnx = SQLiteConnection()
+        self.cnx.run("INSERT INTO jobs (id, name) VALUES (?, ?)", [(1, 'Mill'), (2, 'Canopy')])
+        self.cnx.run(
+            "INSERT INTO materials (id, length_inches, source, is_remnant, job_id) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(10, 240, None, 0, None), (13, 100, 'offcut', 1, 1)],
+        )
+        self.cnx.run(
+            "INSERT INTO cut_parts (part_length_inches, material_id, job_id) VALUES (?, ?, ?)",
+            [(100, 10, 1), (40, 10, 1), (300, None, 1)],
+        )
+        # Job 1 missed the unassigned part, job 2 has no row, job 9 is stale.
+        self.cnx.run(
+            "INSERT INTO job_summary (job_id, part_count, total_inches, assigned_count, "
+            "used_inches, stock_inches, remnant_count, remnant_inches, scrap_inches) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(1, 2, 140, 2, 140, 240, 1, 100, 0), (9, 1, 10, 0, 0, 0, 0, 0, 0)],
+        )
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        summary = JobSummary(cnx=self.cnx)
+        drift = summary.reconcile(fix=False)
+        self.assertIn((1, 'part_count', 2, 3), drift)
+        self.assertIn((1, 'total_inches', 140, 440), drift)
+        self.assertIn((2, 'part_count', None, 0), drift)
+        self.assertIn((9, 'part_count', 1, 0), drift)
+        self.assertEqual(summary.get([1])[1]['part_count'], 2)
+
+        self.assertEqual(summary.reconcile(), drift)
+        self.assertEqual(summary.reconcile(fix=False), [])
+        self.assertEqual(sorted(summary.get()), [1, 2])
+        self.assertEqual(summary.get([1])[1]['scrap_inches'], 0)
+        self.assertEqual(summary.get([]), {})
+
+    def test_create_job_adds_summary_row(self):
+        job_id = JobTracker(cnx=self.cnx).create_job('Gantry')
+        self.assertEqual(job_id, 3)
+        self.assertEqual(sorted(JobSummary(cnx=self.cnx).get()), [1, 3, 9])
+
+    def test_summary_report_matches_jobs_report(self):
+        JobSummary(cnx=self.cnx).reconcile()
+        engine = ReportEngine(cnx=self.cnx)
+        self.assertEqual(engine.summary_report(), engine.jobs_report())
+        self.assertEqual(engine.summary_report([2]), engine.jobs_report([2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
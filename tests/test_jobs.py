@@ -0,0 +1,113 @@
+import unittest
+import os
+import sys
+import time
+from concurrent.futures import Future
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import app.cut_optimizer_app as cut_optimizer_app
+from app.jobs import Job, JobQueue
+
+
+def square(progress, x):
+    progress(0.5)
+    return x * x
+
+
+def fail(progress):
+    raise ValueError("bad input")
+
+
+def wait_for(queue, job_id, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = queue.status(job_id)
+        if status['status'] in ('done', 'failed'):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.queue = JobQueue(max_workers=1, max_jobs=2)
+        self.addCleanup(self.queue.shutdown)
+
+    def test_result_and_status(self):
+        job_id = self.queue.submit(square, 7, context='ctx')
+        status = wait_for(self.queue, job_id)
+        self.assertEqual(status, {'status': 'done', 'progress': 1.0, 'error': None})
+        job = self.queue.get(job_id)
+        self.assertEqual(job.future.result(), 49)
+        self.assertEqual(job.context, 'ctx')
+        self.assertIsNone(self.queue.status('missing'))
+
+    def test_failure(self):
+        job_id = self.queue.submit(fail)
+        status = wait_for(self.queue, job_id)
+        self.assertEqual(status['status'], 'failed')
+        self.assertEqual(status['error'], 'bad input')
+
+    def test_forgets_old_finished_jobs(self):
+        ids = [self.queue.submit(square, i) for i in range(3)]
+        for job_id in ids:
+            wait_for(self.queue, job_id)
+        self.queue.submit(square, 3)
+        self.assertIsNone(self.queue.get(ids[0]))
+
+
+class TestJobRoutes(unittest.TestCase):
+    def setUp(self):
+        self.saved = cut_optimizer_app.ASYNC_MIN_PIECES, cut_optimizer_app.JOBS
+        cut_optimizer_app.ASYNC_MIN_PIECES = 10
+        cut_optimizer_app.JOBS = JobQueue(max_workers=1)
+        self.addCleanup(self.restore)
+
+    def restore(self):
+        cut_optimizer_app.JOBS.shutdown()
+        cut_optimizer_app.ASYNC_MIN_PIECES, cut_optimizer_app.JOBS = self.saved
+
+    def test_large_input_runs_as_job(self):
+        client = cut_optimizer_app.app.test_client()
+        data = {'parts': '20 A 3\'\n7 B 2\' 6"', 'stock': "4 20'", 'kerf_width': '1/8',
+                'shape': 'HSS4x4'}
+        resp = client.post('/optimize', data=data)
+        self.assertEqual(resp.status_code, 202)
+        job_id = next(iter(cut_optimizer_app.JOBS._jobs))
+        self.assertIn(job_id, resp.get_data(as_text=True))
+        wait_for(cut_optimizer_app.JOBS, job_id)
+        self.assertEqual(client.get(f'/jobs/{job_id}').get_json()['status'], 'done')
+        resp = client.get(f'/jobs/{job_id}/result')
+        self.assertEqual(resp.status_code, 200)
+        html = resp.get_data(as_text=True)
+        self.assertIn('HSS4x4', html)
+        self.assertIn("2&#39; 6&#34;", html)
+
+        # The finished job seeded the plan cache, so a resubmission is inline.
+        self.assertEqual(client.post('/optimize', data=data).status_code, 200)
+
+    def test_small_input_stays_inline(self):
+        client = cut_optimizer_app.app.test_client()
+        resp = client.post('/optimize', data={'parts': "1 A 3'", 'stock': "1 20'"})
+        self.assertEqual(resp.status_code, 200)
+
+    def test_failed_job_result(self):
+        future = Future()
+        future.set_exception(RuntimeError('worker died'))
+        context = {'shape': 'HSS4x4'}
+        cut_optimizer_app.JOBS._jobs['broken'] = Job('broken', future, context, time.time())
+        client = cut_optimizer_app.app.test_client()
+        with self.assertLogs(cut_optimizer_app.app.logger, 'ERROR'):
+            resp = client.get('/jobs/broken/result')
+        self.assertEqual(resp.status_code, 500)
+        self.assertIn('Optimization job failed: worker died', resp.get_data(as_text=True))
+        self.assertEqual(client.get('/jobs/broken').get_json()['status'], 'failed')
+
+    def test_unknown_job(self):
+        client = cut_optimizer_app.app.test_client()
+        self.assertEqual(client.get('/jobs/missing').status_code, 404)
+        self.assertEqual(client.get('/jobs/missing/result').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
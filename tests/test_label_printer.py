@@ -0,0 +1,100 @@
+import unittest
+import io
+import os
+import re
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from forgecore.backend.label_printer.main import LabelPrinter
+from fakedb import RecordingConnection, SQLiteConnection
+
+
+def labels_db(rows):
+    """Serve ``rows()`` lazily, like a server-side cursor."""
+    return RecordingConnection(lambda sql, params: rows())
+
+
+class CountingSink:
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+
+
+def job_rows():
+    # Stick 10 holds parts 3 and 1, remnant 20 holds part 2, part 4 is uncut.
+    return [(3, 100, 10, 240, 0), (1, 60, 10, 240, 0), (2, 30, 20, 45, 1), (4, 300, None, None, None)]
+
+
+class TestLabelPrinter(unittest.TestCase):
+    def test_labels_in_stick_order(self):
+        cnx = labels_db(job_rows)
+        labels = list(LabelPrinter(cnx=cnx).iter_labels(7))
+        self.assertIs(cnx.cursors[0].options['buffered'], False)
+        self.assertIn('ORDER BY c.material_id IS NULL, c.material_id', cnx.log[0][1])
+        self.assertEqual(labels[0], ("8' 4\"", ['Job 7   Part 3', "Stick 1 (#10, 20')   Cut 1"]))
+        self.assertEqual(labels[1][1][1], "Stick 1 (#10, 20')   Cut 2")
+        self.assertEqual(labels[2][1][1], 'Remnant 2 (#20, 3\' 9")   Cut 1')
+        self.assertEqual(labels[3][1], ['Job 7   Part 4', 'Unassigned'])
+        self.assertEqual(cnx.closed, 1)
+
+    def test_labels_from_database(self):
+        cnx = SQLiteConnection()
+        cnx.run("INSERT INTO jobs (id, name) VALUES (?, ?)", [(7, 'Mill')])
+        cnx.run("INSERT INTO materials (id, length_inches, is_remnant) VALUES (?, ?, ?)",
+                [(10, 240, 0), (20, 45, 1)])
+        cnx.run("INSERT INTO cut_parts (id, part_length_inches, material_id, job_id) "
+                "VALUES (?, ?, ?, ?)",
+                [(1, 60, 10, 7), (2, 30, 20, 7), (3, 100, 10, 7), (4, 300, None, 7),
+                 (5, 10, 10, 8)])
+        expected = list(LabelPrinter(cnx=labels_db(job_rows)).iter_labels(7))
+        self.assertEqual(list(LabelPrinter(cnx=cnx).iter_labels(7)), expected)
+
+    def test_pdf_is_well_formed(self):
+        out = io.BytesIO()
+        count = LabelPrinter(cnx=labels_db(job_rows)).write_labels(7, out)
+        self.assertEqual(count, 4)
+        data = out.getvalue()
+        self.assertTrue(data.startswith(b'%PDF-1.4'))
+        self.assertTrue(data.endswith(b'%%EOF\n'))
+        self.assertIn(b'/Count 4', data)
+        self.assertIn(b"(8' 4\") Tj", data)
+        xref = int(re.search(rb'startxref\n(\d+)', data).group(1))
+        self.assertTrue(data[xref:].startswith(b'xref\n0 13\n'))
+        offsets = re.findall(rb'(\d{10}) 00000 n ', data[xref:])
+        self.assertEqual(len(offsets), 12)
+        for number, offset in enumerate(offsets, 1):
+            self.assertTrue(data[int(offset):].startswith(b'%d 0 obj' % number))
+
+    def test_zpl(self):
+        out = io.BytesIO()
+        count = LabelPrinter(cnx=labels_db(job_rows)).write_labels(7, out, 'zpl')
+        self.assertEqual(count, 4)
+        labels = out.getvalue().split(b'\n')[:-1]
+        self.assertEqual(len(labels), 4)
+        self.assertTrue(all(label.startswith(b'^XA') and label.endswith(b'^XZ') for label in labels))
+        self.assertIn(b'^FDUnassigned^FS', labels[3])
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            LabelPrinter(cnx=labels_db(job_rows)).write_labels(7, io.BytesIO(), 'png')
+
+    def test_memory_is_flat(self):
+        def many(n):
+            return lambda: ((i, 10 + i % 200, i // 8, 240, 0) for i in range(n))
+
+        peaks = []
+        for n in (1_000, 10_000):
+            cnx = labels_db(many(n))
+            tracemalloc.start()
+            LabelPrinter(cnx=cnx).write_labels(7, CountingSink())
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        # Ten times the labels; only the 8-byte object offsets grow.
+        self.assertLess(peaks[1] - peaks[0], 9_000 * 2 * 8 + 64 * 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
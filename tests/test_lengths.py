@@ -0,0 +1,48 @@
+import unittest
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.cut_optimizer_app import parse_demand_csv, parse_inventory_csv
+from common.lengths import LengthError, parse_length_cache_info, parse_lengths
+
+
+class TestParseLengths(unittest.TestCase):
+    def test_batch_matches_single(self):
+        values = ["11' 9 15/16\"", "7' 6", "100mm", "7' 6", "18 3/8"]
+        self.assertEqual(
+            list(parse_lengths(values)),
+            [141.9375, 90.0, 100 / 25.4, 90.0, 18.375],
+        )
+
+    def test_each_unique_value_parsed_once(self):
+        before = parse_length_cache_info()
+        values = ["987 13/16"] * 5000 + ["986 13/16"] * 5000
+        lengths = parse_lengths(values)
+        after = parse_length_cache_info()
+        self.assertEqual(len(lengths), 10000)
+        self.assertEqual(after.misses - before.misses, 2)
+        parse_lengths(values)
+        self.assertEqual(parse_length_cache_info().misses, after.misses)
+
+    def test_error_reports_row(self):
+        with self.assertRaises(LengthError) as ctx:
+            parse_lengths(["5'", "6'", "x/y", "6'", "1/0"], start=1)
+        self.assertEqual(ctx.exception.row, 3)
+        self.assertEqual(ctx.exception.value, "x/y")
+        with self.assertRaises(ValueError) as ctx:
+            parse_lengths(["5'", "-2"], positive=True)
+        self.assertIn("row 1", str(ctx.exception))
+
+    def test_csv_errors_report_row(self):
+        with self.assertRaises(ValueError) as ctx:
+            parse_demand_csv(io.StringIO("qty,mark,length\n1,A,5'\n2,B,oops\n"))
+        self.assertIn("row 2", str(ctx.exception))
+        with self.assertRaises(ValueError) as ctx:
+            parse_inventory_csv(io.StringIO("qty,length\n1,10'\n0,10'\n"))
+        self.assertIn("row 2", str(ctx.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
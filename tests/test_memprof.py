@@ -0,0 +1,73 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import app.cut_optimizer_app as cut_optimizer_app
+from app import memprof
+from app.metrics import stage
+
+
+class TestMemprof(unittest.TestCase):
+    def test_stages(self):
+        profile = memprof.start('unit')
+        self.assertIs(memprof.active(), profile)
+        self.assertIsNone(memprof.start('other'))
+        with stage('outer'):
+            with stage('inner'):
+                blob = [bytes(1000) for _ in range(2000)]
+                del blob
+            kept = bytearray(3_000_000)
+        report = profile.finish()
+        self.assertIsNone(memprof.active())
+        self.assertFalse(tracemalloc.is_tracing())
+        inner, outer = report['stages']
+        self.assertEqual((inner['stage'], outer['stage']), ('inner', 'outer'))
+        self.assertGreater(inner['peak_bytes'], 2_000_000)
+        self.assertLess(inner['net_bytes'], 100_000)
+        self.assertGreaterEqual(outer['peak_bytes'], inner['peak_bytes'])
+        self.assertGreater(outer['net_bytes'], 3_000_000)
+        self.assertIn('test_memprof.py', outer['top'][0]['site'])
+        self.assertGreaterEqual(report['peak_bytes'], outer['peak_bytes'])
+        self.assertIn('outer: peak', memprof.format_report(report))
+        del kept
+
+    def test_off_by_default(self):
+        self.assertEqual(cut_optimizer_app.MEMORY_PROFILE, '')
+        client = cut_optimizer_app.app.test_client()
+        resp = client.post('/optimize', data={'parts': "2 A 5'", 'stock': "1 20'"},
+                           headers={'X-Memory-Profile': '1'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_header_mode_dumps_report(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        for name, value in (('MEMORY_PROFILE', 'header'), ('MEMORY_PROFILE_DIR', tmp.name)):
+            self.addCleanup(setattr, cut_optimizer_app, name, getattr(cut_optimizer_app, name))
+            setattr(cut_optimizer_app, name, value)
+        client = cut_optimizer_app.app.test_client()
+        # No header, no profile. This also keeps first-use imports out of the trace.
+        resp = client.post('/optimize', data={'parts': "4 N 3'", 'stock': "1 20'"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(os.listdir(tmp.name), [])
+
+        with self.assertLogs(cut_optimizer_app.app.logger, 'WARNING') as logs:
+            resp = client.post('/optimize', data={'parts': "4 M 3'", 'stock': "1 20'"},
+                               headers={'X-Memory-Profile': '1'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('memory profile POST /optimize', logs.output[0])
+        files = os.listdir(tmp.name)
+        self.assertEqual(len(files), 1)
+        with open(os.path.join(tmp.name, files[0]), encoding='utf-8') as fh:
+            report = json.load(fh)
+        stages = [entry['stage'] for entry in report['stages']]
+        for name in ('parse', 'optimize', 'layout', 'render'):
+            self.assertIn(name, stages)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import app.cut_optimizer_app as cut_optimizer_app
+from app.metrics import (
+    Registry,
+    STAGE_SECONDS,
+    collect_server_timing,
+    server_timing_header,
+    stage,
+)
+
+
+class TestMetrics(unittest.TestCase):
+    def test_render(self):
+        registry = Registry()
+        hits = registry.counter('hits_total', 'Hits.')
+        hits.inc(path='/a')
+        hits.inc(2, path='/a')
+        hits.inc(path='/b"')
+        latency = registry.histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0))
+        latency.observe(0.05, path='/a')
+        latency.observe(0.5, path='/a')
+        latency.observe(5.0, path='/a')
+        lines = registry.render().splitlines()
+        self.assertIn('# TYPE hits_total counter', lines)
+        self.assertIn('hits_total{path="/a"} 3', lines)
+        self.assertIn('hits_total{path="/b\\""} 1', lines)
+        self.assertIn('# TYPE latency_seconds histogram', lines)
+        self.assertIn('latency_seconds_bucket{path="/a",le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{path="/a",le="1.0"} 2', lines)
+        self.assertIn('latency_seconds_bucket{path="/a",le="+Inf"} 3', lines)
+        self.assertIn('latency_seconds_sum{path="/a"} 5.55', lines)
+        self.assertIn('latency_seconds_count{path="/a"} 3', lines)
+
+    def test_kind_conflict(self):
+        registry = Registry()
+        registry.counter('x', 'X.')
+        with self.assertRaises(ValueError):
+            registry.histogram('x', 'X.')
+        with self.assertRaises(ValueError):
+            registry.gauge('x', 'X.')
+
+    def test_gauge(self):
+        registry = Registry()
+        gauge = registry.gauge('busy', 'Busy.')
+        gauge.inc(3)
+        gauge.dec()
+        self.assertEqual(gauge.value(), 2)
+        gauge.set(7)
+        self.assertIn('# TYPE busy gauge\nbusy 7', registry.render())
+
+    def test_stage(self):
+        before = STAGE_SECONDS.count(stage='unit')
+        entries = collect_server_timing()
+        with stage('unit'):
+            pass
+        collect_server_timing(False)
+        self.assertEqual(STAGE_SECONDS.count(stage='unit'), before + 1)
+        self.assertEqual([name for name, _ in entries], ['unit'])
+        self.assertEqual(server_timing_header([('parse', 0.0125)]), 'parse;dur=12.50')
+
+    def test_metrics_route(self):
+        client = cut_optimizer_app.app.test_client()
+        resp = client.post('/optimize', data={'parts': "2 A 5'", 'stock': "1 20'"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn('Server-Timing', resp.headers)
+        resp = client.get('/metrics')
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.content_type.startswith('text/plain'))
+        text = resp.get_data(as_text=True)
+        self.assertIn('bladeplan_request_seconds_count{endpoint="optimize",status="200"}', text)
+        for name in ('parse', 'optimize', 'layout', 'render'):
+            self.assertIn(f'bladeplan_stage_seconds_count{{stage="{name}"}}', text)
+        self.assertIn('bladeplan_parts_total', text)
+        self.assertIn('bladeplan_sticks_total', text)
+
+    def test_server_timing_header(self):
+        saved = cut_optimizer_app.SERVER_TIMING
+        cut_optimizer_app.SERVER_TIMING = True
+        self.addCleanup(setattr, cut_optimizer_app, 'SERVER_TIMING', saved)
+        client = cut_optimizer_app.app.test_client()
+        resp = client.post('/optimize', data={'parts': "3 B 4'", 'stock': "1 20'"})
+        # Fresh input, so the optimize stage isn't skipped by the plan cache.
+        header = resp.headers['Server-Timing']
+        names = [entry.split(';')[0] for entry in header.split(', ')]
+        self.assertEqual(names[-1], 'total')
+        for name in ('parse', 'optimize', 'layout', 'render'):
+            self.assertIn(name, names)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.cut_optimizer_app import optimize_cuts, app
+from common.placement import BestFitIndex, place_parts, place_runs, place_runs_remnant_first
+
+
+def linear_ffd(parts, stocks, kerf_width=0.0):
+    """Reference First-Fit Decreasing scan the indexed engine must match."""
+    bins = [
+        {'stock_length': s['length'], 'stock_str': s['length_str'],
+         'remaining': s['length'], 'parts': []}
+        for s in stocks
+    ]
+    uncut = []
+    for part in sorted(parts, key=lambda p: -p['length']):
+        for b in bins:
+            required = part['length']
+            if b['parts']:
+                required += kerf_width
+            if required <= b['remaining']:
+                b['parts'].append(part)
+                b['remaining'] -= required
+                break
+        else:
+            uncut.append(part)
+    return bins, uncut
+
+
+def random_job(rng, n_parts, n_stocks):
+    parts = [
+        {'mark': f"P{i}", 'length': rng.randint(8, 400) + rng.randint(0, 15) / 16,
+         'length_str': ''}
+        for i in range(n_parts)
+    ]
+    stocks = [
+        {'length': float(rng.choice([240, 288, 480, 576])), 'length_str': ''}
+        for _ in range(n_stocks)
+    ]
+    stocks.sort(key=lambda x: -x['length'])
+    return parts, stocks
+
+
+class TestPlacement(unittest.TestCase):
+    def test_ffd_matches_linear_scan(self):
+        rng = random.Random(1234)
+        for kerf in (0.0, 0.125, 0.1):
+            for _ in range(20):
+                parts, stocks = random_job(rng, rng.randint(1, 120), rng.randint(1, 40))
+                self.assertEqual(
+                    optimize_cuts(parts, stocks, kerf),
+                    linear_ffd(parts, stocks, kerf),
+                )
+
+    def test_bfd_prefers_tightest_stick(self):
+        parts = [
+            {'mark': 'A', 'length': 60, 'length_str': "5'"},
+            {'mark': 'B', 'length': 40, 'length_str': "40"},
+        ]
+        stocks = [
+            {'length': 120, 'length_str': "10'"},
+            {'length': 100, 'length_str': "100"},
+        ]
+        bins, uncut = place_parts(parts, stocks, strategy='bfd')
+        self.assertEqual(uncut, [])
+        self.assertEqual([p['mark'] for p in bins[1]['parts']], ['A', 'B'])
+        self.assertEqual(bins[0]['parts'], [])
+        self.assertAlmostEqual(bins[1]['remaining'], 0)
+
+    def test_bfd_kerf_and_uncut(self):
+        parts = [
+            {'mark': 'A', 'length': 50, 'length_str': "50"},
+            {'mark': 'B', 'length': 50, 'length_str': "50"},
+        ]
+        stock = [{'length': 100, 'length_str': "100"}]
+        bins, uncut = place_parts(parts, stock, kerf_width=0.125, strategy='bfd')
+        self.assertEqual(len(uncut), 1)
+        self.assertEqual(len(bins[0]['parts']), 1)
+
+    def test_bfd_places_every_part_that_fits(self):
+        rng = random.Random(99)
+        for _ in range(20):
+            parts, stocks = random_job(rng, 80, 30)
+            bins, uncut = place_parts(parts, stocks, 0.125, strategy='bfd')
+            placed = sum(len(b['parts']) for b in bins)
+            self.assertEqual(placed + len(uncut), len(parts))
+            for b in bins:
+                self.assertGreaterEqual(b['remaining'], -1e-9)
+
+    def test_progress(self):
+        parts = [{'mark': 'A', 'length': 10}] * 3 + [{'mark': 'B', 'length': 5}]
+        stocks = [{'length': 40, 'length_str': '40'}]
+        for strategy in ('ffd', 'bfd'):
+            seen = []
+            place_parts(parts, stocks, 0.0, strategy, seen.append)
+            self.assertEqual(seen, [0.75, 1.0])
+
+    def test_remnant_first(self):
+        stick = {'length': 240, 'length_str': "20'"}
+        remnants = [{'length': 50, 'length_str': ''}, {'length': 70, 'length_str': ''}]
+        runs = [(100, ['A']), (45, ['B', 'C']), (20, ['D', 'E'])]
+        bins, uncut = place_runs_remnant_first(runs, remnants, [stick, stick], 0.0, 'ffd')
+        self.assertEqual(uncut, [])
+        # B takes the tightest remnant, C the other, A opens the first stick.
+        self.assertEqual([b['parts'] for b in bins], [['B'], ['C', 'D'], ['A', 'E'], []])
+        plain, _ = place_runs(runs, [stick, stick], 0.0, 'ffd')
+        self.assertEqual(plain[0]['parts'], ['A', 'B', 'C', 'D', 'E'])
+
+    def test_remnant_lookup_speed(self):
+        rng = random.Random(5)
+        caps = [float(rng.randint(12, 300)) for _ in range(50_000)]
+        index = BestFitIndex(caps)
+        lengths = [float(rng.randint(12, 300)) for _ in range(5000)]
+        start = time.perf_counter()
+        for length in lengths:
+            i = index.find(length, 0.125)
+            if i >= 0:
+                index.place(i, caps[i] - length)
+        per_lookup = (time.perf_counter() - start) / len(lengths)
+        self.assertLess(per_lookup, 0.001)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            optimize_cuts([], [], strategy='nope')
+
+    def test_optimize_route_strategy(self):
+        client = app.test_client()
+        resp = client.post(
+            '/optimize',
+            data={'parts': "1 A 8'", 'stock': "1 10'", 'strategy': 'bfd'},
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b'20.0%', resp.data)
+        resp = client.post(
+            '/optimize',
+            data={'parts': "1 A 8'", 'stock': "1 10'", 'strategy': 'bogus'},
+        )
+        self.assertEqual(resp.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
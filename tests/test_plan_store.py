@@ -0,0 +1,91 @@
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.cut_optimizer_app import render_report
+from app.plan_store import PlanStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPlanStore(unittest.TestCase):
+    def test_lru_eviction(self):
+        store = PlanStore(max_plans=2)
+        a = store.add('a')
+        b = store.add('b')
+        self.assertEqual(store.get(a), 'a')
+        c = store.add('c')
+        self.assertIsNone(store.get(b))
+        self.assertEqual(store.get(a), 'a')
+        self.assertEqual(store.get(c), 'c')
+        self.assertEqual(len(store), 2)
+
+    def test_ttl(self):
+        clock = FakeClock()
+        store = PlanStore(ttl=10.0, clock=clock)
+        plan_id = store.add('plan')
+        clock.now = 9.0
+        self.assertEqual(store.get(plan_id), 'plan')
+        clock.now = 10.0
+        self.assertIsNone(store.get(plan_id))
+        self.assertIsNone(store.report(plan_id, 'txt', lambda p, f: b'x'))
+
+    def test_report_rendered_once(self):
+        store = PlanStore()
+        calls = []
+
+        def render(plan, fmt):
+            calls.append(fmt)
+            return f"{plan}.{fmt}".encode()
+
+        plan_id = store.add('plan')
+        self.assertEqual(store.report(plan_id, 'csv', render), b'plan.csv')
+        self.assertEqual(store.report(plan_id, 'csv', render), b'plan.csv')
+        self.assertEqual(store.report(plan_id, 'txt', render), b'plan.txt')
+        self.assertEqual(calls, ['csv', 'txt'])
+        self.assertIsNone(store.report('missing', 'csv', render))
+
+    def test_report_byte_bound(self):
+        store = PlanStore(max_report_bytes=10)
+        calls = []
+
+        def render(plan, fmt):
+            calls.append(fmt)
+            return b'x' * 6
+
+        plan_id = store.add('plan')
+        store.report(plan_id, 'csv', render)
+        store.report(plan_id, 'txt', render)
+        store.report(plan_id, 'txt', render)
+        store.report(plan_id, 'csv', render)
+        self.assertEqual(calls, ['csv', 'txt', 'csv'])
+        self.assertLessEqual(store._report_bytes, 10)
+
+    def test_render_report_formats(self):
+        plan = {
+            'bins': [{
+                'stock_length': 120,
+                'stock_str': "10'",
+                'used': 120,
+                'remaining': 0,
+                'parts': [{'mark': 'A', 'length': 120, 'length_str': "10'"}],
+            }],
+            'uncut': [],
+            'kerf_width': 0.0,
+            'shape': 'W8x10',
+        }
+        self.assertTrue(render_report(plan, 'pdf').startswith(b'%PDF'))
+        self.assertIn(b'A', render_report(plan, 'csv'))
+        self.assertIn(b'W8x10', render_report(plan, 'json'))
+        self.assertIn(b'W8x10', render_report(plan, 'txt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import app.plan_stream as plan_stream
+from app.cut_optimizer_app import app, parse_demand, parse_inventory, plan_demand
+from app.plan_stream import iter_plan_ndjson
+
+
+def read_ndjson(data: bytes):
+    return [json.loads(line) for line in data.decode().splitlines()]
+
+
+class TestPlanStream(unittest.TestCase):
+    def test_records(self):
+        bins, uncut, _, _ = plan_demand(parse_demand("3 A 5'\n1 B 30'"), parse_inventory("2 20'"))
+        records = read_ndjson(b''.join(iter_plan_ndjson(bins, uncut, {'total_stock': 480.0})))
+        self.assertEqual([r['type'] for r in records], ['stick', 'uncut', 'summary'])
+        stick = records[0]
+        self.assertEqual(stick['stock_length'], 240.0)
+        self.assertEqual(stick['stock_length_str'], "20'")
+        self.assertEqual(stick['parts'], [{'mark': 'A', 'length': 60.0, 'length_str': "5'", 'qty': 3}])
+        self.assertEqual(records[1]['parts'], [{'mark': 'B', 'length': 360.0, 'length_str': "30'", 'qty': 1}])
+        self.assertEqual(records[2]['total_stock_str'], "40'")
+
+    def test_chunks(self):
+        bins, uncut, _, _ = plan_demand(parse_demand("400 A 5'"), parse_inventory("400 10'"))
+        saved = plan_stream.CHUNK_BYTES
+        plan_stream.CHUNK_BYTES = 1024
+        self.addCleanup(setattr, plan_stream, 'CHUNK_BYTES', saved)
+        chunks = list(iter_plan_ndjson(bins, uncut, {}))
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(c.endswith(b'\n') for c in chunks))
+        self.assertEqual(len(read_ndjson(b''.join(chunks))), 200 + 2)
+
+    def test_api_optimize(self):
+        client = app.test_client()
+        resp = client.post('/api/optimize', json={
+            'parts': [{'mark': 'A', 'length': "5'", 'qty': 3}, {'mark': 'B', 'length': 30}],
+            'stock': [{'length': "10' 1\"", 'qty': 2}],
+            'kerf_width': '1/8',
+            'shape': 'L3x3',
+        })
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.mimetype, 'application/x-ndjson')
+        records = read_ndjson(resp.data)
+        summary = records[-1]
+        self.assertEqual(summary['type'], 'summary')
+        self.assertEqual(summary['sticks'], 2)
+        self.assertEqual(summary['uncut'], 0)
+        self.assertEqual(summary['shape'], 'L3x3')
+        self.assertEqual(summary['kerf_width'], 0.125)
+        self.assertEqual(summary['kerf_width_str'], '0 1/8"')
+        self.assertEqual(sum(p['qty'] for r in records if r['type'] == 'stick' for p in r['parts']), 4)
+
+    def test_api_optimize_errors(self):
+        client = app.test_client()
+        resp = client.post('/api/optimize', data='nope', content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+        resp = client.post('/api/optimize', json={'parts': [{'length': 'x'}], 'stock': []})
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("parts item 1", resp.get_json()['error'])
+        resp = client.post('/api/optimize', json={'parts': [{'length': 5, 'qty': 0}]})
+        self.assertIn("Invalid quantity 0", resp.get_json()['error'])
+        resp = client.post('/api/optimize', json={'parts': [], 'strategy': 'nope'})
+        self.assertIn("Unknown optimization strategy", resp.get_json()['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
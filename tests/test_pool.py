@@ -0,0 +1,161 @@
+import unittest
+from unittest import mock
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import forgecore.config.config as config
+from forgecore.config.config import LazyPool, PoolExhausted, pooled
+from forgecore.backend.report_engine.main import ReportEngine
+from forgecore.config.metrics import REGISTRY
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def close(self):
+        self.pool.returned += 1
+
+
+class FakePool:
+    def __init__(self, size):
+        self.size = size
+        self.returned = 0
+        self.handed_out = 0
+
+    def get_connection(self):
+        self.handed_out += 1
+        return FakeConnection(self)
+
+
+class Worker:
+    def __init__(self, cnx=None):
+        self.cnx = cnx
+
+    @pooled
+    def outer(self):
+        return self.cnx, self.inner()
+
+    @pooled
+    def inner(self):
+        return self.cnx
+
+    @pooled
+    def rows(self):
+        yield self.cnx
+        yield self.cnx
+
+
+class TestPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = LazyPool(FakePool, size=2, timeout=0.05)
+        saved = config.POOL
+        config.POOL = self.pool
+        self.addCleanup(setattr, config, 'POOL', saved)
+        self.in_use = config.POOL_IN_USE.value()
+
+    def test_lazy_and_sized(self):
+        self.assertFalse(self.pool.created)
+        with self.pool.connection():
+            pass
+        self.assertEqual(self.pool.get().size, 2)
+
+    def test_checkout_and_return(self):
+        checkouts = config.POOL_CHECKOUTS.value()
+        with self.pool.connection() as cnx:
+            self.assertIsInstance(cnx, FakeConnection)
+            self.assertEqual(config.POOL_IN_USE.value(), self.in_use + 1)
+        self.assertEqual(cnx.pool.returned, 1)
+        self.assertEqual(config.POOL_IN_USE.value(), self.in_use)
+        self.assertEqual(config.POOL_CHECKOUTS.value(), checkouts + 1)
+
+    def test_returned_on_error(self):
+        with self.assertRaises(KeyError):
+            with self.pool.connection():
+                raise KeyError
+        self.assertEqual(self.pool.get().returned, 1)
+        self.assertEqual(config.POOL_IN_USE.value(), self.in_use)
+
+    def test_exhaustion_and_waiting(self):
+        exhausted = config.POOL_EXHAUSTED.value()
+        with self.pool.connection(), self.pool.connection():
+            with self.assertRaises(PoolExhausted):
+                with self.pool.connection():
+                    pass
+        self.assertEqual(config.POOL_EXHAUSTED.value(), exhausted + 1)
+
+        # A waiting checkout gets the connection once it is returned.
+        got = []
+        release = threading.Event()
+
+        def hold():
+            with self.pool.connection():
+                release.wait()
+
+        holders = [threading.Thread(target=hold) for _ in range(2)]
+        for t in holders:
+            t.start()
+        waiter = threading.Thread(target=lambda: got.append(self._checkout(timeout=5)))
+        waiter.start()
+        release.set()
+        for t in holders + [waiter]:
+            t.join()
+        self.assertEqual(got, [True])
+        self.assertEqual(config.POOL_IN_USE.value(), self.in_use)
+
+    def _checkout(self, timeout):
+        with self.pool.connection(timeout=timeout):
+            return True
+
+    def test_no_unguarded_checkout(self):
+        self.assertFalse(hasattr(self.pool, 'get_connection'))
+        self.assertFalse(self.pool.created)
+
+    def test_bad_environment_uses_default(self):
+        for size in ('', 'five', '2.5', '0', '-1', '33'):
+            with mock.patch.dict(os.environ, {'FORGECORE_POOL_SIZE': size}):
+                self.assertEqual(config._env_pool_settings(), (5, 30.0))
+        for timeout in ('soon', '0', '-2'):
+            with mock.patch.dict(os.environ, {'FORGECORE_POOL_TIMEOUT': timeout}):
+                self.assertEqual(config._env_pool_settings(), (5, 30.0))
+        with mock.patch.dict(os.environ, {'FORGECORE_POOL_SIZE': '32',
+                                          'FORGECORE_POOL_TIMEOUT': '2.5'}):
+            self.assertEqual(config._env_pool_settings(), (32, 2.5))
+
+    def test_pooled_methods(self):
+        worker = Worker()
+        outer, inner = worker.outer()
+        self.assertIs(outer, inner)
+        self.assertIsNone(worker.cnx)
+        self.assertEqual(self.pool.get().handed_out, 1)
+
+        rows = worker.rows()
+        first = next(rows)
+        self.assertEqual(config.POOL_IN_USE.value(), self.in_use + 1)
+        self.assertIs(next(rows), first)
+        rows.close()
+        self.assertEqual(config.POOL_IN_USE.value(), self.in_use)
+
+    def test_injected_connection_bypasses_pool(self):
+        cnx = object()
+        self.assertEqual(Worker(cnx).outer(), (cnx, cnx))
+        self.assertFalse(self.pool.created)
+
+    def test_many_instances_share_the_pool(self):
+        engines = [ReportEngine() for _ in range(10)]
+        self.assertFalse(self.pool.created)
+        self.assertEqual(len(engines), 10)
+
+    def test_metrics_rendered(self):
+        with self.pool.connection():
+            pass
+        text = REGISTRY.render()
+        self.assertIn('# TYPE forgecore_pool_in_use gauge', text)
+        self.assertIn('forgecore_pool_wait_seconds_count', text)
+        self.assertIn('forgecore_pool_size 2', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import app.cut_optimizer_app as cut_optimizer_app
+from app.cut_optimizer_app import app, optimize_demand, parse_demand, parse_inventory, plan_demand
+from common.placement import place_demand, plan_cost
+import app.portfolio as portfolio_module
+from app.jobs import JobQueue
+from app.portfolio import MEMBERS, Portfolio
+
+# Started in this process before a job forks a worker that uses it too.
+SHARED = Portfolio(max_workers=1, time_limit=0.2, members=('ffd', 'bfd'))
+
+
+def shared_optimize(progress):
+    demand = parse_demand("1 A 7'\n1 B 6'\n1 C 4'")
+    bins, uncut, report = SHARED.optimize(demand, parse_inventory("1 10'\n1 8'\n1 7'"))
+    return report['winner']
+
+
+def broken(demand, inventory, kerf_width, deadline, seed):
+    raise RuntimeError('member crashed')
+
+
+def stalled(demand, inventory, kerf_width, deadline, seed):
+    time.sleep(1.5)
+    raise RuntimeError('member stalled')
+
+
+class TestPortfolio(unittest.TestCase):
+    def setUp(self):
+        # Greedy rules open all three sticks; 6' + 4' on the 10' and 7' on
+        # the 7' needs only two.
+        self.demand = parse_demand("1 A 7'\n1 B 6'\n1 C 4'")
+        self.inventory = parse_inventory("1 10'\n1 8'\n1 7'")
+
+    def check(self, portfolio):
+        bins, uncut, report = portfolio.optimize(self.demand, self.inventory)
+        self.assertEqual(set(report['timings']), set(portfolio.members))
+        self.assertEqual(report['timed_out'], [])
+        best = min(report['costs'].values())
+        self.assertEqual(plan_cost(bins, uncut), best)
+        self.assertEqual(report['costs'][report['winner']], best)
+        ffd = place_demand(self.demand, self.inventory)
+        self.assertLess(plan_cost(bins, uncut), plan_cost(*ffd))
+        self.assertEqual(
+            sorted(p['mark'] for b in bins for p in b['parts']), ['A', 'B', 'C']
+        )
+        # Pieces are the caller's own dicts, not copies from a worker.
+        pieces = {id(d.piece) for d in self.demand}
+        self.assertTrue(all(id(p) in pieces for b in bins for p in b['parts']))
+
+    def test_sequential(self):
+        self.check(Portfolio(max_workers=0, time_limit=0.2))
+
+    def test_process_pool(self):
+        portfolio = Portfolio(max_workers=2, time_limit=0.5)
+        self.addCleanup(portfolio.shutdown)
+        self.check(portfolio)
+
+    def test_app_entry_points_keep_report(self):
+        saved = cut_optimizer_app.PORTFOLIO
+        cut_optimizer_app.PORTFOLIO = Portfolio(max_workers=0, members=('ffd', 'exact'))
+        self.addCleanup(setattr, cut_optimizer_app, 'PORTFOLIO', saved)
+        report = {}
+        bins, uncut = optimize_demand(self.demand, self.inventory, strategy='portfolio',
+                                      report=report)
+        self.assertEqual(report['winner'], 'exact')
+        self.assertEqual(plan_cost(bins, uncut), report['costs']['exact'])
+        *_, report = plan_demand(self.demand, self.inventory, strategy='portfolio')
+        self.assertEqual(report['winner'], 'exact')
+
+    def test_members(self):
+        portfolio = Portfolio(max_workers=0, members=('ffd', 'largest_last', 'exact'))
+        _, _, report = portfolio.optimize(self.demand, self.inventory)
+        self.assertEqual(report['winner'], 'exact')
+        self.assertEqual(report['costs']['ffd'], report['costs']['largest_last'])
+        self.assertIn('restarts', MEMBERS)
+        with self.assertRaises(ValueError):
+            Portfolio(members=('ffd', 'nope'))
+
+    def test_failing_member(self):
+        self.addCleanup(portfolio_module._RUNNERS.pop, 'broken')
+        portfolio_module._RUNNERS['broken'] = broken
+        for workers in (0, 2):
+            portfolio = Portfolio(max_workers=workers, time_limit=0.2,
+                                  members=('broken', 'ffd'))
+            self.addCleanup(portfolio.shutdown)
+            bins, uncut, report = portfolio.optimize(self.demand, self.inventory)
+            self.assertEqual(report['winner'], 'ffd')
+            self.assertEqual(report['failed'], {'broken': 'member crashed'})
+            self.assertEqual(report['timed_out'], [])
+        with self.assertRaisesRegex(RuntimeError, 'member crashed'):
+            Portfolio(max_workers=0, members=('broken',)).optimize(self.demand, self.inventory)
+
+    def test_only_failures_before_stalled_member(self):
+        # The first member is still running when the other one has failed.
+        self.addCleanup(portfolio_module._RUNNERS.pop, 'broken')
+        self.addCleanup(portfolio_module._RUNNERS.pop, 'stalled')
+        portfolio_module._RUNNERS.update(broken=broken, stalled=stalled)
+        saved = portfolio_module._GRACE
+        portfolio_module._GRACE = 0.1
+        self.addCleanup(setattr, portfolio_module, '_GRACE', saved)
+        portfolio = Portfolio(max_workers=2, time_limit=0.1, members=('stalled', 'broken'))
+        self.addCleanup(portfolio.shutdown)
+        with self.assertRaisesRegex(RuntimeError, 'member crashed'):
+            portfolio.optimize(self.demand, self.inventory)
+
+    def test_pool_in_forked_worker(self):
+        # A job worker forked after SHARED started its pool must not reuse it.
+        self.addCleanup(SHARED.shutdown)
+        shared_optimize(None)
+        queue = JobQueue(max_workers=1)
+        self.addCleanup(queue.shutdown)
+        job_id = queue.submit(shared_optimize)
+        deadline = time.monotonic() + 20
+        while queue.status(job_id)['status'] not in ('done', 'failed'):
+            self.assertLess(time.monotonic(), deadline, 'job hung')
+            time.sleep(0.05)
+        self.assertEqual(queue.status(job_id)['status'], 'done')
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs fork')
+    def test_pool_forgotten_after_fork(self):
+        self.addCleanup(SHARED.shutdown)
+        shared_optimize(None)
+        self.assertIsNotNone(SHARED._executor)
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if SHARED._executor is None else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertIsNotNone(SHARED._executor)
+
+    def test_optimize_route(self):
+        client = app.test_client()
+        resp = client.post('/optimize', data={
+            'parts': "1 A 7'\n1 B 6'\n1 C 4'",
+            'stock': "1 10'\n1 8'\n1 7'",
+            'strategy': 'portfolio',
+        })
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('Best strategy:', resp.get_data(as_text=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
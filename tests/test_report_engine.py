@@ -0,0 +1,50 @@
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from forgecore.backend.report_engine.main import ReportEngine
+from fakedb import SQLiteConnection
+
+
+class TestReportEngine(unittest.TestCase):
+    def setUp(self):
+        self.cnx = SQLiteConnection()
+        self.cnx.run("INSERT INTO jobs (id, name) VALUES (?, ?)",
+                     [(1, 'Mill'), (2, 'Canopy'), (3, 'Empty')])
+        self.cnx.run(
+            "INSERT INTO materials (id, length_inches, source, is_remnant, job_id) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(10, 240, None, 0, None), (11, 240, None, 0, None), (12, 60, 'yard', 1, None),
+             (13, 100, 'offcut', 1, 1), (14, 30, 'offcut', 1, 2)],
+        )
+        self.cnx.run(
+            "INSERT INTO cut_parts (part_length_inches, material_id, job_id) VALUES (?, ?, ?)",
+            [(100, 10, 1), (40, 10, 1), (50, 12, 1), (300, None, 1),
+             (200, 11, 2), (5, 11, 2), (20, 10, 2)],
+        )
+
+    def test_jobs_report(self):
+        rows = {row['job_id']: row for row in ReportEngine(cnx=self.cnx).jobs_report()}
+        self.assertEqual(sorted(rows), [1, 2, 3])
+        mill = rows[1]
+        self.assertEqual((mill['pieces'], mill['total_inches'], mill['assigned']), (4, 490, 3))
+        self.assertEqual(mill['stock_inches'], 300)
+        self.assertEqual((mill['remnants'], mill['remnant_inches']), (1, 100))
+        self.assertEqual(mill['scrap_inches'], 300 - 190 - 100)
+        canopy = rows[2]
+        # Stick 10 is shared with job 1 and counts for both jobs.
+        self.assertEqual(canopy['stock_inches'], 480)
+        self.assertEqual(canopy['scrap_inches'], 480 - 225 - 30)
+        self.assertAlmostEqual(canopy['scrap_pct'], 225 / 480 * 100)
+        self.assertEqual(rows[3]['pieces'], 0)
+        self.assertEqual(rows[3]['scrap_pct'], 0.0)
+
+    def test_selected_jobs(self):
+        engine = ReportEngine(cnx=self.cnx)
+        self.assertEqual([row['job_id'] for row in engine.jobs_report([2, 2])], [2])
+        self.assertEqual(engine.jobs_report([]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from app.cut_optimizer_app import app, parse_demand, parse_inventory, plan_demand
+from app.result_cache import ResultCache, plan_key
+
+
+class TestResultCache(unittest.TestCase):
+    def plan(self, cache, parts, stock, kerf=0.125, strategy='ffd'):
+        demand = parse_demand(parts)
+        inventory = parse_inventory(stock)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return plan_demand(demand, inventory, kerf, strategy)
+
+        return cache.plan(demand, inventory, kerf, strategy, compute), calls
+
+    def test_key_is_canonical(self):
+        a = plan_key(parse_demand("2 A 10'\n3 B 5'"), parse_inventory("4 20'\n1 40'"), 0.125, 'ffd')
+        b = plan_key(parse_demand("3 B 60\n2 A 120"), parse_inventory("1 480\n4 240"), 0.125, 'ffd')
+        self.assertEqual(a, b)
+        c = plan_key(parse_demand("3 B 60\n2 A 120"), parse_inventory("1 480\n4 240"), 0.125, 'bfd')
+        self.assertNotEqual(a, c)
+        d = plan_key(parse_demand("3 B 60\n2 A 120"), parse_inventory("1 480\n4 240"), 0.0, 'ffd')
+        self.assertNotEqual(a, d)
+
+    def test_hit_uses_current_spelling(self):
+        cache = ResultCache()
+        (bins, uncut, layout, _), calls = self.plan(cache, "2 A 10'\n9 B 5'", "1 20'")
+        self.assertEqual(calls, [1])
+        (bins2, uncut2, layout2, _), calls = self.plan(cache, "9 B 60\n2 A 120", "1 240")
+        self.assertEqual(calls, [])
+        self.assertEqual(layout2, layout)
+        self.assertEqual(
+            [[(p['mark'], p['length']) for p in b['parts']] for b in bins2],
+            [[(p['mark'], p['length']) for p in b['parts']] for b in bins],
+        )
+        self.assertEqual([b['remaining'] for b in bins2], [b['remaining'] for b in bins])
+        self.assertEqual(bins2[0]['parts'][0]['length_str'], '120')
+        self.assertEqual(bins2[0]['stock_str'], '240')
+        self.assertEqual(len(uncut2), len(uncut))
+        self.assertEqual({p['length_str'] for p in uncut2}, {'120', '60'})
+        self.assertEqual(cache.info()['hits'], 1)
+        self.assertEqual(cache.info()['misses'], 1)
+
+    def test_lru(self):
+        cache = ResultCache(max_entries=1)
+        self.plan(cache, "1 A 10'", "1 20'")
+        self.plan(cache, "1 B 10'", "1 20'")
+        _, calls = self.plan(cache, "1 A 10'", "1 20'")
+        self.assertEqual(calls, [1])
+        self.assertEqual(cache.info()['entries'], 1)
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            (bins, _, _, _), _ = self.plan(ResultCache(directory=tmpdir), "5 A 4'", "2 10'")
+            cache = ResultCache(directory=tmpdir)
+            (bins2, _, _, _), calls = self.plan(cache, "5 A 4'", "2 10'")
+            self.assertEqual(calls, [])
+            self.assertEqual(cache.info()['disk_hits'], 1)
+            self.assertEqual([len(b['parts']) for b in bins2], [len(b['parts']) for b in bins])
+
+    def test_cache_info_route(self):
+        resp = app.test_client().get('/cache_info')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('misses', resp.get_json()['plans'])
+        self.assertIn('hits', resp.get_json()['lengths'])
+
+
+if __name__ == '__main__':
+    unittest.main()